@@ -0,0 +1,5 @@
+"""
+Бенчмарки и нагрузочные тесты бота.
+
+Не используются ботом во время работы; запускаются вручную из корня репозитория.
+"""
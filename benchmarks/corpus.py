@@ -0,0 +1,117 @@
+"""
+Синтетические корпуса входных данных: ответы pinfo и SteamID.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import List
+
+PRIVILEGE_GROUPS = ['moderator', 'admin', 'senior_admin', 'owner']
+
+STEAM64_BASE = 76561197960265728
+
+
+def make_steam64(account_id: int) -> str:
+    """
+    Сформировать 64-bit SteamID по номеру аккаунта.
+    """
+    return str(STEAM64_BASE + account_id)
+
+
+def make_pinfo_response(rng: random.Random, steam_id: str, groups: List[str] = PRIVILEGE_GROUPS) -> str:
+    """
+    Сформировать правдоподобный ответ pinfo.
+
+    Args:
+        rng: Генератор случайных чисел
+        steam_id: SteamID игрока
+        groups: Группы привилегий
+
+    Returns:
+        Текст ответа
+    """
+    name = f"Player{rng.randint(1, 99999)}"
+    kind = rng.random()
+
+    if kind < 0.25:
+        return f'Player "{name}" ({steam_id}) - No privileges'
+
+    group = rng.choice(groups)
+    if kind < 0.4:
+        # Бессрочная привилегия
+        return f'Player "{name}" ({steam_id}) - Group: {group}'
+
+    expires = datetime(2025, 1, 1) + timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+    if kind < 0.7:
+        expires_str = expires.strftime("%Y-%m-%d %H:%M:%S")
+    else:
+        expires_str = expires.strftime("%d.%m.%Y %H:%M:%S")
+
+    response = f'Player "{name}" ({steam_id}) - Group: {group}, Expires: {expires_str}'
+    if kind > 0.9:
+        # Многострочный ответ с дополнительными полями, как у реальных плагинов
+        response += (
+            f"\nPermissions: {rng.randint(1, 200)}"
+            f"\nLast seen: {expires.strftime('%Y-%m-%d %H:%M:%S')}"
+            f"\nOxide groups: default, {group}"
+        )
+    return response
+
+
+def make_pinfo_corpus(size: int, seed: int = 0) -> List[str]:
+    """
+    Сформировать корпус ответов pinfo.
+
+    Args:
+        size: Количество ответов
+        seed: Seed генератора случайных чисел
+
+    Returns:
+        Список ответов
+    """
+    rng = random.Random(seed)
+    return [make_pinfo_response(rng, make_steam64(rng.randint(1, 10 ** 9))) for _ in range(size)]
+
+
+def make_steam_id_corpus(size: int, seed: int = 0) -> List[str]:
+    """
+    Сформировать смешанный корпус SteamID (валидные и невалидные).
+
+    Args:
+        size: Количество значений
+        seed: Seed генератора случайных чисел
+
+    Returns:
+        Список строк
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        kind = rng.random()
+        account_id = rng.randint(1, 10 ** 9)
+        if kind < 0.6:
+            corpus.append(make_steam64(account_id))
+        elif kind < 0.8:
+            corpus.append(f"STEAM_{rng.randint(0, 1)}:{account_id & 1}:{account_id >> 1}")
+        elif kind < 0.9:
+            corpus.append(f"  {make_steam64(account_id)}  ")
+        else:
+            corpus.append(rng.choice(["", "abc", "7656119", "STEAM_9:0:1", "12345678901234567"]))
+    return corpus
+
+
+def make_oversized_steam_ids(count: int, length: int) -> List[str]:
+    """
+    Сформировать заведомо длинные входные строки (защита от "тяжёлых" значений).
+
+    Args:
+        count: Количество строк
+        length: Длина каждой строки
+
+    Returns:
+        Список строк
+    """
+    return (
+        ["STEAM_0:1:" + "9" * length] * (count // 2)
+        + ["7656119" + "1" * length] * (count - count // 2)
+    )
@@ -0,0 +1,270 @@
+"""
+Локальный поддельный RCON-сервер Rust для нагрузочных тестов.
+
+Поддерживает оба протокола, которые умеет RCONClient:
+- Source RCON (TCP, бинарные пакеты);
+- WebRCON (websocket, JSON-сообщения, rcon.web 1).
+
+Отвечает на pinfo заранее заданными или сгенерированными ответами
+с настраиваемой задержкой и долей ошибок.
+
+Запуск отдельным процессом:
+    python -m benchmarks.fake_rcon --protocol source --port 28016 --password secret --latency 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import struct
+import zlib
+from typing import Callable, Dict, Optional
+
+from aiohttp import web, WSMsgType
+
+from benchmarks.corpus import make_pinfo_response
+
+logger = logging.getLogger(__name__)
+
+# Типы пакетов Source RCON
+SERVERDATA_AUTH = 3
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_RESPONSE_VALUE = 0
+
+
+def default_responder(command: str) -> str:
+    """
+    Сформировать детерминированный ответ на команду.
+
+    Для одного и того же SteamID ответ pinfo всегда одинаковый.
+    """
+    if command.startswith('pinfo '):
+        steam_id = command.split(' ', 1)[1].strip()
+        rng = random.Random(zlib.crc32(steam_id.encode()))
+        return make_pinfo_response(rng, steam_id)
+    return f"Unknown command: {command}"
+
+
+class FakeRconServer:
+    """
+    Поддельный RCON-сервер.
+    """
+
+    def __init__(self, protocol: str = 'source', host: str = '127.0.0.1', port: int = 0,
+                 password: str = 'secret', latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, responses: Optional[Dict[str, str]] = None,
+                 responder: Callable[[str], str] = default_responder, seed: int = 0):
+        """
+        Инициализировать сервер.
+
+        Args:
+            protocol: 'source' или 'web'
+            host: Адрес для прослушивания
+            port: Порт (0 — выбрать свободный)
+            password: Пароль RCON
+            latency: Базовая задержка ответа в секундах
+            jitter: Случайная добавка к задержке (равномерно 0..jitter)
+            error_rate: Доля команд, на которые сервер обрывает соединение
+            responses: Заготовленные ответы {команда: ответ}
+            responder: Генератор ответа для команд без заготовки
+            seed: Seed генератора случайных чисел
+        """
+        self.protocol = protocol
+        self.host = host
+        self.port = port
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.responses = responses or {}
+        self.responder = responder
+        self._rng = random.Random(seed)
+
+        self.commands_received = 0
+        self.errors_injected = 0
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> int:
+        """
+        Запустить сервер.
+
+        Returns:
+            Фактический порт
+        """
+        if self.protocol == 'web':
+            app = web.Application()
+            app.router.add_get('/{password}', self._handle_web)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, self.host, self.port)
+            await site.start()
+            self.port = self._runner.addresses[0][1]
+        else:
+            self._server = await asyncio.start_server(self._handle_source, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+
+        logger.info(f"Поддельный RCON ({self.protocol}) слушает {self.host}:{self.port}")
+        return self.port
+
+    async def stop(self):
+        """
+        Остановить сервер.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _respond(self, command: str) -> Optional[str]:
+        """
+        Подготовить ответ с учётом задержки и инъекции ошибок.
+
+        Returns:
+            Ответ или None, если нужно оборвать соединение
+        """
+        self.commands_received += 1
+
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.errors_injected += 1
+            return None
+
+        if command in self.responses:
+            return self.responses[command]
+        return self.responder(command)
+
+    async def _handle_source(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Обработать соединение Source RCON.
+        """
+        authenticated = False
+        try:
+            while True:
+                header = await reader.readexactly(4)
+                (size,) = struct.unpack('<i', header)
+                packet = await reader.readexactly(size)
+                request_id, packet_type = struct.unpack('<ii', packet[:8])
+                body = packet[8:-2].decode('utf-8', errors='replace')
+
+                if packet_type == SERVERDATA_AUTH:
+                    authenticated = body == self.password
+                    self._write_packet(writer, request_id, SERVERDATA_RESPONSE_VALUE, '')
+                    self._write_packet(
+                        writer, request_id if authenticated else -1, SERVERDATA_AUTH_RESPONSE, ''
+                    )
+                    await writer.drain()
+                    if not authenticated:
+                        break
+                    continue
+
+                if not authenticated:
+                    break
+
+                response = await self._respond(body)
+                if response is None:
+                    break
+                self._write_packet(writer, request_id, SERVERDATA_RESPONSE_VALUE, response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _write_packet(writer: asyncio.StreamWriter, request_id: int, packet_type: int, body: str):
+        """
+        Записать пакет Source RCON.
+        """
+        payload = struct.pack('<ii', request_id, packet_type) + body.encode('utf-8') + b'\x00\x00'
+        writer.write(struct.pack('<i', len(payload)) + payload)
+
+    async def _handle_web(self, request: web.Request) -> web.StreamResponse:
+        """
+        Обработать соединение WebRCON.
+        """
+        if request.match_info['password'] != self.password:
+            raise web.HTTPUnauthorized()
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                break
+
+            data = json.loads(message.data)
+            response = await self._respond(data.get('Message', ''))
+            if response is None:
+                break
+
+            await ws.send_str(json.dumps({
+                'Message': response,
+                'Identifier': data.get('Identifier', 0),
+                'Type': 'Generic',
+                'Stacktrace': '',
+            }))
+
+        await ws.close()
+        return ws
+
+
+async def _serve_forever(args: argparse.Namespace):
+    """
+    Запустить сервер до прерывания.
+    """
+    responses = {}
+    if args.responses:
+        with open(args.responses, 'r', encoding='utf-8') as f:
+            responses = json.load(f)
+
+    server = FakeRconServer(
+        protocol=args.protocol,
+        host=args.host,
+        port=args.port,
+        password=args.password,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        responses=responses,
+    )
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    """
+    Точка входа.
+    """
+    parser = argparse.ArgumentParser(description="Поддельный RCON-сервер Rust")
+    parser.add_argument('--protocol', choices=['source', 'web'], default='source')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=28016)
+    parser.add_argument('--password', default='secret')
+    parser.add_argument('--latency', type=float, default=0.0, help="Задержка ответа в секундах")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Случайная добавка к задержке")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Доля оборванных команд")
+    parser.add_argument('--responses', help="JSON-файл с ответами {команда: ответ}")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(_serve_forever(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
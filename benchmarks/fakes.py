@@ -0,0 +1,338 @@
+"""
+Синтетические объекты Discord для бенчмарков и нагрузочных тестов.
+
+Объекты повторяют только ту часть интерфейса discord.py, которую использует бот:
+роли, участники, сервер и каналы.
+"""
+
+import os
+import asyncio
+import random
+import tempfile
+from typing import Dict, List, Optional
+
+import discord
+import yaml
+
+from config.config_loader import load_config
+
+# Базовые ID, чтобы синтетические снежинки не пересекались между типами
+GUILD_ID = 900000000000000000
+ROLE_ID_BASE = 910000000000000000
+MEMBER_ID_BASE = 920000000000000000
+CHANNEL_ID_BASE = 930000000000000000
+
+_STATUSES = (
+    discord.Status.online,
+    discord.Status.idle,
+    discord.Status.dnd,
+    discord.Status.offline,
+)
+
+
+class FakeRole:
+    """
+    Роль Discord.
+    """
+
+    def __init__(self, role_id: int, name: str, position: int = 0):
+        self.id = role_id
+        self.name = name
+        self.position = position
+        self.guild: Optional['FakeGuild'] = None
+
+    @property
+    def mention(self) -> str:
+        return f"<@&{self.id}>"
+
+    @property
+    def members(self) -> List['FakeMember']:
+        return [member for member in self.guild.members if self in member.roles]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, FakeRole) and other.id == self.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __repr__(self) -> str:
+        return f"<FakeRole id={self.id} name={self.name!r}>"
+
+
+class FakeMember:
+    """
+    Участник Discord.
+    """
+
+    # Имитация задержки REST-запросов Discord (add_roles/remove_roles/send)
+    api_latency = 0.0
+
+    def __init__(self, member_id: int, name: str, roles: List[FakeRole],
+                 status: discord.Status = discord.Status.offline, guild: Optional['FakeGuild'] = None):
+        self.id = member_id
+        self.name = name
+        self.nick: Optional[str] = None
+        self.roles = roles
+        self.status = status
+        self.guild = guild
+        self.role_edits = 0
+
+    @property
+    def display_name(self) -> str:
+        return self.nick or self.name
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    def copy(self) -> 'FakeMember':
+        """
+        Снимок участника (аналог before в событиях gateway).
+        """
+        clone = FakeMember(self.id, self.name, list(self.roles), self.status, self.guild)
+        clone.nick = self.nick
+        return clone
+
+    async def add_roles(self, *roles: FakeRole, reason: Optional[str] = None):
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+        for role in roles:
+            if role not in self.roles:
+                self.roles.append(role)
+        self.role_edits += 1
+
+    async def remove_roles(self, *roles: FakeRole, reason: Optional[str] = None):
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+        self.roles = [role for role in self.roles if role not in roles]
+        self.role_edits += 1
+
+    async def send(self, content: str = None, **kwargs):
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+        return None
+
+    def __repr__(self) -> str:
+        return f"<FakeMember id={self.id} name={self.name!r}>"
+
+
+class _FakeResponse:
+    """
+    Ответ HTTP для исключений discord.py.
+    """
+
+    def __init__(self, status: int):
+        self.status = status
+        self.reason = 'Not Found'
+
+
+class FakeMessage:
+    """
+    Сообщение канала (частичное и полученное — один объект).
+    """
+
+    def __init__(self, channel: 'FakeChannel', message_id: int):
+        self.channel = channel
+        self.id = message_id
+
+    async def edit(self, **kwargs):
+        await self.channel._request()
+        if self.id not in self.channel.messages:
+            raise discord.NotFound(_FakeResponse(404), 'Unknown Message')
+        self.channel.edits += 1
+        return self
+
+    async def delete(self):
+        await self.channel._request()
+        if self.channel.messages.pop(self.id, None) is None:
+            raise discord.NotFound(_FakeResponse(404), 'Unknown Message')
+        self.channel.deletes += 1
+
+
+class FakeChannel:
+    """
+    Текстовый канал со счётчиками REST-запросов (доска /staff).
+    """
+
+    # Имитация задержки REST-запросов Discord (send/edit/delete/fetch)
+    api_latency = 0.0
+
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.messages: Dict[int, FakeMessage] = {}
+        self._next_id = channel_id + 1
+        self.sends = 0
+        self.edits = 0
+        self.deletes = 0
+        self.fetches = 0
+
+    async def _request(self):
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+
+    async def send(self, content: str = None, **kwargs) -> FakeMessage:
+        await self._request()
+        message = FakeMessage(self, self._next_id)
+        self._next_id += 1
+        self.messages[message.id] = message
+        self.sends += 1
+        return message
+
+    def get_partial_message(self, message_id: int) -> FakeMessage:
+        return self.messages.get(message_id) or FakeMessage(self, message_id)
+
+    async def fetch_message(self, message_id: int) -> FakeMessage:
+        await self._request()
+        self.fetches += 1
+        message = self.messages.get(message_id)
+        if message is None:
+            raise discord.NotFound(_FakeResponse(404), 'Unknown Message')
+        return message
+
+    def __repr__(self) -> str:
+        return f"<FakeChannel id={self.id} messages={len(self.messages)}>"
+
+
+class FakeGuild:
+    """
+    Сервер Discord.
+    """
+
+    def __init__(self, guild_id: int = GUILD_ID, name: str = "Benchmark Guild"):
+        self.id = guild_id
+        self.name = name
+        self.roles: List[FakeRole] = []
+        self.members: List[FakeMember] = []
+        self.channels: Dict[int, object] = {}
+        self._roles_by_id: Dict[int, FakeRole] = {}
+        self._members_by_id: Dict[int, FakeMember] = {}
+
+    @property
+    def member_count(self) -> int:
+        return len(self.members)
+
+    def add_role(self, role: FakeRole):
+        role.guild = self
+        self.roles.append(role)
+        self._roles_by_id[role.id] = role
+
+    def add_member(self, member: FakeMember):
+        member.guild = self
+        self.members.append(member)
+        self._members_by_id[member.id] = member
+
+    def remove_member(self, member: FakeMember):
+        self.members.remove(member)
+        del self._members_by_id[member.id]
+
+    def get_role(self, role_id: int) -> Optional[FakeRole]:
+        return self._roles_by_id.get(role_id)
+
+    def get_member(self, member_id: int) -> Optional[FakeMember]:
+        return self._members_by_id.get(member_id)
+
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id)
+
+    def __repr__(self) -> str:
+        return f"<FakeGuild id={self.id} members={len(self.members)}>"
+
+
+def build_guild(member_count: int, admin_role_count: int = 4, staff_per_role: int = 10,
+                extra_role_count: int = 20, roles_per_member: int = 3, seed: int = 0) -> FakeGuild:
+    """
+    Построить синтетический сервер.
+
+    Args:
+        member_count: Количество участников
+        admin_role_count: Количество ролей администрации
+        staff_per_role: Количество участников с каждой ролью администрации
+        extra_role_count: Количество прочих (не администраторских) ролей
+        roles_per_member: Сколько прочих ролей у каждого участника
+        seed: Seed генератора случайных чисел
+
+    Returns:
+        FakeGuild
+    """
+    rng = random.Random(seed)
+    guild = FakeGuild()
+
+    admin_roles = []
+    for index in range(admin_role_count):
+        role = FakeRole(ROLE_ID_BASE + index, f"Staff {index + 1}", position=1000 + index)
+        guild.add_role(role)
+        admin_roles.append(role)
+
+    extra_roles = []
+    for index in range(extra_role_count):
+        role = FakeRole(ROLE_ID_BASE + admin_role_count + index, f"Role {index + 1}", position=index)
+        guild.add_role(role)
+        extra_roles.append(role)
+
+    for index in range(member_count):
+        roles = rng.sample(extra_roles, min(roles_per_member, len(extra_roles)))
+        member = FakeMember(
+            MEMBER_ID_BASE + index,
+            f"user{index:06d}",
+            roles,
+            status=rng.choice(_STATUSES),
+        )
+        guild.add_member(member)
+
+    staff_count = min(member_count, admin_role_count * staff_per_role)
+    staff_members = rng.sample(guild.members, staff_count)
+    for index, member in enumerate(staff_members):
+        member.roles.append(admin_roles[index % admin_role_count])
+
+    return guild
+
+
+def make_config(guild: FakeGuild, admin_role_count: int = 4, staff_channel_id: int = CHANNEL_ID_BASE,
+                privilege_groups: Optional[List[str]] = None) -> dict:
+    """
+    Сформировать config.yml, совместимый с синтетическим сервером.
+
+    Args:
+        guild: Синтетический сервер
+        admin_role_count: Количество ролей администрации
+        staff_channel_id: ID канала /staff
+        privilege_groups: Группы привилегий
+
+    Returns:
+        Dict с конфигурацией
+    """
+    admin_roles = [
+        {'role_id': role.id, 'name': role.name, 'priority': index + 1}
+        for index, role in enumerate(guild.roles[:admin_role_count])
+    ]
+    return {
+        'discord': {
+            'staff_channel_id': staff_channel_id,
+            'admin_roles': admin_roles,
+            'high_staff_roles': [admin_roles[-1]['role_id']] if admin_roles else [],
+            'command_channel_id': None,
+        },
+        'rcon': {'timeout': 10, 'retry_attempts': 1},
+        'privileges': {
+            'groups': privilege_groups or ['moderator', 'admin', 'senior_admin', 'owner'],
+        },
+    }
+
+
+def install_config(config: dict) -> dict:
+    """
+    Загрузить конфигурацию через штатный load_config.
+
+    Args:
+        config: Dict с конфигурацией
+
+    Returns:
+        Загруженная конфигурация
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.yml', delete=False, encoding='utf-8') as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+        path = f.name
+    try:
+        return load_config(path)
+    finally:
+        os.remove(path)
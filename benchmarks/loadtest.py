@@ -0,0 +1,303 @@
+"""
+Сквозной нагрузочный тест логики /addprivilege без Discord и без реального Rust-сервера.
+
+Цепочка: RCONCluster → поддельные RCON-серверы → parse_pinfo_response →
+SQLite через database.connection → роли на синтетических участниках.
+
+Запуск из корня репозитория:
+    python -m benchmarks.loadtest --requests 1000 --concurrency 200 --latency 0.02 --error-rate 0.01
+    python -m benchmarks.loadtest --protocol web --output loadtest.json
+    python -m benchmarks.loadtest --servers 3 --error-rate 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from benchmarks.corpus import make_steam64
+from benchmarks.fake_rcon import FakeRconServer
+from benchmarks.fakes import FakeMember, build_guild, install_config, make_config
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    Перцентиль по методу ближайшего ранга.
+
+    Args:
+        sorted_values: Отсортированные значения
+        q: Перцентиль (0..100)
+
+    Returns:
+        Значение перцентиля (0.0 для пустого списка)
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """
+    Сводка по задержкам (в миллисекундах).
+    """
+    values = sorted(samples)
+    return {
+        'count': len(values),
+        'p50_ms': percentile(values, 50) * 1000,
+        'p95_ms': percentile(values, 95) * 1000,
+        'p99_ms': percentile(values, 99) * 1000,
+        'max_ms': (values[-1] if values else 0.0) * 1000,
+        'mean_ms': (sum(values) / len(values) if values else 0.0) * 1000,
+    }
+
+
+class FakeStaffEmbedService:
+    """
+    Заглушка StaffEmbedService: считает обновления Embed.
+    """
+
+    def __init__(self, latency: float = 0.0, refresh_delay: float = 0.0):
+        self.latency = latency
+        self.refresh_delay = refresh_delay
+        self.updates = 0
+        self._pending_refresh: Dict[int, asyncio.Task] = {}
+
+    async def update_staff_message(self, guild) -> bool:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.updates += 1
+        return True
+
+    def request_refresh(self, guild):
+        if guild.id not in self._pending_refresh:
+            self._pending_refresh[guild.id] = asyncio.create_task(self._delayed_refresh(guild))
+
+    async def _delayed_refresh(self, guild):
+        try:
+            await asyncio.sleep(self.refresh_delay)
+        finally:
+            self._pending_refresh.pop(guild.id, None)
+        await self.update_staff_message(guild)
+
+    async def drain(self):
+        """
+        Дождаться отложенных обновлений.
+        """
+        while self._pending_refresh:
+            await asyncio.gather(*self._pending_refresh.values())
+
+
+def _timed(name: str, func, timings: Dict[str, List[float]]):
+    """
+    Обернуть синхронную функцию замером времени.
+    """
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings[name].append(time.perf_counter() - started)
+    return wrapper
+
+
+def _timed_async(name: str, func, timings: Dict[str, List[float]]):
+    """
+    Обернуть корутину замером времени.
+    """
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            timings[name].append(time.perf_counter() - started)
+    return wrapper
+
+
+async def run_loadtest(args: argparse.Namespace) -> dict:
+    """
+    Выполнить нагрузочный тест.
+
+    Returns:
+        Dict с отчётом
+    """
+    from database.connection import configure_database, init_database
+    from services.rcon import RCONClient, RCONCluster, RCONDispatcher
+    from services.privilege_sync import PrivilegeSyncService
+
+    guild = build_guild(args.members, staff_per_role=args.staff_per_role, seed=args.seed)
+    config = make_config(guild)
+    config['rcon'] = {'timeout': args.rcon_timeout, 'retry_attempts': args.retries}
+    # Сопоставление групп с ролями идёт по подстроке имени роли
+    config['discord']['admin_roles'] = [
+        {'role_id': role['role_id'], 'name': group, 'priority': role['priority']}
+        for role, group in zip(config['discord']['admin_roles'], config['privileges']['groups'])
+    ]
+    install_config(config)
+    FakeMember.api_latency = args.role_latency
+
+    database_path = args.database or os.path.join(tempfile.mkdtemp(prefix='loadtest_'), 'loadtest.db')
+    configure_database(f"sqlite:///{database_path}")
+    init_database()
+
+    servers: List[FakeRconServer] = []
+    if args.rcon_host is None:
+        for index in range(args.servers):
+            server = FakeRconServer(
+                protocol=args.protocol,
+                password=args.password,
+                latency=args.latency,
+                jitter=args.jitter,
+                error_rate=args.error_rate,
+                seed=args.seed + index,
+            )
+            await server.start()
+            servers.append(server)
+        endpoints = [(server.host, server.port) for server in servers]
+    else:
+        endpoints = [(args.rcon_host, args.rcon_port)]
+
+    embed_service = FakeStaffEmbedService(latency=args.embed_latency, refresh_delay=args.refresh_delay)
+    rcon_cluster = RCONCluster({
+        f"server{index + 1}": RCONClient(
+            host=host, port=port, password=args.password, protocol=args.protocol,
+            dispatcher=RCONDispatcher(args.rcon_rate, max_in_flight=args.rcon_in_flight)
+        )
+        for index, (host, port) in enumerate(endpoints)
+    })
+    sync_service = PrivilegeSyncService(rcon_cluster, embed_service)
+
+    timings: Dict[str, List[float]] = {'total': [], 'rcon': [], 'db': [], 'roles': []}
+    sync_service.fetch_privilege = _timed_async('rcon', sync_service.fetch_privilege, timings)
+    sync_service.save_privilege = _timed('db', sync_service.save_privilege, timings)
+    sync_service.apply_roles = _timed_async('roles', sync_service.apply_roles, timings)
+
+    # Фиксированная связка SteamID → участник, как в реальной базе
+    rng = random.Random(args.seed)
+    owners = rng.sample(guild.members, min(args.steam_ids, len(guild.members)))
+    pool = [(int(make_steam64(index + 1)), member) for index, member in enumerate(owners)]
+
+    statuses: Counter = Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one_request():
+        steam_id, member = rng.choice(pool)
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result = await sync_service.sync_privilege(guild, member, steam_id)
+                statuses[result['status']] += 1
+            except Exception as e:
+                logger.error(f"Необработанная ошибка запроса: {e}", exc_info=True)
+                statuses['exception'] += 1
+            finally:
+                timings['total'].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    await embed_service.drain()
+
+    for server in servers:
+        await server.stop()
+
+    report = {
+        'params': {key: value for key, value in vars(args).items() if key != 'output'},
+        'requests': args.requests,
+        'elapsed_s': elapsed,
+        'throughput_rps': args.requests / elapsed if elapsed else 0.0,
+        'statuses': dict(statuses),
+        'latency': {name: summarize(samples) for name, samples in timings.items()},
+        'embed_updates': embed_service.updates,
+        'role_edits': sum(member.role_edits for _, member in pool),
+        'rcon_queue': rcon_cluster.metrics(),
+    }
+    if servers:
+        report['rcon_server'] = {
+            'commands_received': sum(server.commands_received for server in servers),
+            'errors_injected': sum(server.errors_injected for server in servers),
+        }
+    return report
+
+
+def print_report(report: dict):
+    """
+    Вывести отчёт в читаемом виде.
+    """
+    print(f"Запросов: {report['requests']} за {report['elapsed_s']:.2f} с "
+          f"({report['throughput_rps']:.1f} запросов/с)")
+    print(f"Статусы: {report['statuses']}")
+    print(f"{'фаза':<8}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stats in report['latency'].items():
+        print(f"{name:<8}{stats['count']:>8}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+              f"{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}")
+    print(f"Обновлений Embed: {report['embed_updates']}, изменений ролей: {report['role_edits']}")
+    if 'rcon_server' in report:
+        print(f"RCON-сервер: {report['rcon_server']}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Разобрать аргументы командной строки.
+    """
+    parser = argparse.ArgumentParser(description="Нагрузочный тест логики /addprivilege")
+    parser.add_argument('--requests', type=int, default=500, help="Всего запросов")
+    parser.add_argument('--concurrency', type=int, default=200, help="Одновременных запросов")
+    parser.add_argument('--protocol', choices=['source', 'web'], default='source')
+    parser.add_argument('--password', default='secret')
+    parser.add_argument('--servers', type=int, default=1, help="Встроенных RCON-серверов (опрашиваются параллельно)")
+    parser.add_argument('--rcon-host', help="Использовать внешний RCON-сервер вместо встроенного")
+    parser.add_argument('--rcon-port', type=int, default=28016)
+    parser.add_argument('--rcon-timeout', type=int, default=5)
+    parser.add_argument('--rcon-rate', type=float, default=0, help="RCON-команд в секунду на сервер (0 — без ограничения)")
+    parser.add_argument('--rcon-in-flight', type=int, default=0, help="Одновременных RCON-команд на сервер (0 — без ограничения)")
+    parser.add_argument('--retries', type=int, default=2, help="Попыток pinfo")
+    parser.add_argument('--latency', type=float, default=0.02, help="Задержка RCON в секундах")
+    parser.add_argument('--jitter', type=float, default=0.02, help="Разброс задержки RCON")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Доля оборванных RCON-команд")
+    parser.add_argument('--role-latency', type=float, default=0.0, help="Задержка REST при выдаче ролей")
+    parser.add_argument('--embed-latency', type=float, default=0.0, help="Задержка обновления Embed")
+    parser.add_argument('--refresh-delay', type=float, default=1.0, help="Окно объединения обновлений Embed (сек)")
+    parser.add_argument('--members', type=int, default=5000, help="Участников на сервере")
+    parser.add_argument('--staff-per-role', type=int, default=25)
+    parser.add_argument('--steam-ids', type=int, default=1000, help="Различных SteamID в нагрузке")
+    parser.add_argument('--database', help="Путь к файлу SQLite (по умолчанию временный)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Файл для JSON-отчёта")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Логи бота уровня INFO")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа.
+    """
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stderr
+    )
+
+    report = asyncio.run(run_loadtest(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,353 @@
+"""
+Воспроизведение записанных событий gateway через обработчики бота.
+
+Запись делает services/recorder.py (секция recorder в config.yml). События
+проходят через обработчики bot.py (on_member_update, on_member_remove,
+on_presence_update, on_guild_role_update) и StaffEmbedService на
+синтетических объектах Discord, доска /staff — в SQLite и поддельном канале.
+
+Запуск из корня репозитория:
+    python -m benchmarks.replay gateway-20250101-120000.jsonl
+    python -m benchmarks.replay gateway.jsonl --speed 1 --refresh-delay 10
+    python -m benchmarks.replay gateway.jsonl --api-latency 0.05 --output replay.json
+
+--speed 0 (по умолчанию) — максимально быстро: окно объединения обновлений
+/staff (refresh_delay) отсчитывается по времени записи, поэтому число
+редактирований совпадает с воспроизведением в реальном времени.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import discord
+
+from benchmarks.fakes import CHANNEL_ID_BASE, MEMBER_ID_BASE, FakeChannel, FakeGuild, FakeMember, FakeRole, install_config
+from benchmarks.loadtest import _timed_async, summarize
+
+logger = logging.getLogger(__name__)
+
+
+def load_recording(path: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Прочитать запись.
+
+    Args:
+        path: Путь к файлу записи
+
+    Returns:
+        (составы серверов, события) в порядке записи
+
+    Raises:
+        ValueError: Если файл не является записью поддерживаемой версии
+    """
+    from services.recorder import RECORDING_VERSION, EVENT_START, EVENT_GUILD
+
+    guilds = []
+    events = []
+    with open(path, 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline() or 'null')
+        if not isinstance(header, dict) or header.get('t') != EVENT_START:
+            raise ValueError(f"{path} не является записью событий gateway")
+        if header.get('v') != RECORDING_VERSION:
+            raise ValueError(f"Версия записи {header.get('v')} не поддерживается")
+
+        for line in f:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            if event['t'] == EVENT_GUILD:
+                guilds.append(event)
+            else:
+                events.append(event)
+
+    return guilds, events
+
+
+class ReplayClient:
+    """
+    Клиент Discord для обработчиков bot.py: кэш всегда загружен.
+    """
+
+    def __init__(self, guilds: List[FakeGuild]):
+        self.guilds = guilds
+
+    def is_ready(self) -> bool:
+        return True
+
+
+class ReplayGuild:
+    """
+    Синтетический сервер по составу из записи.
+    """
+
+    def __init__(self, header: Dict[str, Any], index: int, fill: bool, member_ids: Set[int]):
+        """
+        Построить сервер.
+
+        Args:
+            header: Состав сервера из записи
+            index: Порядковый номер сервера (для ID канала /staff)
+            fill: Добавить участников без ролей до записанного числа участников
+            member_ids: ID участников из событий сервера (создаются при первом событии)
+        """
+        self.guild = FakeGuild(guild_id=header['g'], name=f"Replay Guild {index + 1}")
+        self.channel = FakeChannel(CHANNEL_ID_BASE + index * 1000000)
+        self.guild.channels[self.channel.id] = self.channel
+
+        admin_roles = []
+        for role_id, name, position, priority in header['roles']:
+            self.guild.add_role(FakeRole(role_id, name, position))
+            if priority:
+                admin_roles.append({'role_id': role_id, 'name': name, 'priority': priority})
+
+        for member_id, name, role_ids, status in header['staff']:
+            self.guild.add_member(FakeMember(member_id, name, self.roles(role_ids), status=discord.Status(status)))
+
+        if fill:
+            # Синтетические ID (от MEMBER_ID_BASE) не пересекаются с 56-битными ID записи
+            event_only = len(member_ids - {member.id for member in self.guild.members})
+            for offset in range(max(header['n'] - len(self.guild.members) - event_only, 0)):
+                self.guild.add_member(FakeMember(MEMBER_ID_BASE + offset, f"filler{offset:06d}", []))
+
+        self.config = {
+            'staff_channel_id': self.channel.id,
+            'admin_roles': admin_roles,
+            'high_staff_roles': [max(admin_roles, key=lambda role: role['priority'])['role_id']] if admin_roles else [],
+            'command_channel_id': None,
+        }
+
+    def roles(self, role_ids: List[int]) -> List[FakeRole]:
+        """
+        Роли по ID (роли, созданные после начала записи, добавляются на сервер).
+        """
+        roles = []
+        for role_id in role_ids:
+            role = self.guild.get_role(role_id)
+            if role is None:
+                role = FakeRole(role_id, str(role_id))
+                self.guild.add_role(role)
+            roles.append(role)
+        return roles
+
+    def member(self, member_id: int, role_ids: List[int], name: str) -> FakeMember:
+        """
+        Участник по ID (участник не из администрации создаётся при первом событии).
+        """
+        member = self.guild.get_member(member_id)
+        if member is None:
+            member = FakeMember(member_id, name, self.roles(role_ids))
+            self.guild.add_member(member)
+        return member
+
+
+async def dispatch(bot_module, replay_guild: ReplayGuild, event: Dict[str, Any]):
+    """
+    Применить событие к синтетическому серверу и вызвать обработчик бота.
+    """
+    from services.recorder import EVENT_MEMBER_UPDATE, EVENT_MEMBER_REMOVE, EVENT_PRESENCE_UPDATE, EVENT_ROLE_UPDATE
+
+    event_type = event['t']
+    if event_type == EVENT_MEMBER_UPDATE:
+        member = replay_guild.member(event['m'], event['b'], event.get('bn', event['an']))
+        before = member.copy()
+        before.roles = replay_guild.roles(event['b'])
+        before.nick = event.get('bn', event['an'])
+        member.roles = replay_guild.roles(event['a'])
+        member.nick = event['an']
+        await bot_module.on_member_update(before, member)
+
+    elif event_type == EVENT_MEMBER_REMOVE:
+        member = replay_guild.member(event['m'], event['r'], event['n'])
+        replay_guild.guild.remove_member(member)
+        await bot_module.on_member_remove(member)
+
+    elif event_type == EVENT_PRESENCE_UPDATE:
+        member = replay_guild.member(event['m'], event['r'], event['n'])
+        before = member.copy()
+        before.status = discord.Status(event['b'])
+        member.status = discord.Status(event['a'])
+        await bot_module.on_presence_update(before, member)
+
+    elif event_type == EVENT_ROLE_UPDATE:
+        role = replay_guild.roles([event['r']])[0]
+        before = FakeRole(role.id, event['b'][0], event['b'][1])
+        before.guild = replay_guild.guild
+        role.name, role.position = event['a']
+        await bot_module.on_guild_role_update(before, role)
+
+
+async def run_replay(args: argparse.Namespace) -> dict:
+    """
+    Воспроизвести запись.
+
+    Returns:
+        Dict с отчётом
+    """
+    from database.connection import configure_database, init_database
+    from services.rest import RestScheduler
+    from services.staff_embed import StaffEmbedService
+
+    headers, events = load_recording(args.recording)
+    member_ids: Dict[int, Set[int]] = {}
+    for event in events:
+        if 'm' in event:
+            member_ids.setdefault(event['g'], set()).add(event['m'])
+    replay_guilds = {
+        header['g']: ReplayGuild(header, index, args.fill, member_ids.get(header['g'], set()))
+        for index, header in enumerate(headers)
+    }
+    if not replay_guilds:
+        raise ValueError(f"В записи {args.recording} нет событий")
+
+    first = next(iter(replay_guilds.values()))
+    install_config({
+        'discord': first.config,
+        'guilds': {guild_id: replay_guild.config for guild_id, replay_guild in replay_guilds.items()},
+        'rcon': {'timeout': 10, 'retry_attempts': 1},
+        'privileges': {'groups': ['moderator', 'admin', 'senior_admin', 'owner']},
+        # Окно объединения обновлений: в реальном времени — с учётом ускорения, иначе — по времени записи
+        'staff_embed': {'refresh_delay': args.refresh_delay / args.speed if args.speed else 0},
+    })
+    FakeChannel.api_latency = args.api_latency
+
+    database_path = args.database or os.path.join(tempfile.mkdtemp(prefix='replay_'), 'replay.db')
+    configure_database(f"sqlite:///{database_path}")
+    init_database()
+
+    # Обработчики читают клиент и сервис /staff из глобальных переменных bot.py
+    import bot as bot_module
+    client = ReplayClient([replay_guild.guild for replay_guild in replay_guilds.values()])
+    service = StaffEmbedService(client, RestScheduler())
+    bot_module.bot = client
+    bot_module.staff_embed_service = service
+    bot_module.gateway_recorder = None
+
+    for replay_guild in replay_guilds.values():
+        await service.update_staff_message(replay_guild.guild)
+    initial = {guild_id: (replay_guild.channel.sends, replay_guild.channel.edits)
+               for guild_id, replay_guild in replay_guilds.items()}
+
+    timings: Dict[str, List[float]] = {'embed': []}
+    service.update_staff_message = _timed_async('embed', service.update_staff_message, timings)
+
+    # Окна объединения по времени записи: guild_id -> момент обновления
+    deadlines: Dict[int, float] = {}
+    current_ts = 0.0
+    if not args.speed:
+        def request_refresh(guild):
+            deadlines.setdefault(guild.id, current_ts + args.refresh_delay)
+        service.request_refresh = request_refresh
+
+    async def flush_due(ts: float):
+        for guild_id, deadline in list(deadlines.items()):
+            if deadline <= ts:
+                del deadlines[guild_id]
+                await service.update_staff_message(replay_guilds[guild_id].guild)
+
+    counts: Counter = Counter()
+    started = time.perf_counter()
+    for event in events:
+        current_ts = event['ts']
+        if args.speed:
+            delay = current_ts / args.speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        else:
+            await flush_due(current_ts)
+
+        event_started = time.perf_counter()
+        await dispatch(bot_module, replay_guilds[event['g']], event)
+        timings.setdefault(event['t'], []).append(time.perf_counter() - event_started)
+        counts[event['t']] += 1
+
+    # Обновления, ожидающие конца окна
+    await flush_due(float('inf'))
+    await asyncio.gather(*list(service._pending_refresh.values()), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+
+    channels = [replay_guild.channel for replay_guild in replay_guilds.values()]
+    return {
+        'params': {key: value for key, value in vars(args).items() if key != 'output'},
+        'guilds': len(replay_guilds),
+        'members': sum(len(replay_guild.guild.members) for replay_guild in replay_guilds.values()),
+        'events': dict(counts),
+        'recorded_span_s': events[-1]['ts'] - events[0]['ts'] if events else 0.0,
+        'elapsed_s': elapsed,
+        'events_per_s': len(events) / elapsed if elapsed else 0.0,
+        'latency': {name: summarize(samples) for name, samples in timings.items()},
+        'embed': {
+            'updates': len(timings['embed']),
+            'edits': sum(channel.edits for channel in channels) - sum(edits for _, edits in initial.values()),
+            'sends': sum(channel.sends for channel in channels) - sum(sends for sends, _ in initial.values()),
+            'deletes': sum(channel.deletes for channel in channels),
+            'fetches': sum(channel.fetches for channel in channels),
+        },
+    }
+
+
+def print_report(report: dict):
+    """
+    Вывести отчёт в читаемом виде.
+    """
+    print(f"Серверов: {report['guilds']}, участников: {report['members']}")
+    print(f"Событий: {sum(report['events'].values())} {report['events']} за {report['elapsed_s']:.2f} с "
+          f"({report['events_per_s']:.0f} событий/с, в записи {report['recorded_span_s']:.1f} с)")
+    print(f"{'обработчик':<12}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stats in report['latency'].items():
+        print(f"{name:<12}{stats['count']:>8}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}"
+              f"{stats['p99_ms']:>10.3f}{stats['max_ms']:>10.3f}")
+    embed = report['embed']
+    print(f"Обновлений /staff: {embed['updates']}, редактирований: {embed['edits']}, "
+          f"новых страниц: {embed['sends']}, удалённых: {embed['deletes']}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Разобрать аргументы командной строки.
+    """
+    parser = argparse.ArgumentParser(description="Воспроизведение записанных событий gateway")
+    parser.add_argument('recording', help="Файл записи (services/recorder.py)")
+    parser.add_argument('--speed', type=float, default=0,
+                        help="Ускорение относительно записи (1 — в реальном времени, 0 — максимально быстро)")
+    parser.add_argument('--refresh-delay', type=float, default=10, help="staff_embed.refresh_delay (сек записи)")
+    parser.add_argument('--api-latency', type=float, default=0.0, help="Задержка REST-запросов к каналу /staff")
+    parser.add_argument('--no-fill', dest='fill', action='store_false',
+                        help="Не добавлять участников без ролей до записанного числа участников")
+    parser.add_argument('--database', help="Путь к файлу SQLite (по умолчанию временный)")
+    parser.add_argument('--output', help="Файл для JSON-отчёта")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Логи бота уровня INFO")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа.
+    """
+    args = parse_args(argv)
+    # До импорта bot.py: его basicConfig не перенастраивает уже настроенный логгер
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stderr
+    )
+
+    report = asyncio.run(run_replay(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
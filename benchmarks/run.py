@@ -0,0 +1,397 @@
+"""
+Офлайн-бенчмарки горячих путей бота.
+
+Запуск из корня репозитория:
+    python -m benchmarks.run --members 1000,10000,200000 --output bench.json
+    python -m benchmarks.run --compare bench.json
+
+Результаты пишутся в JSON, чтобы прогоны можно было сравнивать между собой.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import discord
+
+from benchmarks.corpus import (
+    PRIVILEGE_GROUPS,
+    make_oversized_steam_ids,
+    make_pinfo_corpus,
+    make_steam_id_corpus,
+)
+from benchmarks.fakes import build_guild, install_config, make_config
+
+logger = logging.getLogger(__name__)
+
+
+def measure(func: Callable[[], object], repeat: int, number: int = 1) -> Dict[str, float]:
+    """
+    Замерить время выполнения функции.
+
+    Args:
+        func: Функция без аргументов
+        repeat: Количество замеров
+        number: Количество вызовов в одном замере
+
+    Returns:
+        Dict со статистикой времени одного вызова в секундах
+    """
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) / number)
+
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'max': max(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def _result(name: str, params: dict, stats: Dict[str, float], repeat: int, number: int, items: int = 1) -> dict:
+    """
+    Сформировать запись результата.
+    """
+    record = {
+        'name': name,
+        'params': params,
+        'repeat': repeat,
+        'number': number,
+        'items': items,
+        'unit': 's',
+    }
+    record.update(stats)
+    record['per_item'] = stats['median'] / items if items else stats['median']
+    logger.info(
+        f"{name} {params}: median={stats['median'] * 1000:.3f} ms "
+        f"(min={stats['min'] * 1000:.3f} ms, на элемент {record['per_item'] * 1e6:.3f} us)"
+    )
+    return record
+
+
+def _make_member_events(guild, admin_role_ids: set, count: int, seed: int) -> list:
+    """
+    Сформировать пары (before, after) для on_member_update.
+
+    Половина событий меняет роль администрации, половина — прочую роль.
+    """
+    rng = random.Random(seed)
+    admin_roles = [role for role in guild.roles if role.id in admin_role_ids]
+    other_roles = [role for role in guild.roles if role.id not in admin_role_ids]
+    events = []
+
+    for member in rng.sample(guild.members, min(count, len(guild.members))):
+        before = member.copy()
+        after = member.copy()
+        pool = admin_roles if rng.random() < 0.5 else other_roles
+        role = rng.choice(pool)
+        if role in after.roles:
+            after.roles.remove(role)
+        else:
+            after.roles.append(role)
+        events.append((before, after))
+
+    return events
+
+
+def _make_presence_events(guild, count: int, seed: int) -> list:
+    """
+    Сформировать пары (before, after) для on_presence_update.
+
+    Участники выбираются случайно по всему серверу, как приходят события шлюза.
+    """
+    rng = random.Random(seed)
+    statuses = [discord.Status.online, discord.Status.idle, discord.Status.dnd, discord.Status.offline]
+    events = []
+
+    for _ in range(count):
+        member = rng.choice(guild.members)
+        before = member.copy()
+        after = member.copy()
+        after.status = rng.choice(statuses)
+        events.append((before, after))
+
+    return events
+
+
+def bench_staff_embed(args, results: List[dict]):
+    """
+    Бенчмарки StaffEmbedService и фильтров on_member_update/on_presence_update.
+    """
+    from services.staff_embed import StaffEmbedService
+
+    for member_count in args.members:
+        guild = build_guild(
+            member_count,
+            admin_role_count=args.admin_roles,
+            staff_per_role=args.staff_per_role,
+            extra_role_count=args.extra_roles,
+            roles_per_member=args.roles_per_member,
+            seed=args.seed,
+        )
+        install_config(make_config(guild, admin_role_count=args.admin_roles))
+        service = StaffEmbedService(None)
+
+        params = {
+            'members': member_count,
+            'admin_roles': args.admin_roles,
+            'staff_per_role': args.staff_per_role,
+            'extra_roles': args.extra_roles,
+            'roles_per_member': args.roles_per_member,
+        }
+
+        def build_sections():
+            service._sections.clear()
+            service._get_sections(guild)
+
+        stats = measure(build_sections, args.repeat)
+        results.append(_result('staff_embed.build_sections', params, stats, args.repeat, 1))
+
+        def render_cold():
+            service._sections.clear()
+            service.render_pages(guild)
+
+        stats = measure(render_cold, args.repeat)
+        results.append(_result('staff_embed.render_pages', params, stats, args.repeat, 1))
+
+        # Перерисовка после изменения одного администратора (кэш секций прогрет)
+        staff_member = next(member for member in guild.members if service.is_staff_member(member))
+        statuses = [discord.Status.online, discord.Status.offline]
+
+        def render_after_change():
+            staff_member.status = statuses[staff_member.status == discord.Status.online]
+            service.invalidate_member(staff_member)
+            service.render_pages(guild)
+
+        service.render_pages(guild)
+        stats = measure(render_after_change, args.repeat)
+        results.append(_result('staff_embed.render_pages_after_change', params, stats, args.repeat, 1))
+
+        events = _make_member_events(guild, set(service.get_admin_role_ids(guild.id)), args.member_events, args.seed)
+
+        def run_filter():
+            for before, after in events:
+                service.is_staff_update(before, after)
+
+        stats = measure(run_filter, args.repeat)
+        results.append(_result(
+            'bot.on_member_update_filter', dict(params, events=len(events)),
+            stats, args.repeat, 1, items=len(events)
+        ))
+
+        presence_events = _make_presence_events(guild, args.member_events, args.seed)
+        service.is_staff_member(guild.members[0])
+
+        def run_presence_filter():
+            for before, after in presence_events:
+                if before.status != after.status:
+                    service.is_staff_member(after)
+
+        stats = measure(run_presence_filter, args.repeat)
+        results.append(_result(
+            'bot.on_presence_update_filter', dict(params, events=len(presence_events)),
+            stats, args.repeat, 1, items=len(presence_events)
+        ))
+
+
+def bench_pinfo(args, results: List[dict]):
+    """
+    Бенчмарк parse_pinfo_response на корпусе ответов.
+    """
+    from utils.pinfo_parser import parse_pinfo_response
+
+    corpus = make_pinfo_corpus(args.pinfo_corpus, seed=args.seed)
+
+    def run():
+        for response in corpus:
+            parse_pinfo_response(response, PRIVILEGE_GROUPS)
+
+    stats = measure(run, args.repeat)
+    results.append(_result(
+        'pinfo_parser.parse_pinfo_response', {'corpus': len(corpus), 'groups': len(PRIVILEGE_GROUPS)},
+        stats, args.repeat, 1, items=len(corpus)
+    ))
+
+
+def bench_steam(args, results: List[dict]):
+    """
+    Бенчмарки validate_steam_id и normalize_steam_ids на смешанном корпусе и на длинных строках.
+    """
+    from utils.steam import validate_steam_id, normalize_steam_ids
+
+    corpus = make_steam_id_corpus(args.steam_corpus, seed=args.seed)
+
+    def run_corpus():
+        for steam_id in corpus:
+            validate_steam_id(steam_id)
+
+    stats = measure(run_corpus, args.repeat)
+    results.append(_result(
+        'steam.validate_steam_id', {'corpus': len(corpus)},
+        stats, args.repeat, 1, items=len(corpus)
+    ))
+
+    stats = measure(lambda: normalize_steam_ids(corpus), args.repeat)
+    results.append(_result(
+        'steam.normalize_steam_ids', {'corpus': len(corpus)},
+        stats, args.repeat, 1, items=len(corpus)
+    ))
+
+    oversized = make_oversized_steam_ids(100, args.oversized_length)
+
+    def run_oversized():
+        for steam_id in oversized:
+            validate_steam_id(steam_id)
+
+    stats = measure(run_oversized, args.repeat)
+    results.append(_result(
+        'steam.validate_steam_id_oversized', {'corpus': len(oversized), 'length': args.oversized_length},
+        stats, args.repeat, 1, items=len(oversized)
+    ))
+
+
+BENCHMARKS = {
+    'staff_embed': bench_staff_embed,
+    'pinfo': bench_pinfo,
+    'steam': bench_steam,
+}
+
+
+def _git_revision() -> Optional[str]:
+    """
+    Получить текущую ревизию git (если доступна).
+    """
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _result_key(record: dict) -> str:
+    """
+    Ключ для сопоставления результатов двух прогонов.
+    """
+    return f"{record['name']}|{json.dumps(record['params'], sort_keys=True)}"
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[dict]:
+    """
+    Сравнить два прогона по медиане.
+
+    Args:
+        baseline: Предыдущий прогон
+        current: Текущий прогон
+        threshold: Допустимое относительное замедление (0.1 = 10%)
+
+    Returns:
+        Список регрессий
+    """
+    baseline_results = {_result_key(record): record for record in baseline.get('results', [])}
+    regressions = []
+
+    for record in current['results']:
+        old = baseline_results.get(_result_key(record))
+        if old is None or not old['median']:
+            continue
+
+        ratio = record['median'] / old['median']
+        marker = ""
+        if ratio > 1 + threshold:
+            marker = "  <-- регрессия"
+            regressions.append({'name': record['name'], 'params': record['params'], 'ratio': ratio})
+        logger.info(f"{record['name']} {record['params']}: {ratio:.2f}x{marker}")
+
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Разобрать аргументы командной строки.
+    """
+    parser = argparse.ArgumentParser(description="Бенчмарки горячих путей бота")
+    parser.add_argument('--members', default='1000,10000,50000,200000',
+                        help="Размеры серверов через запятую")
+    parser.add_argument('--admin-roles', type=int, default=4, help="Количество ролей администрации")
+    parser.add_argument('--staff-per-role', type=int, default=25, help="Участников на роль администрации")
+    parser.add_argument('--extra-roles', type=int, default=50, help="Количество прочих ролей")
+    parser.add_argument('--roles-per-member', type=int, default=5, help="Прочих ролей у участника")
+    parser.add_argument('--member-events', type=int, default=5000, help="Событий on_member_update")
+    parser.add_argument('--pinfo-corpus', type=int, default=10000, help="Размер корпуса pinfo")
+    parser.add_argument('--steam-corpus', type=int, default=100000, help="Размер корпуса SteamID")
+    parser.add_argument('--oversized-length', type=int, default=100000, help="Длина \"тяжёлых\" SteamID")
+    parser.add_argument('--repeat', type=int, default=5, help="Количество замеров")
+    parser.add_argument('--seed', type=int, default=0, help="Seed генератора")
+    parser.add_argument('--only', default=','.join(BENCHMARKS), help="Какие наборы запускать")
+    parser.add_argument('--output', help="Файл для JSON-результатов (по умолчанию stdout)")
+    parser.add_argument('--compare', help="JSON предыдущего прогона для сравнения")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Порог регрессии (доля)")
+
+    args = parser.parse_args(argv)
+    args.members = [int(value) for value in args.members.split(',') if value]
+    args.only = [value for value in args.only.split(',') if value]
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа.
+    """
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stderr)
+    args = parse_args(argv)
+
+    results: List[dict] = []
+    for name in args.only:
+        if name not in BENCHMARKS:
+            logger.error(f"Неизвестный набор бенчмарков: {name}")
+            return 2
+        BENCHMARKS[name](args, results)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'args': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        },
+        'results': results,
+    }
+
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        logger.info(f"Результаты сохранены в {args.output}")
+    else:
+        print(payload)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            logger.error(f"Обнаружено регрессий: {len(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
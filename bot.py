@@ -2,23 +2,44 @@
 Главный файл Discord-бота для административной инфраструктуры Rust-сервера.
 """
 
+import time
+
+# Момент старта процесса (до тяжёлых импортов): от него считаются этапы запуска
+PROCESS_STARTED = time.perf_counter()
+
 import os
+import signal
 import logging
 import asyncio
+from typing import Optional
 import discord
 from discord import app_commands
 from discord.ext import tasks
 from dotenv import load_dotenv
 
 from config.config_loader import load_config, get_config
-from database.connection import init_database, get_db_session
-from database.models import StaffMessage
-from services.rcon import RCONClient
+from database.connection import init_database
+from services.rcon import RCONCluster
 from services.staff_embed import StaffEmbedService
+from services.profiler import ProfilerService
+from services.privilege_sync import PrivilegeSyncService
+from services.expiry import ExpiryScheduler
+from services.notifications import NotificationDispatcher
+from services.reminders import ReminderScheduler
+from services.privilege_list import PrivilegeListService
+from services.privilege_store import PrivilegeStore
+from services.audit import AuditLogger
+from services.snapshot import StateSnapshot
+from services.rest import RestScheduler, get_rest_scheduler
+from services.webhook import PrivilegeWebhook
+from services.recorder import GatewayRecorder
 from commands.staff import StaffCommand
 from commands.addprivilege import AddPrivilegeCommand
+from commands.profile import ProfileCommand
+from commands.privileges import PrivilegesCommand
+from utils.startup import StartupTimings
 
-# Загружаем переменные окружения
+# Загружаем переменные окружения (единственное место: модули читают их при вызове)
 load_dotenv()
 
 # Настройка логирования
@@ -38,31 +59,206 @@ intents = discord.Intents.default()
 intents.members = True
 intents.message_content = False
 
-# Создаём клиент бота
-bot = discord.Client(intents=intents)
-# Создаём дерево команд
-tree = app_commands.CommandTree(bot)
+# Клиент бота и дерево команд создаются в main() после загрузки конфигурации
+bot: discord.Client = None
+tree: app_commands.CommandTree = None
+# Шарды этого процесса, получившие READY (только в режиме шардинга)
+ready_shards: set = set()
+# Замеры этапов запуска и подготовка БД, идущая параллельно со входом в Discord
+startup_timings: StartupTimings = None
+database_ready: Optional[asyncio.Task] = None
 
 # Глобальные сервисы
-rcon_client: RCONClient = None
+rcon_cluster: RCONCluster = None
+rest_scheduler: RestScheduler = None
 staff_embed_service: StaffEmbedService = None
+privilege_sync_service: PrivilegeSyncService = None
+expiry_scheduler: ExpiryScheduler = None
+reminder_scheduler: ReminderScheduler = None
+privilege_store: Optional[PrivilegeStore] = None
+audit_logger: Optional[AuditLogger] = None
+state_snapshot: Optional[StateSnapshot] = None
+privilege_webhook: Optional[PrivilegeWebhook] = None
+gateway_recorder: Optional[GatewayRecorder] = None
+notification_dispatcher: NotificationDispatcher = None
 staff_command: StaffCommand = None
 addprivilege_command: AddPrivilegeCommand = None
+profile_command: ProfileCommand = None
+privileges_command: PrivilegesCommand = None
+
+
+def get_sharding_settings() -> Optional[dict]:
+    """
+    Получить настройки шардинга из переменных окружения или config.yml.
+    
+    SHARD_COUNT и SHARD_IDS (через запятую) в .env имеют приоритет над
+    секцией sharding, чтобы запускать несколько процессов с одним config.yml.
+    
+    Returns:
+        Dict с ключами shard_count, shard_ids или None, если шардинг выключен
+        
+    Raises:
+        ValueError: Если shard_ids заданы без shard_count
+    """
+    sharding_config = get_config().get('sharding', {})
+    shard_count = os.getenv('SHARD_COUNT') or sharding_config.get('shard_count')
+    shard_ids = os.getenv('SHARD_IDS') or sharding_config.get('shard_ids')
+    
+    if not sharding_config.get('enabled', False) and shard_count is None:
+        return None
+    
+    if isinstance(shard_ids, str):
+        shard_ids = [int(shard_id) for shard_id in shard_ids.split(',') if shard_id.strip()]
+    if shard_ids and shard_count is None:
+        raise ValueError("Для shard_ids необходимо указать shard_count")
+    
+    return {
+        'shard_count': int(shard_count) if shard_count is not None else None,
+        'shard_ids': list(shard_ids) if shard_ids else None
+    }
+
+
+def create_client() -> discord.Client:
+    """
+    Создать клиент Discord: обычный или AutoShardedClient.
+    
+    Returns:
+        discord.Client
+    """
+    # Живые статусы в /staff требуют Presence Intent (включается и в Developer Portal)
+    intents.presences = get_config().get('staff_embed', {}).get('presences', False)
+    
+    sharding = get_sharding_settings()
+    if sharding is None:
+        return discord.Client(intents=intents)
+    
+    logger.info(
+        f"Режим шардинга: shard_count={sharding['shard_count'] or 'авто'}, "
+        f"shard_ids={sharding['shard_ids'] or 'все'}"
+    )
+    return discord.AutoShardedClient(
+        intents=intents,
+        shard_count=sharding['shard_count'],
+        shard_ids=sharding['shard_ids']
+    )
+
+
+def is_guild_ready(guild: discord.Guild) -> bool:
+    """
+    Проверить, готов ли шард, обслуживающий сервер.
+    
+    Args:
+        guild: Discord сервер
+        
+    Returns:
+        True если кэш сервера загружен, False иначе
+    """
+    if isinstance(bot, discord.AutoShardedClient):
+        return guild.shard_id in ready_shards
+    return bot.is_ready()
+
+
+def owns_global_commands() -> bool:
+    """
+    Проверить, должен ли этот процесс синхронизировать команды.
+    
+    Команды глобальные, поэтому при разделении шардов по процессам
+    их синхронизирует только процесс с шардом 0.
+    
+    Returns:
+        True если процесс синхронизирует команды, False иначе
+    """
+    shard_ids = getattr(bot, 'shard_ids', None)
+    return not shard_ids or 0 in shard_ids
+
+
+async def prepare_database() -> bool:
+    """
+    Создать таблицы, применить миграции и загрузить привилегии в память.
+    
+    Запускается до входа в Discord и идёт параллельно с ним. Синхронные
+    обращения к БД выполняются в отдельном потоке, чтобы не блокировать вход.
+    При ошибке бот останавливается.
+    
+    Returns:
+        True если БД готова, False иначе
+    """
+    try:
+        with startup_timings.phase('database'):
+            await asyncio.to_thread(init_database)
+        logger.info('База данных инициализирована')
+        
+        if privilege_store is not None:
+            with startup_timings.phase('privilege_store'):
+                await asyncio.to_thread(privilege_store.load)
+    except Exception as e:
+        logger.error(f'Ошибка при инициализации БД: {e}')
+        await bot.close()
+        return False
+    
+    return True
+
+
+async def wait_database() -> bool:
+    """
+    Дождаться подготовки БД.
+    
+    Returns:
+        True если БД готова, False если инициализация не удалась
+    """
+    if database_ready is None:
+        return True
+    return await asyncio.shield(database_ready)
+
+
+async def warm_up_rcon():
+    """
+    Проверить RCON-серверы параллельно со входом в Discord (не блокирует запуск).
+    """
+    if not get_config().get('rcon', {}).get('warm_up', True):
+        return
+    
+    with startup_timings.phase('rcon'):
+        try:
+            await rcon_cluster.warm_up(get_config().get('rcon', {}).get('timeout', 10))
+        except Exception as e:
+            logger.error(f'Ошибка при проверке RCON-серверов: {e}')
+
+
+async def setup_hook():
+    """
+    Вызывается discord.py после входа (HTTP) перед подключением к шлюзу.
+    """
+    startup_timings.end('login')
+    startup_timings.begin('gateway')
+
+
+async def interaction_check(interaction: discord.Interaction) -> bool:
+    """
+    Проверка перед каждым взаимодействием с командами (в т.ч. автодополнением).
+    
+    Команды могут прийти раньше on_ready, пока схема БД ещё проверяется,
+    поэтому сначала дожидаемся подготовки БД.
+    """
+    if not startup_timings.has('first_interaction'):
+        startup_timings.end('first_interaction')
+        logger.info(f'Первая команда через {startup_timings.elapsed():.2f}s после запуска')
+    
+    return await wait_database()
 
 
-@bot.event
 async def on_ready():
     """
     Обработчик события готовности бота.
     """
     logger.info(f'Бот {bot.user} подключён к Discord')
     
-    # Синхронизируем команды
-    try:
-        synced = await tree.sync()
-        logger.info(f'Синхронизировано {len(synced)} команд')
-    except Exception as e:
-        logger.error(f'Ошибка при синхронизации команд: {e}')
+    if not await wait_database():
+        return
+    
+    # Синхронизируем команды (если они изменились с последней синхронизации)
+    if owns_global_commands():
+        await sync_commands()
     
     # Проверяем и восстанавливаем сообщение /staff при перезапуске
     await check_and_restore_staff_message()
@@ -71,153 +267,336 @@ async def on_ready():
     if not update_staff_embed.is_running():
         update_staff_embed.start()
     
+    # Запускаем фоновую запись привилегий в БД
+    if privilege_store is not None:
+        privilege_store.start()
+    
+    # Запускаем фоновую запись журнала действий
+    if audit_logger:
+        audit_logger.start()
+    
+    # Запускаем фоновую отправку уведомлений
+    if notification_dispatcher:
+        notification_dispatcher.start()
+    
+    # Запускаем планировщик истечения привилегий
+    if expiry_scheduler:
+        expiry_scheduler.start()
+    
+    # Запускаем напоминания об окончании привилегий
+    if reminder_scheduler:
+        reminder_scheduler.start()
+    
+    # Запускаем периодический отчёт о REST-запросах и RCON-командах
+    rest_scheduler.start()
+    rcon_cluster.start()
+    
+    # Запускаем периодическую запись снимка состояния
+    if state_snapshot:
+        state_snapshot.start()
+    
+    # Запускаем приём изменений привилегий с игровых серверов
+    if privilege_webhook:
+        await privilege_webhook.start()
+    
+    # Запускаем запись событий gateway для бенчмарков
+    if gateway_recorder:
+        gateway_recorder.start()
+    
     logger.info('Бот готов к работе')
+    
+    if not startup_timings.has('gateway'):
+        startup_timings.end('gateway')
+        startup_timings.log_report('Запуск завершён')
+
+
+async def on_shard_ready(shard_id: int):
+    """
+    Обработчик готовности шарда (только в режиме шардинга).
+    """
+    ready_shards.add(shard_id)
+    guild_count = sum(1 for guild in bot.guilds if guild.shard_id == shard_id)
+    logger.info(f'Шард {shard_id} готов, серверов: {guild_count}')
 
 
-@bot.event
 async def on_member_update(before: discord.Member, after: discord.Member):
     """
-    Обработчик изменения участника (в т.ч. ролей).
-    Автоматически обновляет Embed /staff при изменении ролей администрации.
+    Обработчик изменения участника (в т.ч. ролей и ника).
+    Автоматически обновляет Embed /staff при изменении ролей администрации или ника администратора.
     """
-    # Проверяем, изменились ли роли
-    if before.roles != after.roles:
-        config = get_config()
-        admin_role_ids = [role['role_id'] for role in config['discord']['admin_roles']]
-        
-        # Проверяем, затронуты ли роли администрации
-        before_admin_roles = [r for r in before.roles if r.id in admin_role_ids]
-        after_admin_roles = [r for r in after.roles if r.id in admin_role_ids]
-        
-        if before_admin_roles != after_admin_roles:
-            logger.info(f"Изменены роли администрации у {after.display_name}, обновляю Embed /staff")
-            if staff_embed_service:
-                await staff_embed_service.update_staff_message(after.guild)
+    if not is_guild_ready(after.guild):
+        # Кэш шарда ещё загружается, Embed обновит первый проход update_staff_embed
+        return
+    
+    if gateway_recorder:
+        gateway_recorder.member_update(before, after)
+    
+    if staff_embed_service and staff_embed_service.apply_member_update(before, after):
+        logger.info(f"Изменены роли или ник администратора {after.display_name}, обновляю Embed /staff")
+        staff_embed_service.request_refresh(after.guild)
+
+
+async def on_member_remove(member: discord.Member):
+    """
+    Обработчик выхода участника с сервера.
+    Убирает ушедшего администратора с доски /staff.
+    """
+    if not staff_embed_service or not is_guild_ready(member.guild):
+        return
+    
+    if gateway_recorder:
+        gateway_recorder.member_remove(member)
+    
+    if staff_embed_service.is_staff_member(member):
+        logger.info(f"Администратор {member.display_name} покинул сервер, обновляю Embed /staff")
+        staff_embed_service.invalidate_member(member, removed=True)
+        staff_embed_service.request_refresh(member.guild)
+
+
+async def on_presence_update(before: discord.Member, after: discord.Member):
+    """
+    Обработчик изменения статуса участника (только при staff_embed.presences).
+    Событие приходит для всех участников, поэтому сначала дешёвые проверки:
+    изменился ли статус и входит ли участник в администрацию.
+    """
+    if before.status == after.status:
+        return
+    
+    if not staff_embed_service or not is_guild_ready(after.guild):
+        return
+    
+    if gateway_recorder:
+        gateway_recorder.presence_update(before, after)
+    
+    if staff_embed_service.is_staff_member(after):
+        staff_embed_service.invalidate_member(after)
+        staff_embed_service.request_refresh(after.guild)
 
 
-@bot.event
 async def on_guild_role_update(before: discord.Role, after: discord.Role):
     """
     Обработчик обновления роли.
     Если обновлена роль администрации, обновляем Embed.
     """
-    config = get_config()
-    admin_role_ids = [role['role_id'] for role in config['discord']['admin_roles']]
+    if not is_guild_ready(after.guild):
+        return
     
-    if before.id in admin_role_ids:
+    if gateway_recorder:
+        gateway_recorder.role_update(before, after)
+    
+    if staff_embed_service and staff_embed_service.is_admin_role(before):
         logger.info(f"Обновлена роль администрации {after.name}, обновляю Embed /staff")
-        if staff_embed_service:
-            await staff_embed_service.update_staff_message(after.guild)
+        staff_embed_service.request_refresh(after.guild)
+
+
+async def sync_commands():
+    """
+    Синхронизировать slash-команды с Discord.
+    
+    Если хэш дерева команд совпадает с сохранённым в снимке состояния,
+    синхронизация пропускается: команды в Discord уже актуальны.
+    """
+    if state_snapshot and not state_snapshot.needs_command_sync(tree, bot.application_id):
+        logger.info('Команды не изменились, синхронизация не нужна')
+        return
+    
+    try:
+        synced = await tree.sync()
+        logger.info(f'Синхронизировано {len(synced)} команд')
+        if state_snapshot:
+            state_snapshot.mark_commands_synced(tree, bot.application_id)
+    except Exception as e:
+        logger.error(f'Ошибка при синхронизации команд: {e}')
 
 
 async def check_and_restore_staff_message():
     """
-    Проверить существование сообщения /staff и восстановить при необходимости.
-    Вызывается при перезапуске бота.
+    Загрузить сообщения /staff всех серверов из снимка состояния или одним запросом.
+    Вызывается при перезапуске бота. Существование сообщений проверяет первый
+    проход update_staff_embed: удалённые сообщения пересоздаются.
     """
-    config = get_config()
-    staff_channel_id = config['discord']['staff_channel_id']
+    if not staff_embed_service:
+        return
     
-    db = get_db_session()
     try:
-        staff_msg_record = db.query(StaffMessage).filter_by(channel_id=staff_channel_id).first()
-        
-        if staff_msg_record:
-            # Пытаемся получить сообщение
-            try:
-                channel = bot.get_channel(staff_channel_id)
-                if channel:
-                    try:
-                        message = await channel.fetch_message(staff_msg_record.message_id)
-                        logger.info(f"Сообщение /staff найдено: {message.id}")
-                        return
-                    except discord.NotFound:
-                        # Сообщение удалено, пересоздадим при следующем обновлении
-                        logger.info("Сообщение /staff удалено, будет пересоздано при следующем обновлении")
-            except Exception as e:
-                logger.error(f"Ошибка при проверке сообщения /staff: {e}")
-    finally:
-        db.close()
+        if state_snapshot and staff_embed_service.restore_message_index(
+            state_snapshot.boards, state_snapshot.boards_revision
+        ):
+            return
+        staff_embed_service.load_message_index()
+    except Exception as e:
+        logger.error(f"Ошибка при загрузке сообщений /staff: {e}")
+
+
+async def update_all_staff_messages():
+    """
+    Обновить Embed /staff на всех серверах этого процесса, где он создан.
+    
+    Серверы группируются по шардам, шарды обрабатываются параллельно,
+    серверы неготовых шардов пропускаются.
+    """
+    shards = {}
+    for guild in bot.guilds:
+        if not staff_embed_service.has_staff_message(guild.id) or not is_guild_ready(guild):
+            continue
+        shards.setdefault(guild.shard_id, []).append(guild)
+    
+    await asyncio.gather(*(update_shard_staff_messages(guilds) for guilds in shards.values()))
+
+
+async def update_shard_staff_messages(guilds: list):
+    """
+    Последовательно обновить Embed /staff на серверах одного шарда.
+    
+    Args:
+        guilds: Серверы шарда
+    """
+    for guild in guilds:
+        try:
+            await staff_embed_service.update_staff_message(guild, verify=True)
+        except Exception as e:
+            logger.error(f"Ошибка при обновлении Embed на сервере {guild.name}: {e}")
 
 
 @tasks.loop(minutes=5)
 async def update_staff_embed():
     """
     Периодическая задача для обновления Embed /staff.
-    Проверяет существование сообщения и обновляет его.
+    Редактирует известные сообщения и пересоздаёт удалённые.
     """
-    if not bot.is_ready():
+    if not staff_embed_service:
         return
     
     try:
-        config = get_config()
-        staff_channel_id = config['discord']['staff_channel_id']
-        
-        # Получаем все серверы, где бот активен
-        for guild in bot.guilds:
-            try:
-                # Проверяем существование сообщения
-                channel = guild.get_channel(staff_channel_id)
-                if channel is None:
-                    continue
-                
-                db = get_db_session()
-                try:
-                    staff_msg_record = db.query(StaffMessage).filter_by(channel_id=staff_channel_id).first()
-                    
-                    if staff_msg_record:
-                        try:
-                            # Проверяем существование сообщения
-                            await channel.fetch_message(staff_msg_record.message_id)
-                            # Сообщение существует, обновляем
-                            if staff_embed_service:
-                                await staff_embed_service.update_staff_message(guild)
-                        except discord.NotFound:
-                            # Сообщение удалено, пересоздаём
-                            logger.info(f"Сообщение /staff удалено на сервере {guild.name}, пересоздаю")
-                            if staff_embed_service:
-                                await staff_embed_service.get_or_create_staff_message(guild)
-                finally:
-                    db.close()
-                    
-            except Exception as e:
-                logger.error(f"Ошибка при обновлении Embed на сервере {guild.name}: {e}")
-                
+        await update_all_staff_messages()
     except Exception as e:
         logger.error(f"Ошибка в задаче update_staff_embed: {e}")
 
 
+async def shutdown_services():
+    """
+    Остановить фоновые задачи и дописать отложенные изменения.
+    """
+    # Webhook останавливается первым: принятые события записываются до остановки хранилища.
+    # Снимок состояния записывается последним, когда доски /staff уже не меняются
+    for service in (privilege_webhook, reminder_scheduler, expiry_scheduler, notification_dispatcher,
+                    privilege_store, audit_logger, rest_scheduler, rcon_cluster, gateway_recorder, state_snapshot):
+        if service is None:
+            continue
+        try:
+            await service.stop()
+        except Exception as e:
+            logger.error(f'Ошибка при остановке {type(service).__name__}: {e}', exc_info=True)
+
+
+async def run_bot(token: str):
+    """
+    Запустить бота и корректно остановить сервисы при завершении.
+    
+    SIGTERM (остановка контейнера) обрабатывается так же, как Ctrl+C:
+    очередь уведомлений и отложенные записи в БД дописываются до выхода.
+    
+    Args:
+        token: Токен бота
+    """
+    global database_ready
+    
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        # Windows
+        pass
+    
+    async with bot:
+        # Схема БД и RCON готовятся параллельно со входом в Discord
+        database_ready = asyncio.create_task(prepare_database())
+        rcon_warm_up = asyncio.create_task(warm_up_rcon())
+        startup_timings.begin('login')
+        try:
+            await bot.start(token)
+        finally:
+            rcon_warm_up.cancel()
+            await shutdown_services()
+
+
 def main():
     """
     Главная функция запуска бота.
+    
+    До входа в Discord выполняется только то, что не обращается к сети и БД:
+    конфигурация, клиент и сервисы. Схема БД и RCON готовятся в run_bot.
     """
+    global bot, tree, startup_timings
+    
+    startup_timings = StartupTimings(PROCESS_STARTED)
+    startup_timings.end('imports')
+    
     # Загружаем конфигурацию
     try:
-        load_config()
+        with startup_timings.phase('config'):
+            load_config()
         logger.info('Конфигурация загружена')
     except Exception as e:
         logger.error(f'Ошибка при загрузке конфигурации: {e}')
         return
     
-    # Инициализируем базу данных
+    startup_timings.begin('services')
+    
+    # Создаём клиент бота
     try:
-        init_database()
-        logger.info('База данных инициализирована')
-    except Exception as e:
-        logger.error(f'Ошибка при инициализации БД: {e}')
+        bot = create_client()
+    except ValueError as e:
+        logger.error(f'Ошибка в настройках шардинга: {e}')
         return
+    bot.setup_hook = setup_hook
+    tree = app_commands.CommandTree(bot)
+    tree.interaction_check = interaction_check
+    
+    for handler in (on_ready, on_shard_ready, on_member_update, on_member_remove, on_guild_role_update):
+        bot.event(handler)
+    if intents.presences:
+        bot.event(on_presence_update)
     
     # Инициализируем сервисы
-    global rcon_client, staff_embed_service, staff_command, addprivilege_command
+    global rcon_cluster, staff_embed_service, privilege_sync_service, expiry_scheduler, notification_dispatcher
+    global reminder_scheduler, privilege_store, audit_logger, state_snapshot, rest_scheduler, privilege_webhook
+    global gateway_recorder
+    global staff_command, addprivilege_command, profile_command, privileges_command
     
-    rcon_client = RCONClient()
-    staff_embed_service = StaffEmbedService(bot)
+    rcon_cluster = RCONCluster.from_config(get_config().get('rcon', {}))
+    # Общий планировщик REST-запросов: ответы на команды идут раньше фоновых изменений
+    rest_scheduler = get_rest_scheduler()
+    staff_embed_service = StaffEmbedService(bot, rest_scheduler)
+    if get_config().get('snapshot', {}).get('enabled', True):
+        state_snapshot = StateSnapshot(staff_embed_service, getattr(bot, 'shard_ids', None))
+        state_snapshot.load()
+    if get_config().get('privilege_store', {}).get('enabled', False):
+        # Загружается в prepare_database вместе с проверкой схемы
+        privilege_store = PrivilegeStore()
+    if get_config().get('audit', {}).get('enabled', True):
+        audit_logger = AuditLogger()
+    privilege_sync_service = PrivilegeSyncService(
+        rcon_cluster, staff_embed_service, privilege_store, audit_logger, rest_scheduler
+    )
+    notification_dispatcher = NotificationDispatcher(rest_scheduler)
+    expiry_scheduler = ExpiryScheduler(bot, privilege_sync_service, staff_embed_service, notification_dispatcher)
+    reminder_scheduler = ReminderScheduler(bot, notification_dispatcher)
+    if get_config().get('webhook', {}).get('enabled', False):
+        privilege_webhook = PrivilegeWebhook(bot, privilege_sync_service, staff_embed_service)
+    if get_config().get('recorder', {}).get('enabled', False):
+        gateway_recorder = GatewayRecorder()
     staff_command = StaffCommand(bot, staff_embed_service)
-    addprivilege_command = AddPrivilegeCommand(bot, rcon_client, staff_embed_service)
+    addprivilege_command = AddPrivilegeCommand(bot, privilege_sync_service, notification_dispatcher, rest_scheduler)
+    profile_command = ProfileCommand(bot, ProfilerService())
+    privileges_command = PrivilegesCommand(bot, PrivilegeListService())
     
     # Регистрируем команды
     staff_command.register_commands(tree)
     addprivilege_command.register_commands(tree)
+    profile_command.register_commands(tree)
+    privileges_command.register_commands(tree)
+    
+    startup_timings.end('services')
     
     # Получаем токен бота
     token = os.getenv('DISCORD_BOT_TOKEN')
@@ -227,7 +606,9 @@ def main():
     
     # Запускаем бота
     try:
-        bot.run(token)
+        asyncio.run(run_bot(token))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        logger.info('Бот остановлен')
     except Exception as e:
         logger.error(f'Ошибка при запуске бота: {e}')
 
@@ -4,6 +4,8 @@
 
 from .staff import StaffCommand
 from .addprivilege import AddPrivilegeCommand
+from .profile import ProfileCommand
+from .privileges import PrivilegesCommand
 
-__all__ = ['StaffCommand', 'AddPrivilegeCommand']
+__all__ = ['StaffCommand', 'AddPrivilegeCommand', 'ProfileCommand', 'PrivilegesCommand']
 
@@ -2,44 +2,72 @@
 Команда /addprivilege для добавления/обновления привилегий.
 """
 
+import io
+import csv
 import logging
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional, Tuple
 import discord
 from discord import app_commands
-from datetime import datetime
-from typing import Optional
-from config.config_loader import get_config
-from database.connection import get_db_session
-from database.models import UserPrivilege
-from services.rcon import RCONClient
-from services.staff_embed import StaffEmbedService
-from utils.steam import validate_steam_id
-from utils.pinfo_parser import parse_pinfo_response
+from config.config_loader import get_config, get_guild_config
+from services.privilege_sync import (
+    PrivilegeSyncService,
+    SYNC_UPDATED,
+    SYNC_UNCHANGED,
+    SYNC_NO_PRIVILEGE,
+    SYNC_RCON_ERROR,
+    SYNC_PARSE_ERROR,
+    SYNC_DB_ERROR,
+)
+from services.notifications import NotificationDispatcher
+from services.rest import RestScheduler, get_rest_scheduler, PRIORITY_INTERACTIVE, interaction_bucket
+from utils.steam import to_steam_id64
 from utils.timezone import format_datetime_utc3
+from utils.permissions import has_any_role
 
 logger = logging.getLogger(__name__)
 
+# Подписи статусов для отчёта массового импорта
+STATUS_LABELS = {
+    SYNC_UPDATED: "обновлено",
+    SYNC_UNCHANGED: "без изменений",
+    SYNC_NO_PRIVILEGE: "нет привилегии",
+    SYNC_RCON_ERROR: "ошибка RCON",
+    SYNC_PARSE_ERROR: "ошибка разбора pinfo",
+    SYNC_DB_ERROR: "ошибка БД",
+}
+
+# Максимальный размер CSV для /addprivilege_bulk
+MAX_BULK_FILE_SIZE = 1024 * 1024
+
 
 class AddPrivilegeCommand:
     """
     Команда /addprivilege.
     """
     
-    def __init__(self, bot: discord.Client, rcon_client: RCONClient, staff_embed_service: StaffEmbedService):
+    def __init__(self, bot: discord.Client, privilege_sync_service: PrivilegeSyncService,
+                 notification_dispatcher: NotificationDispatcher, rest_scheduler: Optional[RestScheduler] = None):
         """
         Инициализировать команду.
         
         Args:
             bot: Экземпляр Discord бота
-            rcon_client: RCON клиент
-            staff_embed_service: Сервис для обновления Embed
+            privilege_sync_service: Сервис синхронизации привилегий
+            notification_dispatcher: Очередь уведомлений пользователям
+            rest_scheduler: Планировщик REST-запросов (None — общий планировщик процесса)
         """
         self.bot = bot
-        self.rcon_client = rcon_client
-        self.staff_embed_service = staff_embed_service
+        self.privilege_sync_service = privilege_sync_service
+        self.notification_dispatcher = notification_dispatcher
+        self.rest_scheduler = rest_scheduler or get_rest_scheduler()
         self.config = get_config()
-        self.high_staff_roles = self.config['discord']['high_staff_roles']
-        self.privilege_groups = self.config['privileges']['groups']
-        self.command_channel_id = self.config['discord'].get('command_channel_id')
+        
+        bulk_config = self.config.get('bulk', {})
+        self.bulk_max_rows = bulk_config.get('max_rows', 500)
+        self.bulk_concurrency = bulk_config.get('concurrency', 5)
+        self.bulk_role_interval = bulk_config.get('role_interval', 0.5)
     
     def _check_high_staff(self, member: discord.Member) -> bool:
         """
@@ -51,58 +79,107 @@ class AddPrivilegeCommand:
         Returns:
             True если имеет роль High Staff, False иначе
         """
-        member_role_ids = [role.id for role in member.roles]
-        return any(role_id in member_role_ids for role_id in self.high_staff_roles)
+        return has_any_role(member, get_guild_config(member.guild.id)['high_staff_roles'])
     
-    def _get_discord_role_by_privilege(self, guild: discord.Guild, privilege_group: str) -> Optional[discord.Role]:
+    async def _reply(self, interaction: discord.Interaction, *args, **kwargs):
         """
-        Получить Discord роль по названию группы привилегии.
+        Отправить ответ на команду через планировщик REST-запросов (высший приоритет).
         
         Args:
-            guild: Discord сервер
-            privilege_group: Название группы привилегии
+            interaction: Взаимодействие Discord
+            *args, **kwargs: Аргументы interaction.followup.send
+        """
+        return await self.rest_scheduler.run(
+            PRIORITY_INTERACTIVE, interaction_bucket(interaction.id), interaction.followup.send, *args, **kwargs
+        )
+    
+    @staticmethod
+    def _format_notification(privilege_group: str, expires_at: Optional[datetime]) -> str:
+        """
+        Сформировать уведомление об обновлении привилегии.
+        
+        Args:
+            privilege_group: Группа привилегии
+            expires_at: Время окончания (UTC) или None
             
         Returns:
-            discord.Role или None
+            Текст уведомления
         """
-        # Ищем роль в конфигурации admin_roles по названию
-        for role_config in self.config['discord']['admin_roles']:
-            role_name = role_config['name'].lower()
-            # Простое сопоставление (можно улучшить)
-            if privilege_group.lower() in role_name or role_name in privilege_group.lower():
-                role_id = role_config['role_id']
-                return guild.get_role(role_id)
+        expires_str = "бессрочно"
+        if expires_at:
+            expires_str = format_datetime_utc3(expires_at)
         
-        return None
+        return (
+            f"✅ Ваша привилегия обновлена!\n"
+            f"**Группа:** {privilege_group}\n"
+            f"**Истекает:** {expires_str}"
+        )
     
-    async def _notify_user(self, user: discord.User, message: str, guild: discord.Guild) -> bool:
+    def _parse_bulk_csv(self, guild: discord.Guild, content: bytes) -> Tuple[List[Tuple[int, discord.Member, int]], List[str]]:
         """
-        Уведомить пользователя (в ЛС или в канале).
+        Разобрать и провалидировать CSV для массового импорта.
+        
+        Формат строки: Discord ID, SteamID (разделитель "," или ";", заголовок необязателен).
+        SteamID в любом формате приводится к 64-bit, поэтому один игрок, указанный
+        в разных форматах, считается повтором.
         
         Args:
-            user: Пользователь для уведомления
-            message: Сообщение
             guild: Discord сервер
+            content: Содержимое файла
             
         Returns:
-            True если уведомление отправлено, False иначе
+            Кортеж (записи (номер строки, участник, 64-bit SteamID), ошибки)
         """
+        entries = []
+        errors = []
+        seen_steam_ids = set()
+        
         try:
-            # Пытаемся отправить в ЛС
-            await user.send(message)
-            return True
-        except discord.Forbidden:
-            # ЛС недоступно, отправляем в канал команды
-            if self.command_channel_id:
-                channel = guild.get_channel(self.command_channel_id)
-                if channel:
-                    try:
-                        await channel.send(f"{user.mention} {message}")
-                        return True
-                    except Exception as e:
-                        logger.error(f"Ошибка при отправке сообщения в канал: {e}")
+            text = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            return [], ["Файл должен быть в кодировке UTF-8"]
+        
+        delimiter = ';' if text.count(';') > text.count(',') else ','
+        
+        for line_no, row in enumerate(csv.reader(io.StringIO(text), delimiter=delimiter), start=1):
+            row = [cell.strip() for cell in row]
+            if not any(row):
+                continue
+            
+            if len(row) < 2:
+                errors.append(f"Строка {line_no}: ожидается Discord ID и SteamID")
+                continue
+            
+            discord_id_str, steam_id = row[0].strip('<@!>'), row[1]
+            
+            if not discord_id_str.isdigit():
+                # Заголовок допускается только первой строкой
+                if line_no == 1 and not entries and not errors:
+                    continue
+                errors.append(f"Строка {line_no}: неверный Discord ID '{row[0]}'")
+                continue
+            
+            steam_id64 = to_steam_id64(steam_id)
+            if steam_id64 is None:
+                errors.append(f"Строка {line_no}: неверный формат SteamID '{steam_id}'")
+                continue
+            
+            if steam_id64 in seen_steam_ids:
+                errors.append(f"Строка {line_no}: SteamID {steam_id} указан повторно")
+                continue
+            
+            member = guild.get_member(int(discord_id_str))
+            if member is None:
+                errors.append(f"Строка {line_no}: пользователь {discord_id_str} не найден на сервере")
+                continue
+            
+            seen_steam_ids.add(steam_id64)
+            entries.append((line_no, member, steam_id64))
+        
+        if len(entries) > self.bulk_max_rows:
+            errors.append(f"Слишком много строк: {len(entries)} (максимум {self.bulk_max_rows})")
         
-        return False
+        return entries, errors
     
     def register_commands(self, tree: app_commands.CommandTree):
         """
@@ -128,25 +205,28 @@ class AddPrivilegeCommand:
             try:
                 guild = interaction.guild
                 if guild is None:
-                    await interaction.followup.send("❌ Команда доступна только на сервере", ephemeral=True)
+                    await self._reply(interaction, "❌ Команда доступна только на сервере", ephemeral=True)
                     return
                 
                 member = guild.get_member(interaction.user.id)
                 if member is None:
-                    await interaction.followup.send("❌ Не удалось найти вас на сервере", ephemeral=True)
+                    await self._reply(interaction, "❌ Не удалось найти вас на сервере", ephemeral=True)
                     return
                 
                 # Проверка прав доступа
                 if not self._check_high_staff(member):
-                    await interaction.followup.send(
+                    await self._reply(
+                        interaction,
                         "❌ У вас нет прав для выполнения этой команды",
                         ephemeral=True
                     )
                     return
                 
-                # Валидация SteamID
-                if not validate_steam_id(steam_id):
-                    await interaction.followup.send(
+                # Валидация SteamID и приведение к 64-bit
+                steam_id64 = to_steam_id64(steam_id)
+                if steam_id64 is None:
+                    await self._reply(
+                        interaction,
                         "❌ Неверный формат SteamID",
                         ephemeral=True
                     )
@@ -155,156 +235,177 @@ class AddPrivilegeCommand:
                 # Проверка наличия пользователя на сервере
                 target_member = guild.get_member(user.id)
                 if target_member is None:
-                    await interaction.followup.send(
+                    await self._reply(
+                        interaction,
                         f"❌ Пользователь {user.mention} не найден на сервере",
                         ephemeral=True
                     )
                     return
                 
-                # Выполняем RCON команду pinfo
-                rcon_config = self.config.get('rcon', {})
-                timeout = rcon_config.get('timeout', 10)
-                retry_attempts = rcon_config.get('retry_attempts', 3)
-                
-                pinfo_response = self.rcon_client.get_player_info(steam_id, timeout, retry_attempts)
+                # pinfo → БД → роли → Embed
+                result = await self.privilege_sync_service.sync_privilege(
+                    guild, target_member, steam_id64, actor_id=member.id
+                )
+                status = result['status']
                 
-                if pinfo_response is None:
-                    logger.error(f"RCON ошибка при выполнении pinfo для SteamID {steam_id}")
-                    await interaction.followup.send(
+                if status == SYNC_RCON_ERROR:
+                    await self._reply(
+                        interaction,
                         "⚠️ Не удалось получить информацию с сервера. Попробуйте позже.",
                         ephemeral=True
                     )
                     return
                 
-                # Парсим ответ
-                parsed_info = parse_pinfo_response(pinfo_response, self.privilege_groups)
-                
-                if parsed_info is None:
-                    logger.error(f"Не удалось распарсить ответ pinfo: {pinfo_response}")
-                    await interaction.followup.send(
+                if status == SYNC_PARSE_ERROR:
+                    await self._reply(
+                        interaction,
                         "⚠️ Не удалось обработать ответ сервера. Попробуйте позже.",
                         ephemeral=True
                     )
                     return
                 
+                # Часть RCON-серверов могла не ответить: результат собран по остальным
+                partial_note = ""
+                if result.get('failed_servers'):
+                    partial_note = f"\n⚠️ Не ответили серверы: {', '.join(result['failed_servers'])}"
+                
                 # Если привилегии нет
-                if not parsed_info['has_privilege']:
-                    await interaction.followup.send(
-                        f"ℹ️ У игрока {steam_id} нет привилегий на сервере",
+                if status == SYNC_NO_PRIVILEGE:
+                    await self._reply(
+                        interaction,
+                        f"ℹ️ У игрока {steam_id64} нет привилегий на сервере{partial_note}",
                         ephemeral=True
                     )
                     return
                 
-                # Получаем данные из парсера
-                privilege_group = parsed_info['group']
-                expires_at = parsed_info['expires_at']
-                
-                # Работа с БД
-                db = get_db_session()
-                try:
-                    # Ищем существующую запись
-                    user_privilege = db.query(UserPrivilege).filter_by(steam_id=steam_id).first()
-                    
-                    # Проверяем, изменились ли данные
-                    data_changed = False
-                    
-                    if user_privilege is None:
-                        # Новая запись
-                        user_privilege = UserPrivilege(
-                            discord_user_id=user.id,
-                            steam_id=steam_id,
-                            privilege_group=privilege_group,
-                            expires_at=expires_at
-                        )
-                        db.add(user_privilege)
-                        data_changed = True
-                        logger.info(f"ACTION: Создана новая запись привилегии для {steam_id}")
-                    else:
-                        # Проверяем изменения
-                        if user_privilege.privilege_group != privilege_group:
-                            data_changed = True
-                            user_privilege.privilege_group = privilege_group
-                        
-                        if user_privilege.expires_at != expires_at:
-                            data_changed = True
-                            user_privilege.expires_at = expires_at
-                        
-                        if user_privilege.discord_user_id != user.id:
-                            data_changed = True
-                            user_privilege.discord_user_id = user.id
-                        
-                        if data_changed:
-                            user_privilege.updated_at = datetime.utcnow()
-                            logger.info(f"ACTION: Обновлена запись привилегии для {steam_id}")
-                        else:
-                            logger.info(f"ACTION: Данные не изменились для {steam_id}, обновление не требуется")
-                    
-                    if not data_changed:
-                        # Данные не изменились - ничего не делаем
-                        await interaction.followup.send(
-                            "✅ Информация проверена. Изменений не обнаружено.",
-                            ephemeral=True
-                        )
-                        db.commit()
-                        return
-                    
-                    # Сохраняем изменения
-                    db.commit()
-                    
-                    # Выдаём/обновляем Discord роль
-                    discord_role = self._get_discord_role_by_privilege(guild, privilege_group)
-                    if discord_role:
-                        try:
-                            # Удаляем старые роли администрации
-                            for role_config in self.config['discord']['admin_roles']:
-                                old_role = guild.get_role(role_config['role_id'])
-                                if old_role and old_role in target_member.roles:
-                                    await target_member.remove_roles(old_role, reason="Обновление привилегии")
-                            
-                            # Выдаём новую роль
-                            if discord_role not in target_member.roles:
-                                await target_member.add_roles(discord_role, reason="Выдача привилегии")
-                        except discord.Forbidden:
-                            logger.error(f"Бот не имеет прав для выдачи ролей")
-                        except Exception as e:
-                            logger.error(f"Ошибка при выдаче роли: {e}")
-                    
-                    # Обновляем Embed /staff
-                    await self.staff_embed_service.update_staff_message(guild)
-                    
-                    # Формируем сообщение для пользователя
-                    expires_str = "бессрочно"
-                    if expires_at:
-                        expires_str = format_datetime_utc3(expires_at)
-                    
-                    notification_message = (
-                        f"✅ Ваша привилегия обновлена!\n"
-                        f"**Группа:** {privilege_group}\n"
-                        f"**Истекает:** {expires_str}"
-                    )
-                    
-                    # Уведомляем пользователя
-                    await self._notify_user(user, notification_message, guild)
-                    
-                    await interaction.followup.send(
-                        f"✅ Привилегия успешно обновлена для {user.mention}",
+                if status == SYNC_UNCHANGED:
+                    # Данные не изменились - ничего не делаем
+                    await self._reply(
+                        interaction,
+                        f"✅ Информация проверена. Изменений не обнаружено.{partial_note}",
                         ephemeral=True
                     )
-                    
-                except Exception as e:
-                    logger.error(f"Ошибка при работе с БД: {e}", exc_info=True)
-                    db.rollback()
-                    await interaction.followup.send(
+                    return
+                
+                if status != SYNC_UPDATED:
+                    await self._reply(
+                        interaction,
                         "❌ Ошибка при сохранении данных. Проверьте логи.",
                         ephemeral=True
                     )
-                finally:
-                    db.close()
+                    return
+                
+                # Формируем сообщение для пользователя
+                notification_message = self._format_notification(result['group'], result['expires_at'])
+                
+                # Уведомляем пользователя в фоне: ответ не ждёт отправки ЛС
+                self.notification_dispatcher.notify(user, notification_message, guild)
+                
+                await self._reply(
+                    interaction,
+                    f"✅ Привилегия успешно обновлена для {user.mention}{partial_note}",
+                    ephemeral=True
+                )
                     
             except Exception as e:
                 logger.error(f"Ошибка в команде /addprivilege: {e}", exc_info=True)
-                await interaction.followup.send(
+                await self._reply(
+                    interaction,
+                    "❌ Произошла ошибка при выполнении команды",
+                    ephemeral=True
+                )
+        
+        @tree.command(name="addprivilege_bulk", description="Массово добавить/обновить привилегии из CSV")
+        @app_commands.describe(file="CSV-файл: Discord ID, SteamID в каждой строке")
+        async def addprivilege_bulk_command(interaction: discord.Interaction, file: discord.Attachment):
+            """Команда /addprivilege_bulk file.csv"""
+            await interaction.response.defer(ephemeral=True)
+            
+            try:
+                guild = interaction.guild
+                if guild is None:
+                    await self._reply(interaction, "❌ Команда доступна только на сервере", ephemeral=True)
+                    return
+                
+                member = guild.get_member(interaction.user.id)
+                if member is None or not self._check_high_staff(member):
+                    await self._reply(
+                        interaction,
+                        "❌ У вас нет прав для выполнения этой команды",
+                        ephemeral=True
+                    )
+                    return
+                
+                if file.size > MAX_BULK_FILE_SIZE:
+                    await self._reply(interaction, "❌ Файл слишком большой", ephemeral=True)
+                    return
+                
+                # Валидируем весь файл до каких-либо изменений
+                entries, errors = self._parse_bulk_csv(guild, await file.read())
+                
+                if errors:
+                    report = "\n".join(errors)
+                    await self._reply(
+                        interaction,
+                        f"❌ Файл не прошёл проверку ({len(errors)} ошибок), ничего не изменено",
+                        file=discord.File(io.BytesIO(report.encode('utf-8')), filename="errors.txt"),
+                        ephemeral=True
+                    )
+                    return
+                
+                if not entries:
+                    await self._reply(interaction, "❌ В файле нет записей", ephemeral=True)
+                    return
+                
+                logger.info(f"ACTION: {member} запустил массовый импорт привилегий ({len(entries)} записей)")
+                
+                results = await self.privilege_sync_service.sync_bulk(
+                    guild,
+                    [(target_member, steam_id) for _, target_member, steam_id in entries],
+                    concurrency=self.bulk_concurrency,
+                    role_interval=self.bulk_role_interval,
+                    actor_id=member.id
+                )
+                
+                # Уведомляем пользователей, у которых привилегия изменилась
+                for result in results:
+                    if result['status'] == SYNC_UPDATED:
+                        self.notification_dispatcher.notify(
+                            result['member'],
+                            self._format_notification(result['group'], result['expires_at']),
+                            guild
+                        )
+                
+                # Формируем отчёт
+                report = io.StringIO()
+                writer = csv.writer(report)
+                writer.writerow(["line", "discord_id", "steam_id", "status", "group", "expires_utc3"])
+                for (line_no, target_member, steam_id), result in zip(entries, results):
+                    writer.writerow([
+                        line_no,
+                        target_member.id,
+                        steam_id,
+                        STATUS_LABELS.get(result['status'], result['status']),
+                        result['group'] or "",
+                        format_datetime_utc3(result['expires_at']) if result['expires_at'] else ""
+                    ])
+                
+                counts = Counter(result['status'] for result in results)
+                summary = ", ".join(
+                    f"{STATUS_LABELS.get(status, status)}: {count}" for status, count in counts.most_common()
+                )
+                
+                await self._reply(
+                    interaction,
+                    f"✅ Импорт завершён ({len(results)} записей)\n{summary}",
+                    file=discord.File(io.BytesIO(report.getvalue().encode('utf-8')), filename="bulk_report.csv"),
+                    ephemeral=True
+                )
+                
+            except Exception as e:
+                logger.error(f"Ошибка в команде /addprivilege_bulk: {e}", exc_info=True)
+                await self._reply(
+                    interaction,
                     "❌ Произошла ошибка при выполнении команды",
                     ephemeral=True
                 )
-
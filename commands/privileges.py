@@ -0,0 +1,231 @@
+"""
+Команда /privileges для просмотра таблицы привилегий.
+"""
+
+import logging
+from datetime import datetime
+from typing import List, Optional
+import discord
+from discord import app_commands
+from config.config_loader import get_config, get_guild_config
+from services.privilege_list import PrivilegeListService, Cursor
+from utils.timezone import format_datetime_utc3, utc3_to_utc
+from utils.permissions import has_any_role
+
+logger = logging.getLogger(__name__)
+
+
+class PrivilegeListView(discord.ui.View):
+    """
+    Кнопки навигации по страницам /privileges.
+
+    Хранятся только курсоры начала просмотренных страниц, строки каждой
+    страницы читаются из БД заново при переходе.
+    """
+
+    def __init__(self, privilege_list_service: PrivilegeListService, owner_id: int, filters: dict,
+                 page_size: int, timeout: float):
+        """
+        Инициализировать навигацию.
+
+        Args:
+            privilege_list_service: Сервис выборки привилегий
+            owner_id: ID пользователя, вызвавшего команду (только он может листать)
+            filters: Фильтры выборки (аргументы fetch_page)
+            page_size: Размер страницы
+            timeout: Время жизни кнопок в секундах
+        """
+        super().__init__(timeout=timeout)
+        self.privilege_list_service = privilege_list_service
+        self.owner_id = owner_id
+        self.filters = filters
+        self.page_size = page_size
+
+        # Курсоры начала страниц: _cursors[i] — курсор, после которого начинается страница i
+        self._cursors: List[Optional[Cursor]] = [None]
+        self._next_cursor: Optional[Cursor] = None
+        self.message: Optional[discord.Message] = None
+
+    @property
+    def page_number(self) -> int:
+        """
+        Номер текущей страницы (с 1).
+        """
+        return len(self._cursors)
+
+    def load_page(self) -> discord.Embed:
+        """
+        Прочитать текущую страницу и построить Embed.
+
+        Returns:
+            discord.Embed
+        """
+        page = self.privilege_list_service.fetch_page(
+            cursor=self._cursors[-1], limit=self.page_size, **self.filters
+        )
+        self._next_cursor = page['next_cursor']
+        self.previous_button.disabled = len(self._cursors) == 1
+        self.next_button.disabled = self._next_cursor is None
+        return self._build_embed(page['rows'])
+
+    def _build_embed(self, rows: list) -> discord.Embed:
+        """
+        Построить Embed страницы.
+        """
+        embed = discord.Embed(title="📜 Привилегии", color=discord.Color.blue())
+
+        if not rows:
+            embed.description = "Записей не найдено"
+        else:
+            lines = []
+            for _, discord_user_id, steam_id, privilege_group, expires_at in rows:
+                expires = f"до {format_datetime_utc3(expires_at, '%d.%m.%Y %H:%M')}" if expires_at else "бессрочно"
+                lines.append(f"<@{discord_user_id}> · `{steam_id}` · **{privilege_group or 'нет'}** · {expires}")
+            embed.description = "\n".join(lines)
+
+        embed.set_footer(text=f"Страница {self.page_number} • Время UTC+3")
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """
+        Разрешить навигацию только вызвавшему команду.
+        """
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("❌ Эта навигация принадлежит другому пользователю", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="◀️ Назад", style=discord.ButtonStyle.secondary)
+    async def previous_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        """Предыдущая страница"""
+        if len(self._cursors) > 1:
+            self._cursors.pop()
+        await interaction.response.edit_message(embed=self.load_page(), view=self)
+
+    @discord.ui.button(label="Вперёд ▶️", style=discord.ButtonStyle.secondary)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        """Следующая страница"""
+        if self._next_cursor is not None:
+            self._cursors.append(self._next_cursor)
+        await interaction.response.edit_message(embed=self.load_page(), view=self)
+
+    async def on_timeout(self):
+        """
+        Отключить кнопки по истечении времени.
+        """
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+
+class PrivilegesCommand:
+    """
+    Команда /privileges.
+    """
+
+    def __init__(self, bot: discord.Client, privilege_list_service: PrivilegeListService):
+        """
+        Инициализировать команду.
+
+        Args:
+            bot: Экземпляр Discord бота
+            privilege_list_service: Сервис выборки привилегий
+        """
+        self.bot = bot
+        self.privilege_list_service = privilege_list_service
+        self.config = get_config()
+
+        privilege_list_config = self.config.get('privilege_list', {})
+        self.page_size = privilege_list_config.get('page_size', 15)
+        self.view_timeout = privilege_list_config.get('view_timeout', 300)
+
+    def _check_high_staff(self, member: discord.Member) -> bool:
+        """
+        Проверить, имеет ли участник роль High Staff.
+
+        Args:
+            member: Участник Discord
+
+        Returns:
+            True если имеет роль High Staff, False иначе
+        """
+        return has_any_role(member, get_guild_config(member.guild.id)['high_staff_roles'])
+
+    def register_commands(self, tree: app_commands.CommandTree):
+        """
+        Зарегистрировать команды в дереве команд.
+
+        Args:
+            tree: Дерево команд Discord
+        """
+
+        @tree.command(name="privileges", description="Список привилегий с фильтрами")
+        @app_commands.describe(
+            group="Группа привилегии",
+            expiring_before="Истекающие до даты (ДД.ММ.ГГГГ, UTC+3)",
+            user="Пользователь Discord"
+        )
+        async def privileges_command(
+            interaction: discord.Interaction,
+            group: Optional[str] = None,
+            expiring_before: Optional[str] = None,
+            user: Optional[discord.User] = None
+        ):
+            """Команда /privileges group expiring_before user"""
+            await interaction.response.defer(ephemeral=True)
+
+            try:
+                guild = interaction.guild
+                if guild is None:
+                    await interaction.followup.send("❌ Команда доступна только на сервере", ephemeral=True)
+                    return
+
+                member = guild.get_member(interaction.user.id)
+                if member is None or not self._check_high_staff(member):
+                    await interaction.followup.send(
+                        "❌ У вас нет прав для выполнения этой команды",
+                        ephemeral=True
+                    )
+                    return
+
+                expiring_before_utc = None
+                if expiring_before:
+                    try:
+                        expiring_before_utc = utc3_to_utc(datetime.strptime(expiring_before.strip(), "%d.%m.%Y"))
+                    except ValueError:
+                        await interaction.followup.send(
+                            "❌ Неверный формат даты. Используйте ДД.ММ.ГГГГ",
+                            ephemeral=True
+                        )
+                        return
+
+                filters = {
+                    'privilege_group': group,
+                    'discord_user_id': user.id if user else None,
+                    'expiring_before': expiring_before_utc,
+                }
+                view = PrivilegeListView(
+                    self.privilege_list_service, interaction.user.id, filters, self.page_size, self.view_timeout
+                )
+                embed = view.load_page()
+                view.message = await interaction.followup.send(embed=embed, view=view, ephemeral=True, wait=True)
+
+            except Exception as e:
+                logger.error(f"Ошибка в команде /privileges: {e}", exc_info=True)
+                await interaction.followup.send(
+                    "❌ Произошла ошибка при выполнении команды",
+                    ephemeral=True
+                )
+
+        @privileges_command.autocomplete('group')
+        async def group_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+            """Подсказки групп из privileges.groups"""
+            groups = self.config.get('privileges', {}).get('groups', [])
+            return [
+                app_commands.Choice(name=group_name, value=group_name)
+                for group_name in groups if current.lower() in group_name.lower()
+            ][:25]
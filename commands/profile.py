@@ -0,0 +1,129 @@
+"""
+Команда /profile для профилирования бота по запросу.
+"""
+
+import io
+import logging
+import discord
+from discord import app_commands
+from datetime import datetime
+from config.config_loader import get_config, get_guild_config
+from services.profiler import ProfilerService, ProfilerBusyError
+from utils.permissions import has_any_role
+
+logger = logging.getLogger(__name__)
+
+# Токен взаимодействия действует 15 минут: окно профилирования с запасом на сбор отчёта
+MAX_PROFILE_DURATION = 840
+
+
+class ProfileCommand:
+    """
+    Команда /profile.
+    """
+
+    def __init__(self, bot: discord.Client, profiler_service: ProfilerService):
+        """
+        Инициализировать команду.
+
+        Args:
+            bot: Экземпляр Discord бота
+            profiler_service: Сервис профилирования
+        """
+        self.bot = bot
+        self.profiler_service = profiler_service
+        self.config = get_config()
+
+        profiling_config = self.config.get('profiling', {})
+        self.max_duration = profiling_config.get('max_duration', 300)
+        if self.max_duration > MAX_PROFILE_DURATION:
+            logger.warning(f"profiling.max_duration {self.max_duration} сек больше допустимого, "
+                           f"используется {MAX_PROFILE_DURATION} (отчёт отправляется ответом на команду)")
+            self.max_duration = MAX_PROFILE_DURATION
+        self.max_top = profiling_config.get('max_top', 200)
+
+    def _check_high_staff(self, member: discord.Member) -> bool:
+        """
+        Проверить, имеет ли участник роль High Staff.
+
+        Args:
+            member: Участник Discord
+
+        Returns:
+            True если имеет роль High Staff, False иначе
+        """
+        return has_any_role(member, get_guild_config(member.guild.id)['high_staff_roles'])
+
+    def register_commands(self, tree: app_commands.CommandTree):
+        """
+        Зарегистрировать команды в дереве команд.
+
+        Args:
+            tree: Дерево команд Discord
+        """
+
+        @tree.command(name="profile", description="Профилировать бота в течение заданного времени")
+        @app_commands.describe(
+            mode="Что профилировать",
+            duration="Длительность окна в секундах",
+            top="Количество строк в отчёте"
+        )
+        @app_commands.choices(mode=[
+            app_commands.Choice(name="CPU (cProfile)", value="cpu"),
+            app_commands.Choice(name="Память (tracemalloc)", value="memory"),
+        ])
+        async def profile_command(
+            interaction: discord.Interaction,
+            mode: app_commands.Choice[str],
+            duration: app_commands.Range[int, 1, MAX_PROFILE_DURATION] = 30,
+            top: app_commands.Range[int, 1, 1000] = 30
+        ):
+            """Команда /profile mode duration top"""
+            await interaction.response.defer(ephemeral=True)
+
+            try:
+                guild = interaction.guild
+                if guild is None:
+                    await interaction.followup.send("❌ Команда доступна только на сервере", ephemeral=True)
+                    return
+
+                member = guild.get_member(interaction.user.id)
+                if member is None or not self._check_high_staff(member):
+                    await interaction.followup.send(
+                        "❌ У вас нет прав для выполнения этой команды",
+                        ephemeral=True
+                    )
+                    return
+
+                duration = min(duration, self.max_duration)
+                top = min(top, self.max_top)
+
+                logger.info(f"ACTION: {member} запросил профилирование {mode.value} на {duration} сек")
+
+                try:
+                    if mode.value == "memory":
+                        report = await self.profiler_service.profile_memory(duration, top)
+                    else:
+                        report = await self.profiler_service.profile_cpu(duration, top)
+                except ProfilerBusyError:
+                    await interaction.followup.send(
+                        "⚠️ Профилирование уже выполняется. Дождитесь его окончания.",
+                        ephemeral=True
+                    )
+                    return
+
+                filename = f"profile_{mode.value}_{datetime.utcnow():%Y%m%d_%H%M%S}.txt"
+                report_file = discord.File(io.BytesIO(report.encode('utf-8')), filename=filename)
+
+                await interaction.followup.send(
+                    f"✅ Профилирование завершено ({duration} сек, топ {top})",
+                    file=report_file,
+                    ephemeral=True
+                )
+
+            except Exception as e:
+                logger.error(f"Ошибка в команде /profile: {e}", exc_info=True)
+                await interaction.followup.send(
+                    "❌ Произошла ошибка при выполнении команды",
+                    ephemeral=True
+                )
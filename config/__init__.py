@@ -2,7 +2,7 @@
 Модуль для загрузки конфигурации.
 """
 
-from .config_loader import load_config, get_config
+from .config_loader import load_config, get_config, get_guild_config
 
-__all__ = ['load_config', 'get_config']
+__all__ = ['load_config', 'get_config', 'get_guild_config']
 
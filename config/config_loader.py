@@ -7,6 +7,8 @@ import os
 from typing import Dict, Any, Optional
 
 _config: Optional[Dict[str, Any]] = None
+# Кэш слитых настроек серверов: guild_id -> секция discord с переопределениями
+_guild_configs: Dict[int, Dict[str, Any]] = {}
 
 
 def load_config(config_path: str = 'config.yml') -> Dict[str, Any]:
@@ -31,6 +33,8 @@ def load_config(config_path: str = 'config.yml') -> Dict[str, Any]:
     with open(config_path, 'r', encoding='utf-8') as f:
         _config = yaml.safe_load(f)
     
+    _guild_configs.clear()
+    
     return _config
 
 
@@ -49,3 +53,35 @@ def get_config() -> Dict[str, Any]:
     
     return _config
 
+
+def get_guild_config(guild_id: int) -> Dict[str, Any]:
+    """
+    Получить настройки Discord для конкретного сервера.
+    
+    Секция guilds.<guild_id> переопределяет ключи секции discord
+    (staff_channel_id, admin_roles, high_staff_roles, command_channel_id).
+    Результат кэшируется до следующего load_config().
+    
+    Args:
+        guild_id: ID Discord сервера
+        
+    Returns:
+        Dict с настройками сервера
+        
+    Raises:
+        RuntimeError: Если конфигурация не загружена
+    """
+    guild_config = _guild_configs.get(guild_id)
+    if guild_config is not None:
+        return guild_config
+    
+    config = get_config()
+    guilds = config.get('guilds') or {}
+    overrides = guilds.get(guild_id) or guilds.get(str(guild_id)) or {}
+    
+    guild_config = dict(config.get('discord', {}))
+    guild_config.update(overrides)
+    _guild_configs[guild_id] = guild_config
+    
+    return guild_config
+
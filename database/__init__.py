@@ -2,8 +2,9 @@
 Модуль для работы с базой данных MySQL.
 """
 
-from .connection import get_db_session, init_database
-from .models import StaffMessage, UserPrivilege
+from .connection import get_db_session, get_engine, init_database, configure_database
+from .models import StaffMessage, StaffMessagePage, UserPrivilege, AuditEvent
+from .repository import upsert_privilege, upsert_privileges, mark_expiry_revoked
 
-__all__ = ['get_db_session', 'init_database', 'StaffMessage', 'UserPrivilege']
+__all__ = ['get_db_session', 'get_engine', 'init_database', 'configure_database', 'StaffMessage', 'StaffMessagePage', 'UserPrivilege', 'AuditEvent', 'upsert_privilege', 'upsert_privileges', 'mark_expiry_revoked']
 
@@ -3,53 +3,115 @@
 """
 
 import os
+from typing import Optional
 from urllib.parse import quote_plus
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, scoped_session
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# Параметры подключения к БД
-DB_HOST = os.getenv('DB_HOST', 'localhost')
-DB_PORT = os.getenv('DB_PORT', '3306')
-DB_USER = os.getenv('DB_USER')
-DB_PASSWORD = os.getenv('DB_PASSWORD')
-DB_NAME = os.getenv('DB_NAME', 'admin_log_db')
-
-# Обработка случая, когда порт уже указан в DB_HOST
-if ':' in DB_HOST:
-    # Если порт уже в хосте, извлекаем его
-    host_parts = DB_HOST.rsplit(':', 1)
-    DB_HOST = host_parts[0]
-    if len(host_parts) > 1:
-        DB_PORT = host_parts[1]
-
-# Преобразуем порт в int для проверки
-try:
-    DB_PORT = int(DB_PORT)
-except ValueError:
-    DB_PORT = 3306
-
-# URL-кодирование параметров для безопасной передачи специальных символов
-encoded_user = quote_plus(DB_USER) if DB_USER else ''
-encoded_password = quote_plus(DB_PASSWORD) if DB_PASSWORD else ''
-encoded_host = quote_plus(DB_HOST) if DB_HOST else 'localhost'
-encoded_db = quote_plus(DB_NAME) if DB_NAME else 'admin_log_db'
-
-# Строка подключения
-DATABASE_URL = f"mysql+pymysql://{encoded_user}:{encoded_password}@{encoded_host}:{DB_PORT}/{encoded_db}?charset=utf8mb4"
-
-# Создание движка
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    echo=False
-)
-
-# Фабрика сессий
-SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+
+
+def build_database_url() -> str:
+    """
+    Собрать строку подключения к MySQL из переменных окружения.
+    
+    Переменные читаются при вызове, а не при импорте модуля, поэтому .env
+    достаточно загрузить один раз в bot.py до первого обращения к БД.
+    
+    Returns:
+        Строка подключения SQLAlchemy
+    """
+    db_host = os.getenv('DB_HOST', 'localhost')
+    db_port = os.getenv('DB_PORT', '3306')
+    db_user = os.getenv('DB_USER')
+    db_password = os.getenv('DB_PASSWORD')
+    db_name = os.getenv('DB_NAME', 'admin_log_db')
+    
+    # Обработка случая, когда порт уже указан в DB_HOST
+    if ':' in db_host:
+        # Если порт уже в хосте, извлекаем его
+        host_parts = db_host.rsplit(':', 1)
+        db_host = host_parts[0]
+        if len(host_parts) > 1:
+            db_port = host_parts[1]
+    
+    # Преобразуем порт в int для проверки
+    try:
+        db_port = int(db_port)
+    except ValueError:
+        db_port = 3306
+    
+    # URL-кодирование параметров для безопасной передачи специальных символов
+    encoded_user = quote_plus(db_user) if db_user else ''
+    encoded_password = quote_plus(db_password) if db_password else ''
+    encoded_host = quote_plus(db_host) if db_host else 'localhost'
+    encoded_db = quote_plus(db_name) if db_name else 'admin_log_db'
+    
+    return f"mysql+pymysql://{encoded_user}:{encoded_password}@{encoded_host}:{db_port}/{encoded_db}?charset=utf8mb4"
+
+
+def _create_engine(database_url: str):
+    """
+    Создать движок SQLAlchemy.
+    
+    Args:
+        database_url: Строка подключения
+        
+    Returns:
+        Engine
+    """
+    if database_url.startswith('sqlite'):
+        # SQLite используется для локальных нагрузочных тестов
+        return create_engine(database_url, connect_args={'check_same_thread': False}, echo=False)
+    
+    return create_engine(
+        database_url,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        echo=False
+    )
+
+
+# Строка подключения и движок создаются при первом обращении к БД (get_engine)
+DATABASE_URL: Optional[str] = None
+engine: Optional[Engine] = None
+
+# Фабрика сессий (привязывается к движку в get_engine)
+SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False))
+
+
+def get_engine() -> Engine:
+    """
+    Получить движок SQLAlchemy, создав его при первом вызове.
+    
+    Returns:
+        Engine
+    """
+    global engine, DATABASE_URL
+    
+    if engine is None:
+        if DATABASE_URL is None:
+            DATABASE_URL = build_database_url()
+        engine = _create_engine(DATABASE_URL)
+        SessionLocal.configure(bind=engine)
+    return engine
+
+
+def configure_database(database_url: str):
+    """
+    Переключить подключение на другую БД (например, SQLite для нагрузочных тестов).
+    
+    Args:
+        database_url: Строка подключения SQLAlchemy
+    """
+    global engine, DATABASE_URL
+    
+    SessionLocal.remove()
+    if engine is not None:
+        engine.dispose()
+    
+    DATABASE_URL = database_url
+    engine = _create_engine(database_url)
+    SessionLocal.configure(bind=engine)
 
 
 def get_db_session():
@@ -59,13 +121,16 @@ def get_db_session():
     Returns:
         Session: SQLAlchemy сессия
     """
+    get_engine()
     return SessionLocal()
 
 
 def init_database():
     """
-    Инициализировать базу данных (создать таблицы).
+    Инициализировать базу данных (создать таблицы и применить миграции).
     """
     from .models import Base
-    Base.metadata.create_all(bind=engine)
+    from .migrations import run_migrations
+    Base.metadata.create_all(bind=get_engine())
+    run_migrations(get_engine())
 
@@ -0,0 +1,124 @@
+"""
+Лёгкие миграции схемы БД.
+
+Base.metadata.create_all создаёт только отсутствующие таблицы и не меняет
+существующие. Здесь недостающие колонки и индексы, объявленные в моделях,
+досоздаются в уже развёрнутых базах без ручного SQL.
+"""
+
+import logging
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.types import String
+
+from .models import Base
+from utils.steam import to_steam_id64
+
+logger = logging.getLogger(__name__)
+
+# Индексы, которые заменены составными и больше не нужны
+SUPERSEDED_INDEXES = {
+    'user_privileges': ['ix_user_privileges_discord_user_id'],
+}
+
+
+def run_migrations(engine: Engine):
+    """
+    Привести существующие таблицы к схеме моделей.
+
+    Добавляет недостающие колонки и индексы, удаляет заменённые индексы.
+    Колонки и данные не удаляются и не изменяются.
+
+    Args:
+        engine: Движок SQLAlchemy
+    """
+    inspector = inspect(engine)
+
+    with engine.begin() as connection:
+        _migrate_steam_id_column(connection, inspector, engine)
+
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}"))
+                logger.info(f"Миграция: добавлена колонка {table.name}.{column.name}")
+
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing_indexes:
+                    continue
+                index.create(bind=connection)
+                logger.info(f"Миграция: создан индекс {index.name}")
+
+            for index_name in SUPERSEDED_INDEXES.get(table.name, []):
+                if index_name not in existing_indexes:
+                    continue
+                if engine.dialect.name == 'mysql':
+                    connection.execute(text(f"DROP INDEX {index_name} ON {table.name}"))
+                else:
+                    connection.execute(text(f"DROP INDEX {index_name}"))
+                logger.info(f"Миграция: удалён заменённый индекс {index_name}")
+
+
+def _migrate_steam_id_column(connection: Connection, inspector, engine: Engine):
+    """
+    Перевести user_privileges.steam_id из VARCHAR в BIGINT (64-bit SteamID).
+
+    Записи в старом формате STEAM_X:Y:Z приводятся к 64-bit. Если один игрок
+    записан под двумя ключами, остаётся последняя обновлённая запись.
+    Записи с нераспознанным SteamID удаляются с предупреждением в логе.
+    В SQLite тип колонки не меняется (используется только для нагрузочных тестов).
+
+    Args:
+        connection: Соединение в открытой транзакции
+        inspector: Инспектор схемы
+        engine: Движок SQLAlchemy
+    """
+    if engine.dialect.name != 'mysql' or not inspector.has_table('user_privileges'):
+        return
+
+    column = next(column for column in inspector.get_columns('user_privileges') if column['name'] == 'steam_id')
+    if not isinstance(column['type'], String):
+        return
+
+    rows = connection.execute(text(
+        "SELECT id, steam_id FROM user_privileges ORDER BY updated_at DESC, id DESC"
+    )).all()
+
+    kept = set()
+    updates = []
+    deleted_ids = []
+    for record_id, steam_id in rows:
+        steam_id64 = to_steam_id64(steam_id)
+        if steam_id64 is None:
+            logger.warning(f"Миграция: удалена запись {record_id} с неверным SteamID '{steam_id}'")
+            deleted_ids.append(record_id)
+        elif steam_id64 in kept:
+            logger.warning(f"Миграция: удалён дубликат {record_id} ({steam_id} = {steam_id64})")
+            deleted_ids.append(record_id)
+        else:
+            kept.add(steam_id64)
+            if str(steam_id64) != steam_id:
+                updates.append({'id': record_id, 'steam_id': str(steam_id64)})
+
+    if deleted_ids:
+        connection.execute(
+            text("DELETE FROM user_privileges WHERE id IN :ids").bindparams(bindparam('ids', expanding=True)),
+            {'ids': deleted_ids}
+        )
+    if updates:
+        # Сначала удаляем дубликаты, иначе новое значение может нарушить уникальность
+        connection.execute(text("UPDATE user_privileges SET steam_id = :steam_id WHERE id = :id"), updates)
+
+    connection.execute(text("ALTER TABLE user_privileges MODIFY steam_id BIGINT NOT NULL"))
+    logger.info(
+        f"Миграция: user_privileges.steam_id переведён в BIGINT "
+        f"(приведено к 64-bit: {len(updates)}, удалено: {len(deleted_ids)})"
+    )
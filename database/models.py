@@ -3,7 +3,7 @@
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, Text, Index, ForeignKey, UniqueConstraint, false
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -16,26 +16,81 @@ class StaffMessage(Base):
     __tablename__ = 'staff_messages'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
+    # Одно сообщение на сервер; NULL у записей, созданных до поддержки нескольких серверов
+    guild_id = Column(BigInteger, nullable=True, unique=True, index=True)
     channel_id = Column(BigInteger, nullable=False, unique=True)
     message_id = Column(BigInteger, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
 
+class StaffMessagePage(Base):
+    """
+    Модель для страницы доски /staff (одно сообщение с одним Embed).
+    """
+    __tablename__ = 'staff_message_pages'
+    __table_args__ = (
+        UniqueConstraint('staff_message_id', 'page_index', name='uq_staff_message_pages_page'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    staff_message_id = Column(Integer, ForeignKey('staff_messages.id', ondelete='CASCADE'), nullable=False)
+    page_index = Column(Integer, nullable=False)
+    message_id = Column(BigInteger, nullable=False)
+    # Хэш содержимого страницы без timestamp: неизменённые страницы не редактируются
+    fingerprint = Column(String(64), nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
 class UserPrivilege(Base):
     """
     Модель для хранения привилегий пользователей.
     """
     __tablename__ = 'user_privileges'
+    __table_args__ = (
+        # Диапазонные выборки по сроку (планировщик истечений)
+        Index('ix_user_privileges_expires_at', 'expires_at'),
+        # "Кто в группе X" с сортировкой по сроку
+        Index('ix_user_privileges_group_expires_at', 'privilege_group', 'expires_at'),
+        # Привилегии пользователя Discord с сортировкой по сроку (заменяет индекс по discord_user_id)
+        Index('ix_user_privileges_discord_user_id_expires_at', 'discord_user_id', 'expires_at'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    discord_user_id = Column(BigInteger, nullable=False, index=True)
-    steam_id = Column(String(17), nullable=False, unique=True, index=True)
+    discord_user_id = Column(BigInteger, nullable=False)
+    steam_id = Column(BigInteger, nullable=False, unique=True, index=True)  # 64-bit SteamID
     privilege_group = Column(String(100), nullable=True)  # Название группы из Oxide
     expires_at = Column(DateTime, nullable=True)  # UTC время окончания привилегии
+    # Наименьшее окно напоминания (в часах), уже отправленное для текущего expires_at
+    reminded_hours = Column(Integer, nullable=True)
+    # Роли за текущий expires_at уже сняты планировщиком истечений
+    expiry_revoked = Column(Boolean, default=False, server_default=false(), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
     def __repr__(self):
         return f"<UserPrivilege(discord_id={self.discord_user_id}, steam_id={self.steam_id}, group={self.privilege_group})>"
 
+
+class AuditEvent(Base):
+    """
+    Модель журнала действий (выдача привилегий, изменения ролей, истечения).
+    """
+    __tablename__ = 'audit_events'
+    __table_args__ = (
+        # Удаление старых событий и выборки за период
+        Index('ix_audit_events_created_at', 'created_at'),
+        # История пользователя
+        Index('ix_audit_events_target_id_created_at', 'target_id', 'created_at'),
+    )
+    
+    id = Column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # UTC
+    event_type = Column(String(32), nullable=False)
+    actor_id = Column(BigInteger, nullable=True)  # Кто выполнил действие (None — бот)
+    target_id = Column(BigInteger, nullable=True)  # Пользователь Discord, над которым выполнено действие
+    guild_id = Column(BigInteger, nullable=True)
+    steam_id = Column(BigInteger, nullable=True)
+    privilege_group = Column(String(100), nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+    details = Column(Text, nullable=True)
@@ -0,0 +1,201 @@
+"""
+Атомарная запись привилегий (upsert одним запросом).
+
+Вставка, обновление и проверка изменений выполняются одним запросом:
+MySQL INSERT ... ON DUPLICATE KEY UPDATE, SQLite INSERT ... ON CONFLICT DO UPDATE.
+Одновременные команды для одного SteamID не получают ошибку уникального ключа,
+а неизменённая запись не переписывается.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import and_, case, false, func, null, or_, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .models import UserPrivilege
+
+# Колонки, изменение которых считается изменением привилегии
+DATA_COLUMNS = ('discord_user_id', 'privilege_group', 'expires_at')
+
+# Размер пачки для пакетного upsert
+BATCH_SIZE = 500
+
+
+def _build_upsert(dialect_name: str, values: List[Dict[str, Any]]):
+    """
+    Построить upsert для диалекта БД.
+
+    Args:
+        dialect_name: Имя диалекта ('mysql' или 'sqlite')
+        values: Строки для вставки
+
+    Returns:
+        Insert-запрос с обработкой конфликта по steam_id
+
+    Raises:
+        NotImplementedError: Для неподдерживаемого диалекта
+    """
+    table = UserPrivilege.__table__
+
+    if dialect_name == 'mysql':
+        stmt = mysql_insert(table).values(values)
+        new = stmt.inserted
+        unchanged = and_(*(table.c[name].is_not_distinct_from(new[name]) for name in DATA_COLUMNS))
+        # MySQL вычисляет присваивания слева направо, поэтому служебные колонки
+        # сравниваются со старыми значениями до того, как изменятся колонки данных
+        return stmt.on_duplicate_key_update([
+            # id не меняется, но через LAST_INSERT_ID(expr) запрос сообщает клиенту (insert_id),
+            # изменилась ли запись: 0 — данные те же, ID записи — обновлена.
+            # При вставке UPDATE не выполняется и insert_id — ID новой записи
+            ('id', case(
+                (unchanged, func.last_insert_id(0) + table.c.id), else_=func.last_insert_id(table.c.id)
+            )),
+            ('updated_at', case((unchanged, table.c.updated_at), else_=new.updated_at)),
+            ('reminded_hours', case(
+                (table.c.expires_at.is_not_distinct_from(new.expires_at), table.c.reminded_hours), else_=null()
+            )),
+            ('expiry_revoked', case(
+                (table.c.expires_at.is_not_distinct_from(new.expires_at), table.c.expiry_revoked), else_=false()
+            )),
+            *((name, new[name]) for name in DATA_COLUMNS)
+        ])
+
+    if dialect_name == 'sqlite':
+        stmt = sqlite_insert(table).values(values)
+        new = stmt.excluded
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.steam_id],
+            set_={
+                'updated_at': new.updated_at,
+                'reminded_hours': case(
+                    (table.c.expires_at.is_not_distinct_from(new.expires_at), table.c.reminded_hours), else_=null()
+                ),
+                'expiry_revoked': case(
+                    (table.c.expires_at.is_not_distinct_from(new.expires_at), table.c.expiry_revoked), else_=false()
+                ),
+                **{name: new[name] for name in DATA_COLUMNS}
+            },
+            # Неизменённая запись не обновляется (rowcount 0)
+            where=or_(*(table.c[name].is_distinct_from(new[name]) for name in DATA_COLUMNS))
+        )
+
+    raise NotImplementedError(f"Upsert не поддерживается для диалекта {dialect_name}")
+
+
+def upsert_privilege(db: Session, discord_user_id: int, steam_id: int, privilege_group: Optional[str],
+                     expires_at: Optional[datetime]) -> bool:
+    """
+    Вставить или обновить привилегию одним запросом.
+
+    Коммит выполняет вызывающий код.
+
+    Args:
+        db: Сессия БД
+        discord_user_id: ID пользователя Discord
+        steam_id: 64-bit SteamID игрока
+        privilege_group: Группа привилегии
+        expires_at: Время окончания (UTC) или None
+
+    Returns:
+        True если запись вставлена или изменена, False если данные не изменились
+    """
+    dialect_name = db.get_bind().dialect.name
+    now = datetime.utcnow()
+    result = db.execute(_build_upsert(dialect_name, [{
+        'discord_user_id': discord_user_id,
+        'steam_id': steam_id,
+        'privilege_group': privilege_group,
+        'expires_at': expires_at,
+        'created_at': now,
+        'updated_at': now,
+    }]))
+    if dialect_name == 'mysql':
+        # По rowcount (с CLIENT_FOUND_ROWS) вставку не отличить от неизменённой записи:
+        # обе дают 1. Поэтому изменение сообщает сам запрос через LAST_INSERT_ID (см. _build_upsert)
+        return bool(result.lastrowid)
+    # Неизменённая запись не обновляется условием WHERE (rowcount 0)
+    return result.rowcount > 0
+
+
+def upsert_privileges(db: Session, rows: List[Dict[str, Any]], batch_size: int = BATCH_SIZE) -> List[Dict[str, Any]]:
+    """
+    Вставить или обновить пачку привилегий.
+
+    На каждую пачку: один SELECT ... IN для определения изменённых строк и один
+    многострочный upsert только для них. Коммит выполняет вызывающий код.
+
+    Args:
+        db: Сессия БД
+        rows: Список dict с ключами discord_user_id, steam_id, privilege_group, expires_at
+        batch_size: Размер пачки
+
+    Returns:
+        Список изменённых (вставленных или обновлённых) строк
+    """
+    dialect_name = db.get_bind().dialect.name
+    changed = []
+
+    for start in range(0, len(rows), batch_size):
+        chunk = rows[start:start + batch_size]
+        existing = {
+            steam_id: (discord_user_id, privilege_group, expires_at)
+            for steam_id, discord_user_id, privilege_group, expires_at in db.execute(
+                select(
+                    UserPrivilege.steam_id,
+                    UserPrivilege.discord_user_id,
+                    UserPrivilege.privilege_group,
+                    UserPrivilege.expires_at
+                ).where(UserPrivilege.steam_id.in_([row['steam_id'] for row in chunk]))
+            )
+        }
+
+        chunk_changed = [
+            row for row in chunk
+            if existing.get(row['steam_id']) != (row['discord_user_id'], row['privilege_group'], row['expires_at'])
+        ]
+        if not chunk_changed:
+            continue
+
+        now = datetime.utcnow()
+        db.execute(_build_upsert(dialect_name, [
+            {
+                'discord_user_id': row['discord_user_id'],
+                'steam_id': row['steam_id'],
+                'privilege_group': row['privilege_group'],
+                'expires_at': row['expires_at'],
+                'created_at': now,
+                'updated_at': now,
+            }
+            for row in chunk_changed
+        ]))
+        changed.extend(chunk_changed)
+
+    return changed
+
+
+def mark_expiry_revoked(db: Session, steam_ids: List[int], now: datetime) -> int:
+    """
+    Отметить, что роли за истёкшие привилегии сняты.
+
+    Отметка сбрасывается upsert-ом при изменении expires_at, поэтому
+    продлённая и снова истёкшая привилегия обрабатывается заново.
+    Коммит выполняет вызывающий код.
+
+    Args:
+        db: Сессия БД
+        steam_ids: SteamID обработанных привилегий
+        now: Текущее время UTC (продлённые записи не отмечаются)
+
+    Returns:
+        Количество отмеченных записей
+    """
+    if not steam_ids:
+        return 0
+    result = db.execute(
+        update(UserPrivilege)
+        .where(UserPrivilege.steam_id.in_(steam_ids), UserPrivilege.expires_at <= now)
+        .values(expiry_revoked=True)
+    )
+    return result.rowcount
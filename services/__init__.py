@@ -2,8 +2,19 @@
 Сервисы для работы с внешними системами.
 """
 
-from .rcon import RCONClient
+from .rcon import RCONClient, RCONCluster, RCONDispatcher
 from .staff_embed import StaffEmbedService
+from .profiler import ProfilerService
+from .privilege_sync import PrivilegeSyncService
+from .expiry import ExpiryScheduler
+from .notifications import NotificationDispatcher
+from .reminders import ReminderScheduler
+from .privilege_list import PrivilegeListService
+from .privilege_store import PrivilegeStore
+from .audit import AuditLogger
+from .snapshot import StateSnapshot
+from .rest import RestScheduler, get_rest_scheduler
+from .webhook import PrivilegeWebhook
 
-__all__ = ['RCONClient', 'StaffEmbedService']
+__all__ = ['RCONClient', 'RCONCluster', 'RCONDispatcher', 'StaffEmbedService', 'ProfilerService', 'PrivilegeSyncService', 'ExpiryScheduler', 'NotificationDispatcher', 'ReminderScheduler', 'PrivilegeListService', 'PrivilegeStore', 'AuditLogger', 'StateSnapshot', 'RestScheduler', 'get_rest_scheduler', 'PrivilegeWebhook']
 
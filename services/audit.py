@@ -0,0 +1,227 @@
+"""
+Журнал действий (таблица audit_events) с отложенной записью.
+
+События копятся в памяти и записываются в БД многострочными INSERT фоновой
+задачей (по размеру буфера или по времени), поэтому запись события не
+добавляет командам обращений к БД. Старые события периодически удаляются.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional
+from sqlalchemy import delete, insert
+from config.config_loader import get_config
+from database.connection import get_db_session
+from database.models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+# Типы событий
+AUDIT_PRIVILEGE_SYNC = 'privilege_sync'
+AUDIT_ROLE_GRANT = 'role_grant'
+AUDIT_ROLE_REMOVE = 'role_remove'
+AUDIT_PRIVILEGE_EXPIRED = 'privilege_expired'
+
+
+class AuditLogger:
+    """
+    Буферизованная запись событий в audit_events.
+    """
+
+    def __init__(self):
+        """
+        Инициализировать журнал.
+        """
+        audit_config = get_config().get('audit', {})
+        self.batch_size = audit_config.get('batch_size', 100)
+        self.flush_interval = audit_config.get('flush_interval', 5.0)
+        # Предел буфера на случай недоступности БД: старые события отбрасываются
+        self.max_buffer = audit_config.get('max_buffer', 10000)
+        self.retention = timedelta(days=audit_config.get('retention_days', 90))
+        self.prune_interval = timedelta(hours=audit_config.get('prune_interval_hours', 24))
+        self.prune_batch_size = audit_config.get('prune_batch_size', 5000)
+
+        # При переполнении deque сам отбрасывает самое старое событие (O(1))
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=self.max_buffer)
+        self._flush_event = asyncio.Event()
+        self._closing = False
+        self._task: Optional[asyncio.Task] = None
+        self._last_prune: Optional[datetime] = None
+
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        """
+        Количество событий, ожидающих записи.
+        """
+        return len(self._buffer)
+
+    def record(self, event_type: str, actor_id: Optional[int] = None, target_id: Optional[int] = None,
+               guild_id: Optional[int] = None, steam_id: Optional[int] = None,
+               privilege_group: Optional[str] = None, expires_at: Optional[datetime] = None,
+               details: Optional[str] = None):
+        """
+        Добавить событие в буфер (без обращения к БД).
+
+        Args:
+            event_type: Тип события (AUDIT_*)
+            actor_id: ID пользователя Discord, выполнившего действие (None — бот)
+            target_id: ID пользователя Discord, над которым выполнено действие
+            guild_id: ID сервера Discord
+            steam_id: 64-bit SteamID
+            privilege_group: Группа привилегии
+            expires_at: Время окончания привилегии (UTC)
+            details: Дополнительная информация
+        """
+        if len(self._buffer) >= self.max_buffer:
+            # append ниже вытеснит самое старое событие
+            self._count_dropped(1)
+
+        self._buffer.append({
+            'created_at': datetime.utcnow(),
+            'event_type': event_type,
+            'actor_id': actor_id,
+            'target_id': target_id,
+            'guild_id': guild_id,
+            'steam_id': steam_id,
+            'privilege_group': privilege_group,
+            'expires_at': expires_at,
+            'details': details,
+        })
+        if len(self._buffer) >= self.batch_size:
+            self._flush_event.set()
+
+    def start(self):
+        """
+        Запустить фоновую запись.
+        """
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Записать оставшиеся события и остановить фоновую задачу.
+        """
+        if self._task is not None:
+            self._closing = True
+            self._flush_event.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        """
+        Основной цикл: запись буфера и периодическая очистка старых событий.
+        """
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+
+            try:
+                await self.flush()
+
+                now = datetime.utcnow()
+                if self._last_prune is None or now - self._last_prune >= self.prune_interval:
+                    self._last_prune = now
+                    # Удаление идёт многими пачками: в потоке, чтобы не блокировать цикл событий
+                    await asyncio.to_thread(self.prune, now)
+            except Exception as e:
+                logger.error(f"Ошибка при записи журнала действий: {e}", exc_info=True)
+
+    async def flush(self) -> int:
+        """
+        Записать буфер в БД многострочными INSERT.
+
+        Буфер снимается в цикле событий, запрос к БД выполняется в потоке.
+        При ошибке события возвращаются в буфер и записываются следующим проходом.
+
+        Returns:
+            Количество записанных событий
+        """
+        if not self._buffer:
+            return 0
+
+        events = list(self._buffer)
+        self._buffer.clear()
+
+        try:
+            await asyncio.to_thread(self._write, events)
+        except Exception:
+            # События, добавленные в буфер, пока запрос выполнялся в потоке, идут после возвращённых
+            events.extend(self._buffer)
+            self._count_dropped(len(events) - self.max_buffer)
+            self._buffer = deque(events, maxlen=self.max_buffer)
+            raise
+
+        return len(events)
+
+    def _write(self, events: List[Dict[str, Any]]):
+        """
+        Записать события в БД одной транзакцией (выполняется в потоке).
+        """
+        db = get_db_session()
+        try:
+            for start in range(0, len(events), self.batch_size):
+                db.execute(insert(AuditEvent), events[start:start + self.batch_size])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _count_dropped(self, count: int):
+        """
+        Учесть события, отброшенные из-за переполнения буфера.
+        """
+        if count <= 0:
+            return
+        previous = self.dropped
+        self.dropped += count
+        if previous // 1000 != self.dropped // 1000 or previous == 0:
+            logger.warning(f"Буфер журнала действий переполнен, отброшено событий: {self.dropped}")
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        """
+        Удалить события старше retention_days пачками (короткие блокировки таблицы).
+
+        Выполняет запросы синхронно: из цикла событий вызывается через asyncio.to_thread.
+
+        Args:
+            now: Текущее время UTC
+
+        Returns:
+            Количество удалённых событий
+        """
+        cutoff = (now or datetime.utcnow()) - self.retention
+        deleted = 0
+
+        db = get_db_session()
+        try:
+            while True:
+                # В SQLite LIMIT не применяется, удаление выполняется за один проход
+                result = db.execute(
+                    delete(AuditEvent)
+                    .where(AuditEvent.created_at < cutoff)
+                    .with_dialect_options(mysql_limit=self.prune_batch_size)
+                )
+                db.commit()
+                deleted += result.rowcount
+                if result.rowcount < self.prune_batch_size:
+                    break
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if deleted:
+            logger.info(f"Удалено старых событий журнала действий: {deleted}")
+        return deleted
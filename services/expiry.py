@@ -0,0 +1,346 @@
+"""
+Планировщик истечения привилегий (UserPrivilege.expires_at).
+
+Ближайшие истечения держатся в памяти в min-куче. Задача спит ровно до
+ближайшего дедлайна, а не опрашивает таблицу целиком.
+
+Обработанные истечения отмечаются в БД (UserPrivilege.expiry_revoked), поэтому
+при загрузке подхватываются все необработанные, сколько бы бот ни был выключен.
+"""
+
+import heapq
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import discord
+from config.config_loader import get_config
+from database.connection import get_db_session
+from database.models import UserPrivilege
+from database.repository import mark_expiry_revoked
+from services.privilege_sync import PrivilegeSyncService
+from services.staff_embed import StaffEmbedService
+from services.notifications import NotificationDispatcher
+from services.audit import AUDIT_PRIVILEGE_EXPIRED
+
+logger = logging.getLogger(__name__)
+
+
+class ExpiryScheduler:
+    """
+    Снимает роли Discord в момент истечения привилегии.
+    """
+
+    def __init__(self, bot: discord.Client, privilege_sync_service: PrivilegeSyncService,
+                 staff_embed_service: StaffEmbedService,
+                 notification_dispatcher: Optional[NotificationDispatcher] = None):
+        """
+        Инициализировать планировщик.
+
+        Args:
+            bot: Экземпляр Discord бота
+            privilege_sync_service: Сервис синхронизации привилегий
+            staff_embed_service: Сервис для обновления Embed
+            notification_dispatcher: Очередь уведомлений (None — не уведомлять об истечении)
+        """
+        self.bot = bot
+        self.privilege_sync_service = privilege_sync_service
+        self.staff_embed_service = staff_embed_service
+        self.notification_dispatcher = notification_dispatcher
+
+        expiry_config = get_config().get('expiry', {})
+        self.batch_size = expiry_config.get('batch_size', 50)
+        # Уведомлять только о недавних истечениях (давно истёкшие после простоя бота — без сообщения)
+        self.notify_window = timedelta(hours=expiry_config.get('notify_window_hours', 24))
+        # Насколько далеко в будущее держать истечения в памяти
+        self.horizon = timedelta(hours=expiry_config.get('horizon_hours', 24))
+
+        # Куча (expires_at, steam_id); устаревшие элементы отбрасываются при извлечении
+        self._heap: List[Tuple[datetime, int]] = []
+        # Актуальные данные по SteamID: (expires_at, discord_user_id, privilege_group)
+        self._entries: Dict[int, Tuple[datetime, int, Optional[str]]] = {}
+        self._loaded_until: Optional[datetime] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        privilege_sync_service.add_upsert_listener(self.schedule)
+
+    @property
+    def pending(self) -> int:
+        """
+        Количество запланированных истечений.
+        """
+        return len(self._entries)
+
+    def load(self, now: Optional[datetime] = None):
+        """
+        Загрузить необработанные истечения до now + horizon из БД (диапазонный запрос по expires_at).
+
+        Args:
+            now: Текущее время UTC
+        """
+        now = now or datetime.utcnow()
+        upper = now + self.horizon
+
+        store = self.privilege_sync_service.privilege_store
+        if store is not None:
+            rows = [
+                (record.steam_id, record.discord_user_id, record.privilege_group, record.expires_at)
+                for record in store.records()
+                if record.expires_at is not None and record.expires_at <= upper and not record.expiry_revoked
+            ]
+        else:
+            db = get_db_session()
+            try:
+                rows = (
+                    db.query(
+                        UserPrivilege.steam_id,
+                        UserPrivilege.discord_user_id,
+                        UserPrivilege.privilege_group,
+                        UserPrivilege.expires_at
+                    )
+                    .filter(UserPrivilege.expires_at <= upper, UserPrivilege.expiry_revoked.is_(False))
+                    .all()
+                )
+            finally:
+                db.close()
+
+        self._entries = {
+            steam_id: (expires_at, discord_user_id, privilege_group)
+            for steam_id, discord_user_id, privilege_group, expires_at in rows
+        }
+        self._heap = [(expires_at, steam_id) for steam_id, (expires_at, _, _) in self._entries.items()]
+        heapq.heapify(self._heap)
+        self._loaded_until = upper
+
+        logger.info(f"Загружено {len(self._entries)} истечений привилегий до {upper:%Y-%m-%d %H:%M:%S} UTC")
+
+    def schedule(self, discord_user_id: int, steam_id: int, privilege_group: Optional[str],
+                 expires_at: Optional[datetime]):
+        """
+        Обновить расписание после изменения привилегии.
+
+        Args:
+            discord_user_id: ID пользователя Discord
+            steam_id: 64-bit SteamID игрока
+            privilege_group: Группа привилегии
+            expires_at: Новое время окончания (UTC) или None
+        """
+        if expires_at is None or self._loaded_until is None or expires_at > self._loaded_until:
+            # Бессрочная или далёкая привилегия: подхватится при следующей загрузке окна
+            self._entries.pop(steam_id, None)
+            return
+
+        self._entries[steam_id] = (expires_at, discord_user_id, privilege_group)
+        heapq.heappush(self._heap, (expires_at, steam_id))
+
+        if self._heap[0] == (expires_at, steam_id):
+            # Новый ближайший дедлайн: будим задачу, чтобы она пересчитала сон
+            self._wakeup.set()
+
+    def start(self):
+        """
+        Запустить фоновую задачу.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Остановить фоновую задачу.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _peek(self) -> Optional[datetime]:
+        """
+        Получить ближайший актуальный дедлайн, отбросив устаревшие элементы кучи.
+        """
+        while self._heap:
+            expires_at, steam_id = self._heap[0]
+            entry = self._entries.get(steam_id)
+            if entry is not None and entry[0] == expires_at:
+                return expires_at
+            heapq.heappop(self._heap)
+        return None
+
+    def _pop_due(self, now: datetime) -> List[Tuple[int, int, Optional[str], datetime]]:
+        """
+        Извлечь до batch_size наступивших истечений.
+        """
+        due = []
+        while len(due) < self.batch_size:
+            expires_at = self._peek()
+            if expires_at is None or expires_at > now:
+                break
+            _, steam_id = heapq.heappop(self._heap)
+            _, discord_user_id, privilege_group = self._entries.pop(steam_id)
+            due.append((steam_id, discord_user_id, privilege_group, expires_at))
+        return due
+
+    async def _run(self):
+        """
+        Основной цикл: спать до ближайшего дедлайна и обрабатывать истечения пачками.
+        """
+        while True:
+            try:
+                now = datetime.utcnow()
+                if self._loaded_until is None or now >= self._loaded_until:
+                    self.load(now)
+
+                due = self._pop_due(now)
+                if due:
+                    await self._revoke_batch(due, now)
+                    continue
+
+                deadline = self._peek() or self._loaded_until
+                delay = max((min(deadline, self._loaded_until) - now).total_seconds(), 0)
+
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка в планировщике истечений: {e}", exc_info=True)
+                await asyncio.sleep(60)
+
+    async def _revoke_batch(self, due: List[Tuple[int, int, Optional[str], datetime]], now: datetime):
+        """
+        Снять роли за пачку истёкших привилегий.
+
+        Args:
+            due: Список (steam_id, discord_user_id, privilege_group, expires_at)
+            now: Текущее время UTC
+        """
+        steam_ids = [steam_id for steam_id, _, _, _ in due]
+        discord_user_ids = {discord_user_id for _, discord_user_id, _, _ in due}
+
+        store = self.privilege_sync_service.privilege_store
+        if store is not None:
+            # Хранилище в памяти уже содержит последние продления
+            expired = [
+                (record.steam_id, record.discord_user_id, record.privilege_group, record.expires_at)
+                for record in map(store.get, steam_ids)
+                if record is not None and record.expires_at is not None and record.expires_at <= now
+            ]
+            active_groups = {discord_user_id: store.active_groups(discord_user_id, now)
+                             for discord_user_id in discord_user_ids}
+        else:
+            db = get_db_session()
+            try:
+                # Перепроверяем по БД: запись могла быть продлена другим процессом
+                expired = (
+                    db.query(UserPrivilege.steam_id, UserPrivilege.discord_user_id,
+                             UserPrivilege.privilege_group, UserPrivilege.expires_at)
+                    .filter(
+                        UserPrivilege.steam_id.in_(steam_ids),
+                        UserPrivilege.expires_at <= now
+                    )
+                    .all()
+                )
+                # Группы, которые у пользователей остаются активными (через другие SteamID)
+                active = (
+                    db.query(UserPrivilege.discord_user_id, UserPrivilege.privilege_group)
+                    .filter(
+                        UserPrivilege.discord_user_id.in_(discord_user_ids),
+                        (UserPrivilege.expires_at.is_(None)) | (UserPrivilege.expires_at > now)
+                    )
+                    .all()
+                )
+            finally:
+                db.close()
+
+            active_groups: Dict[int, set] = {}
+            for discord_user_id, privilege_group in active:
+                active_groups.setdefault(discord_user_id, set()).add(privilege_group)
+
+        touched_guilds = {}
+        notified = set()
+        # Истечения, роли за которые снять не удалось: не отмечаются и повторяются при следующей загрузке
+        failed = set()
+        for steam_id, discord_user_id, privilege_group, expires_at in expired:
+            if not privilege_group or privilege_group in active_groups.get(discord_user_id, set()):
+                continue
+
+            for guild in self.bot.guilds:
+                member = guild.get_member(discord_user_id)
+                if member is None:
+                    continue
+
+                keep_groups = active_groups.get(discord_user_id, set())
+                removed = await self.privilege_sync_service.revoke_roles(
+                    guild, member, privilege_group, keep_groups=keep_groups
+                )
+                if not removed and self._holds_role(guild, member, privilege_group, keep_groups):
+                    failed.add(steam_id)
+                if removed:
+                    logger.info(f"ACTION: Истекла привилегия {privilege_group} у {member} ({discord_user_id})")
+                    touched_guilds[guild.id] = guild
+                    self.privilege_sync_service.audit(
+                        AUDIT_PRIVILEGE_EXPIRED, target_id=discord_user_id, guild_id=guild.id,
+                        privilege_group=privilege_group
+                    )
+
+                    if self.notification_dispatcher and (discord_user_id, privilege_group) not in notified \
+                            and expires_at >= now - self.notify_window:
+                        notified.add((discord_user_id, privilege_group))
+                        self.notification_dispatcher.notify(
+                            member, f"⌛ Срок вашей привилегии **{privilege_group}** истёк.", guild
+                        )
+
+        processed = [steam_id for steam_id, _, _, _ in expired if steam_id not in failed]
+        self._mark_revoked(processed, now)
+        if failed:
+            logger.warning(f"Не удалось снять роли за {len(failed)} истёкших привилегий, повтор при следующей загрузке")
+
+        for guild in touched_guilds.values():
+            await self.staff_embed_service.update_staff_message(guild)
+
+    def _holds_role(self, guild: discord.Guild, member: discord.Member, privilege_group: str,
+                    keep_groups: set) -> bool:
+        """
+        Проверить, осталась ли у участника роль истёкшей группы, которую нужно снять.
+        """
+        discord_role = self.privilege_sync_service.get_discord_role_by_privilege(guild, privilege_group)
+        if discord_role is None or discord_role not in member.roles:
+            return False
+        return not any(
+            group and self.privilege_sync_service.get_discord_role_by_privilege(guild, group) == discord_role
+            for group in keep_groups
+        )
+
+    def _mark_revoked(self, steam_ids: List[int], now: datetime):
+        """
+        Отметить истечения обработанными, чтобы они не загружались повторно.
+
+        Args:
+            steam_ids: SteamID обработанных привилегий
+            now: Текущее время UTC
+        """
+        if not steam_ids:
+            return
+
+        store = self.privilege_sync_service.privilege_store
+        if store is not None:
+            for record in map(store.get, steam_ids):
+                if record is not None and record.expires_at is not None and record.expires_at <= now:
+                    record.expiry_revoked = True
+
+        db = get_db_session()
+        try:
+            mark_expiry_revoked(db, steam_ids, now)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Ошибка при отметке обработанных истечений: {e}", exc_info=True)
+        finally:
+            db.close()
@@ -0,0 +1,249 @@
+"""
+Фоновая отправка уведомлений пользователям (ЛС с запасным каналом).
+
+Команды только ставят уведомление в очередь и сразу отвечают. Отправка идёт
+в фоне с ограничением частоты по bucket'ам (ЛС и каждый канал отдельно),
+повторами при временных ошибках и пакетной отправкой в запасной канал.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import aiohttp
+import discord
+from config.config_loader import get_config, get_guild_config
+from services.rest import RestScheduler, get_rest_scheduler, PRIORITY_NOTIFICATION, channel_bucket, dm_bucket
+from utils.ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Лимит длины сообщения Discord
+MESSAGE_LIMIT = 2000
+
+
+class NotificationDispatcher:
+    """
+    Очередь уведомлений с фоновыми отправителями.
+    """
+
+    def __init__(self, rest_scheduler: Optional[RestScheduler] = None):
+        """
+        Инициализировать диспетчер.
+
+        Args:
+            rest_scheduler: Планировщик REST-запросов (None — общий планировщик процесса)
+        """
+        self.rest_scheduler = rest_scheduler or get_rest_scheduler()
+        notifications_config = get_config().get('notifications', {})
+        self.workers = notifications_config.get('workers', 2)
+        self.retry_attempts = notifications_config.get('retry_attempts', 3)
+        self.retry_delay = notifications_config.get('retry_delay', 2.0)
+        # Пакет уведомлений в запасной канал: отправляется при наборе batch_size или раз в interval
+        self.fallback_batch_size = notifications_config.get('fallback_batch_size', 10)
+        self.fallback_interval = notifications_config.get('fallback_interval', 5.0)
+
+        self.dm_rate = notifications_config.get('dm_rate', 1.0)
+        self.dm_burst = notifications_config.get('dm_burst', 5)
+        self.channel_rate = notifications_config.get('channel_rate', 0.5)
+        self.channel_burst = notifications_config.get('channel_burst', 3)
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=notifications_config.get('queue_size', 1000))
+        self._buckets: Dict[str, TokenBucket] = {}
+        # Ожидающие отправки в запасной канал: channel_id -> (канал, [текст])
+        self._fallbacks: Dict[int, Tuple[discord.abc.Messageable, List[str]]] = {}
+        self._flush_event = asyncio.Event()
+        self._closing = False
+        self._tasks: List[asyncio.Task] = []
+        self._flusher: Optional[asyncio.Task] = None
+
+        self.stats: Counter = Counter()
+
+    @property
+    def pending(self) -> int:
+        """
+        Количество уведомлений в очереди.
+        """
+        return self._queue.qsize()
+
+    def _bucket(self, key: str) -> TokenBucket:
+        """
+        Получить bucket по ключу ('dm' или 'channel:<id>').
+        """
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if key == 'dm':
+                bucket = TokenBucket(self.dm_rate, self.dm_burst)
+            else:
+                bucket = TokenBucket(self.channel_rate, self.channel_burst)
+            self._buckets[key] = bucket
+        return bucket
+
+    def notify(self, user: discord.abc.User, message: str, guild: Optional[discord.Guild] = None) -> bool:
+        """
+        Поставить уведомление в очередь.
+
+        Args:
+            user: Пользователь для уведомления
+            message: Сообщение
+            guild: Discord сервер (для запасного канала, если ЛС закрыты)
+
+        Returns:
+            True если уведомление поставлено в очередь, False если очередь переполнена
+        """
+        try:
+            self._queue.put_nowait((user, message, guild))
+            return True
+        except asyncio.QueueFull:
+            self.stats['dropped'] += 1
+            logger.warning(f"Очередь уведомлений переполнена, уведомление для {user} отброшено")
+            return False
+
+    def start(self):
+        """
+        Запустить фоновые задачи.
+        """
+        if self._tasks:
+            return
+        self._closing = False
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._flusher = asyncio.create_task(self._fallback_flusher())
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Дождаться отправки очереди (не дольше timeout) и остановить задачи.
+
+        Args:
+            timeout: Максимальное время ожидания в секундах
+        """
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Не отправлено уведомлений при остановке: {self._queue.qsize()}")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        # Отправитель пакетов завершается сам после последней отправки
+        if self._flusher is not None:
+            self._closing = True
+            self._flush_event.set()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+
+    async def _worker(self):
+        """
+        Отправитель: берёт уведомления из очереди и шлёт в ЛС.
+        """
+        while True:
+            user, message, guild = await self._queue.get()
+            try:
+                await self._deliver(user, message, guild)
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error(f"Ошибка при отправке уведомления {user}: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, user: discord.abc.User, message: str, guild: Optional[discord.Guild]):
+        """
+        Отправить уведомление в ЛС, при закрытых ЛС — в запасной канал.
+        """
+        for attempt in range(self.retry_attempts):
+            await self._bucket('dm').acquire()
+            try:
+                await self.rest_scheduler.run(PRIORITY_NOTIFICATION, dm_bucket(), user.send, message)
+                self.stats['sent'] += 1
+                return
+            except discord.Forbidden:
+                # ЛС недоступно, отправляем в канал команды
+                self._add_fallback(user, message, guild)
+                return
+            except discord.NotFound:
+                self.stats['failed'] += 1
+                return
+            except (discord.HTTPException, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if isinstance(e, discord.HTTPException) and e.status < 500 and e.status != 429:
+                    self.stats['failed'] += 1
+                    logger.error(f"Ошибка при отправке уведомления {user}: {e}")
+                    return
+                if attempt < self.retry_attempts - 1:
+                    logger.warning(f"Попытка {attempt + 1}/{self.retry_attempts} отправить уведомление {user} не удалась, повтор...")
+                    await asyncio.sleep(self.retry_delay * 2 ** attempt)
+
+        self.stats['failed'] += 1
+        logger.error(f"Не удалось отправить уведомление {user} после {self.retry_attempts} попыток")
+
+    def _add_fallback(self, user: discord.abc.User, message: str, guild: Optional[discord.Guild]):
+        """
+        Добавить уведомление в пакет для запасного канала.
+        """
+        channel = None
+        if guild is not None:
+            command_channel_id = get_guild_config(guild.id).get('command_channel_id')
+            if command_channel_id:
+                channel = guild.get_channel(command_channel_id)
+
+        if channel is None:
+            self.stats['failed'] += 1
+            logger.warning(f"ЛС {user} закрыты, а канал для уведомлений не найден")
+            return
+
+        _, texts = self._fallbacks.setdefault(channel.id, (channel, []))
+        texts.append(f"{user.mention} {message}")
+        if len(texts) >= self.fallback_batch_size:
+            self._flush_event.set()
+
+    async def _fallback_flusher(self):
+        """
+        Периодически отправлять накопленные пакеты в запасные каналы.
+        """
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout=self.fallback_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+
+            try:
+                await self._flush_fallbacks()
+            except Exception as e:
+                logger.error(f"Ошибка при отправке уведомлений в канал: {e}", exc_info=True)
+
+        # Остаток, накопленный во время последней отправки
+        await self._flush_fallbacks()
+
+    async def _flush_fallbacks(self):
+        """
+        Отправить накопленные уведомления: по одному сообщению на каждые 2000 символов.
+        """
+        fallbacks = self._fallbacks
+        self._fallbacks = {}
+
+        for channel_id, (channel, texts) in fallbacks.items():
+            # Пакеты (текст, количество уведомлений)
+            batches = []
+            current = ""
+            count = 0
+            for text in texts:
+                text = text[:MESSAGE_LIMIT]
+                if current and len(current) + 2 + len(text) > MESSAGE_LIMIT:
+                    batches.append((current, count))
+                    current = ""
+                    count = 0
+                current = f"{current}\n\n{text}" if current else text
+                count += 1
+            if current:
+                batches.append((current, count))
+
+            bucket = self._bucket(f"channel:{channel_id}")
+            for batch, count in batches:
+                await bucket.acquire()
+                try:
+                    await self.rest_scheduler.run(PRIORITY_NOTIFICATION, channel_bucket(channel_id), channel.send, batch)
+                    self.stats['fallback'] += count
+                except Exception as e:
+                    logger.error(f"Ошибка при отправке сообщения в канал: {e}")
+                    self.stats['failed'] += count
@@ -0,0 +1,94 @@
+"""
+Постраничная выборка привилегий для /privileges (keyset-пагинация).
+
+Страницы упорядочены по (expires_at, id): сначала привилегии с датой окончания,
+затем бессрочные (expires_at IS NULL) по id. Следующая страница читается
+условием "после последней строки", а не OFFSET, поэтому стоимость запроса
+не растёт с номером страницы и в памяти держится только одна страница.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import and_, or_
+from database.connection import get_db_session
+from database.models import UserPrivilege
+
+logger = logging.getLogger(__name__)
+
+# Курсор: (expires_at последней строки или None для бессрочных, id последней строки)
+Cursor = Tuple[Optional[datetime], int]
+
+
+class PrivilegeListService:
+    """
+    Сервис постраничной выборки привилегий.
+    """
+
+    def _base_query(self, db, privilege_group: Optional[str], discord_user_id: Optional[int],
+                    expiring_before: Optional[datetime]):
+        """
+        Запрос с колонками страницы и фильтрами.
+        """
+        query = db.query(
+            UserPrivilege.id,
+            UserPrivilege.discord_user_id,
+            UserPrivilege.steam_id,
+            UserPrivilege.privilege_group,
+            UserPrivilege.expires_at
+        )
+        if privilege_group is not None:
+            query = query.filter(UserPrivilege.privilege_group == privilege_group)
+        if discord_user_id is not None:
+            query = query.filter(UserPrivilege.discord_user_id == discord_user_id)
+        if expiring_before is not None:
+            query = query.filter(UserPrivilege.expires_at < expiring_before)
+        return query
+
+    def fetch_page(self, cursor: Optional[Cursor] = None, limit: int = 15,
+                   privilege_group: Optional[str] = None, discord_user_id: Optional[int] = None,
+                   expiring_before: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Получить страницу привилегий после курсора.
+
+        Args:
+            cursor: Курсор последней строки предыдущей страницы (None — первая страница)
+            limit: Размер страницы
+            privilege_group: Фильтр по группе
+            discord_user_id: Фильтр по пользователю Discord
+            expiring_before: Только истекающие раньше этого времени (UTC), без бессрочных
+
+        Returns:
+            Dict с ключами rows (список (id, discord_user_id, steam_id, privilege_group, expires_at))
+            и next_cursor (None, если страница последняя)
+        """
+        filters = (privilege_group, discord_user_id, expiring_before)
+        rows = []
+        db = get_db_session()
+        try:
+            # Сегмент 1: привилегии с датой окончания, ORDER BY expires_at, id
+            if cursor is None or cursor[0] is not None:
+                query = self._base_query(db, *filters).filter(UserPrivilege.expires_at.isnot(None))
+                if cursor is not None:
+                    expires_at, last_id = cursor
+                    query = query.filter(or_(
+                        UserPrivilege.expires_at > expires_at,
+                        and_(UserPrivilege.expires_at == expires_at, UserPrivilege.id > last_id)
+                    ))
+                rows = query.order_by(UserPrivilege.expires_at, UserPrivilege.id).limit(limit + 1).all()
+
+            # Сегмент 2: бессрочные, ORDER BY id (при фильтре по дате их нет)
+            if len(rows) <= limit and expiring_before is None:
+                query = self._base_query(db, *filters).filter(UserPrivilege.expires_at.is_(None))
+                if cursor is not None and cursor[0] is None:
+                    query = query.filter(UserPrivilege.id > cursor[1])
+                rows += query.order_by(UserPrivilege.id).limit(limit + 1 - len(rows)).all()
+        finally:
+            db.close()
+
+        rows = [tuple(row) for row in rows]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1][4], rows[-1][0])
+        return {'rows': rows, 'next_cursor': next_cursor}
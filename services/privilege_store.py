@@ -0,0 +1,277 @@
+"""
+Хранилище привилегий в памяти процесса с отложенной записью в БД.
+
+При запуске таблица user_privileges загружается целиком. Чтение идёт из
+памяти по индексам (SteamID, пользователь Discord, группа), изменения
+копятся и записываются в БД пачками фоновой задачей.
+
+Хранилище локально для процесса: при запуске нескольких процессов
+(шарды по процессам) каждый видит только свои изменения до перезапуска.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+from config.config_loader import get_config
+from database.connection import get_db_session
+from database.models import UserPrivilege
+from database.repository import upsert_privileges
+
+logger = logging.getLogger(__name__)
+
+
+class PrivilegeRecord:
+    """
+    Привилегия одного SteamID.
+    """
+    __slots__ = ('steam_id', 'discord_user_id', 'privilege_group', 'expires_at', 'expiry_revoked')
+
+    def __init__(self, steam_id: int, discord_user_id: int, privilege_group: Optional[str],
+                 expires_at: Optional[datetime], expiry_revoked: bool = False):
+        self.steam_id = steam_id
+        self.discord_user_id = discord_user_id
+        self.privilege_group = privilege_group
+        self.expires_at = expires_at
+        # Роли за текущий expires_at уже сняты (в БД отмечает планировщик истечений)
+        self.expiry_revoked = expiry_revoked
+
+    def is_active(self, now: datetime) -> bool:
+        """
+        Проверить, действует ли привилегия на момент now.
+        """
+        return self.expires_at is None or self.expires_at > now
+
+    def to_row(self) -> dict:
+        """
+        Строка для записи в БД.
+        """
+        return {
+            'discord_user_id': self.discord_user_id,
+            'steam_id': self.steam_id,
+            'privilege_group': self.privilege_group,
+            'expires_at': self.expires_at,
+        }
+
+    def __repr__(self):
+        return f"<PrivilegeRecord(steam_id={self.steam_id}, discord_id={self.discord_user_id}, group={self.privilege_group})>"
+
+
+class PrivilegeStore:
+    """
+    Зеркало user_privileges в памяти с индексами и фоновой записью.
+    """
+
+    def __init__(self):
+        """
+        Инициализировать хранилище.
+        """
+        store_config = get_config().get('privilege_store', {})
+        self.flush_interval = store_config.get('flush_interval', 2.0)
+        self.batch_size = store_config.get('batch_size', 500)
+
+        self._by_steam_id: Dict[int, PrivilegeRecord] = {}
+        self._by_user: Dict[int, Set[int]] = {}
+        self._by_group: Dict[Optional[str], Set[int]] = {}
+
+        # SteamID, изменённые в памяти и ещё не записанные в БД
+        self._dirty: Set[int] = set()
+        self._flush_event = asyncio.Event()
+        self._closing = False
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._by_steam_id)
+
+    @property
+    def pending(self) -> int:
+        """
+        Количество изменений, ожидающих записи в БД.
+        """
+        return len(self._dirty)
+
+    def load(self):
+        """
+        Загрузить все привилегии из БД (заменяет содержимое хранилища).
+        """
+        db = get_db_session()
+        try:
+            rows = db.query(
+                UserPrivilege.steam_id,
+                UserPrivilege.discord_user_id,
+                UserPrivilege.privilege_group,
+                UserPrivilege.expires_at,
+                UserPrivilege.expiry_revoked
+            ).all()
+        finally:
+            db.close()
+
+        self._by_steam_id = {}
+        self._by_user = {}
+        self._by_group = {}
+        for steam_id, discord_user_id, privilege_group, expires_at, expiry_revoked in rows:
+            self._index(PrivilegeRecord(steam_id, discord_user_id, privilege_group, expires_at, expiry_revoked))
+
+        logger.info(f"Загружено привилегий в память: {len(self._by_steam_id)}")
+
+    def _index(self, record: PrivilegeRecord):
+        """
+        Добавить запись в индексы.
+        """
+        self._by_steam_id[record.steam_id] = record
+        self._by_user.setdefault(record.discord_user_id, set()).add(record.steam_id)
+        self._by_group.setdefault(record.privilege_group, set()).add(record.steam_id)
+
+    def _unindex(self, record: PrivilegeRecord):
+        """
+        Убрать запись из индексов по пользователю и группе.
+        """
+        for index, key in ((self._by_user, record.discord_user_id), (self._by_group, record.privilege_group)):
+            steam_ids = index.get(key)
+            if steam_ids is not None:
+                steam_ids.discard(record.steam_id)
+                if not steam_ids:
+                    del index[key]
+
+    def get(self, steam_id: int) -> Optional[PrivilegeRecord]:
+        """
+        Получить привилегию по SteamID.
+        """
+        return self._by_steam_id.get(steam_id)
+
+    def for_user(self, discord_user_id: int) -> List[PrivilegeRecord]:
+        """
+        Получить привилегии всех SteamID пользователя Discord.
+        """
+        return [self._by_steam_id[steam_id] for steam_id in self._by_user.get(discord_user_id, ())]
+
+    def for_group(self, privilege_group: Optional[str]) -> List[PrivilegeRecord]:
+        """
+        Получить привилегии группы.
+        """
+        return [self._by_steam_id[steam_id] for steam_id in self._by_group.get(privilege_group, ())]
+
+    def active_groups(self, discord_user_id: int, now: datetime) -> Set[str]:
+        """
+        Получить действующие группы пользователя (по всем его SteamID).
+        """
+        return {
+            record.privilege_group for record in self.for_user(discord_user_id)
+            if record.privilege_group and record.is_active(now)
+        }
+
+    def records(self) -> Iterable[PrivilegeRecord]:
+        """
+        Все записи хранилища.
+        """
+        return self._by_steam_id.values()
+
+    def put(self, discord_user_id: int, steam_id: int, privilege_group: Optional[str],
+            expires_at: Optional[datetime]) -> bool:
+        """
+        Записать привилегию в память и поставить в очередь на запись в БД.
+
+        Args:
+            discord_user_id: ID пользователя Discord
+            steam_id: 64-bit SteamID игрока
+            privilege_group: Группа привилегии
+            expires_at: Время окончания (UTC) или None
+
+        Returns:
+            True если данные изменились, False иначе
+        """
+        record = self._by_steam_id.get(steam_id)
+        if record is not None:
+            if (record.discord_user_id, record.privilege_group, record.expires_at) == \
+                    (discord_user_id, privilege_group, expires_at):
+                return False
+            self._unindex(record)
+            if record.expires_at != expires_at:
+                record.expiry_revoked = False
+            record.discord_user_id = discord_user_id
+            record.privilege_group = privilege_group
+            record.expires_at = expires_at
+        else:
+            record = PrivilegeRecord(steam_id, discord_user_id, privilege_group, expires_at)
+
+        self._index(record)
+        self._dirty.add(steam_id)
+        if len(self._dirty) >= self.batch_size:
+            self._flush_event.set()
+        return True
+
+    def start(self):
+        """
+        Запустить фоновую запись в БД.
+        """
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Записать оставшиеся изменения и остановить фоновую задачу.
+        """
+        if self._task is not None:
+            self._closing = True
+            self._flush_event.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        """
+        Основной цикл: записывать изменения раз в flush_interval или при наборе batch_size.
+        """
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Ошибка при записи привилегий в БД: {e}", exc_info=True)
+
+    async def flush(self) -> int:
+        """
+        Записать накопленные изменения в БД пачками.
+
+        Очередь и строки снимаются в цикле событий, запрос к БД выполняется в потоке
+        и не блокирует цикл. Изменения, сделанные во время записи, попадают в новую
+        очередь. При ошибке изменения возвращаются в очередь и записываются следующим проходом.
+
+        Returns:
+            Количество записанных строк
+        """
+        if not self._dirty:
+            return 0
+
+        dirty = self._dirty
+        self._dirty = set()
+        rows = [self._by_steam_id[steam_id].to_row() for steam_id in dirty]
+
+        try:
+            await asyncio.to_thread(self._write, rows)
+        except Exception:
+            self._dirty |= dirty
+            raise
+
+        logger.info(f"ACTION: Записано привилегий в БД: {len(rows)}")
+        return len(rows)
+
+    def _write(self, rows: List[dict]):
+        """
+        Записать строки в БД одной транзакцией (выполняется в потоке).
+        """
+        db = get_db_session()
+        try:
+            upsert_privileges(db, rows, self.batch_size)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
@@ -0,0 +1,525 @@
+"""
+Сервис синхронизации привилегий: RCON pinfo → БД → роли Discord → Embed /staff.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional, Dict, Any, Callable, Iterable, List, Set, Tuple
+import discord
+from config.config_loader import get_config, get_guild_config
+from database.connection import get_db_session
+from database.models import UserPrivilege
+from database.repository import upsert_privilege, upsert_privileges
+from services.rcon import RCONCluster, RCON_PRIORITY_INTERACTIVE, RCON_PRIORITY_BULK
+from services.staff_embed import StaffEmbedService
+from services.privilege_store import PrivilegeStore
+from services.rest import RestScheduler, get_rest_scheduler, PRIORITY_INTERACTIVE, PRIORITY_ROLES, roles_bucket
+from services.audit import AuditLogger, AUDIT_PRIVILEGE_SYNC, AUDIT_ROLE_GRANT, AUDIT_ROLE_REMOVE
+from utils.pinfo_parser import parse_pinfo_response, merge_pinfo_results
+
+logger = logging.getLogger(__name__)
+
+# Статусы результата синхронизации
+SYNC_UPDATED = 'updated'
+SYNC_UNCHANGED = 'unchanged'
+SYNC_NO_PRIVILEGE = 'no_privilege'
+SYNC_RCON_ERROR = 'rcon_error'
+SYNC_PARSE_ERROR = 'parse_error'
+SYNC_DB_ERROR = 'db_error'
+
+# Размер пачки для IN-запросов и пакетных вставок
+BATCH_SIZE = 500
+
+
+class PrivilegeSyncService:
+    """
+    Сервис синхронизации привилегии игрока с Discord.
+    """
+
+    def __init__(self, rcon_cluster: RCONCluster, staff_embed_service: StaffEmbedService,
+                 privilege_store: Optional[PrivilegeStore] = None, audit_logger: Optional[AuditLogger] = None,
+                 rest_scheduler: Optional[RestScheduler] = None):
+        """
+        Инициализировать сервис.
+
+        Args:
+            rcon_cluster: Группа RCON-серверов
+            staff_embed_service: Сервис для обновления Embed
+            privilege_store: Хранилище привилегий в памяти (None — запись напрямую в БД)
+            audit_logger: Журнал действий (None — не вести)
+            rest_scheduler: Планировщик REST-запросов (None — общий планировщик процесса)
+        """
+        self.rcon_cluster = rcon_cluster
+        self.staff_embed_service = staff_embed_service
+        self.privilege_store = privilege_store
+        self.audit_logger = audit_logger
+        self.rest_scheduler = rest_scheduler or get_rest_scheduler()
+        self.config = get_config()
+        self.privilege_groups = self.config['privileges']['groups']
+
+        rcon_config = self.config.get('rcon', {})
+        self.rcon_timeout = rcon_config.get('timeout', 10)
+        self.rcon_retry_attempts = rcon_config.get('retry_attempts', 3)
+
+        # Подписчики на изменение привилегии: callback(discord_user_id, steam_id, group, expires_at)
+        self._upsert_listeners: List[Callable] = []
+
+    def add_upsert_listener(self, callback: Callable):
+        """
+        Подписаться на сохранение изменённой привилегии.
+
+        Args:
+            callback: Функция (discord_user_id, steam_id, privilege_group, expires_at)
+        """
+        self._upsert_listeners.append(callback)
+
+    def _notify_upsert(self, discord_user_id: int, steam_id: int, privilege_group: Optional[str],
+                       expires_at: Optional[datetime]):
+        """
+        Оповестить подписчиков об изменении привилегии.
+        """
+        for callback in self._upsert_listeners:
+            try:
+                callback(discord_user_id, steam_id, privilege_group, expires_at)
+            except Exception as e:
+                logger.error(f"Ошибка в обработчике изменения привилегии: {e}", exc_info=True)
+
+    def audit(self, event_type: str, **fields):
+        """
+        Записать событие в журнал действий, если он включён.
+
+        Args:
+            event_type: Тип события (AUDIT_*)
+            **fields: Поля события (см. AuditLogger.record)
+        """
+        if self.audit_logger is not None:
+            self.audit_logger.record(event_type, **fields)
+
+    def get_discord_role_by_privilege(self, guild: discord.Guild, privilege_group: str) -> Optional[discord.Role]:
+        """
+        Получить Discord роль по названию группы привилегии.
+
+        Args:
+            guild: Discord сервер
+            privilege_group: Название группы привилегии
+
+        Returns:
+            discord.Role или None
+        """
+        # Ищем роль в конфигурации admin_roles сервера по названию
+        for role_config in get_guild_config(guild.id)['admin_roles']:
+            role_name = role_config['name'].lower()
+            # Простое сопоставление (можно улучшить)
+            if privilege_group.lower() in role_name or role_name in privilege_group.lower():
+                role_id = role_config['role_id']
+                return guild.get_role(role_id)
+
+        return None
+
+    async def fetch_privilege(self, steam_id: int, priority: int = RCON_PRIORITY_INTERACTIVE) -> Dict[str, Any]:
+        """
+        Получить привилегию игрока через pinfo со всех RCON-серверов.
+
+        Серверы опрашиваются параллельно. Ответы объединяются: старшая группа,
+        самая поздняя дата окончания. Если часть серверов не ответила,
+        используется результат остальных, а их имена попадают в failed_servers.
+
+        Args:
+            steam_id: 64-bit SteamID игрока
+            priority: Класс приоритета RCON-команд (RCON_PRIORITY_*)
+
+        Returns:
+            Dict с ключами status, group, expires_at, failed_servers
+        """
+        responses = await self.rcon_cluster.get_player_info(
+            steam_id, self.rcon_timeout, self.rcon_retry_attempts, priority
+        )
+
+        parsed: Dict[str, Dict[str, Any]] = {}
+        failed_servers = []
+        for server_name, pinfo_response in responses.items():
+            if pinfo_response is None:
+                logger.error(f"RCON ошибка при выполнении pinfo для SteamID {steam_id} на сервере {server_name}")
+                failed_servers.append(server_name)
+                continue
+
+            parsed_info = parse_pinfo_response(pinfo_response, self.privilege_groups)
+            if parsed_info is None:
+                logger.error(f"Не удалось распарсить ответ pinfo сервера {server_name}: {pinfo_response}")
+                failed_servers.append(server_name)
+                continue
+
+            parsed[server_name] = parsed_info
+
+        if not parsed:
+            if all(response is None for response in responses.values()):
+                status = SYNC_RCON_ERROR
+            else:
+                status = SYNC_PARSE_ERROR
+            return {'status': status, 'group': None, 'expires_at': None, 'failed_servers': failed_servers}
+
+        if failed_servers:
+            logger.warning(
+                f"pinfo для SteamID {steam_id}: нет ответа от серверов {', '.join(failed_servers)}, "
+                f"используются ответы {', '.join(parsed)}"
+            )
+
+        views = {(info['group'], info['expires_at']) for info in parsed.values()}
+        if len(views) > 1:
+            details = ', '.join(
+                f"{name}={info['group'] or 'нет'}/{info['expires_at'] or 'бессрочно'}"
+                for name, info in parsed.items()
+            )
+            logger.warning(f"Серверы расходятся по привилегии SteamID {steam_id}: {details}")
+
+        merged = merge_pinfo_results(list(parsed.values()), self.privilege_groups)
+
+        if not merged['has_privilege']:
+            return {'status': SYNC_NO_PRIVILEGE, 'group': None, 'expires_at': None,
+                    'failed_servers': failed_servers}
+
+        return {
+            'status': SYNC_UPDATED,
+            'group': merged['group'],
+            'expires_at': merged['expires_at'],
+            'failed_servers': failed_servers
+        }
+
+    def find_privilege(self, steam_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Найти сохранённую привилегию по SteamID (в памяти или в БД).
+
+        Args:
+            steam_id: 64-bit SteamID игрока
+
+        Returns:
+            Dict с ключами discord_user_id, privilege_group, expires_at или None,
+            если SteamID не привязан к пользователю Discord
+        """
+        if self.privilege_store is not None:
+            record = self.privilege_store.get(steam_id)
+            if record is None:
+                return None
+            return {
+                'discord_user_id': record.discord_user_id,
+                'privilege_group': record.privilege_group,
+                'expires_at': record.expires_at,
+            }
+
+        db = get_db_session()
+        try:
+            row = (
+                db.query(UserPrivilege.discord_user_id, UserPrivilege.privilege_group, UserPrivilege.expires_at)
+                .filter(UserPrivilege.steam_id == steam_id)
+                .first()
+            )
+        finally:
+            db.close()
+
+        if row is None:
+            return None
+        return {'discord_user_id': row[0], 'privilege_group': row[1], 'expires_at': row[2]}
+
+    def get_active_groups(self, discord_user_id: int, now: datetime) -> Set[str]:
+        """
+        Получить действующие группы пользователя по всем его SteamID.
+
+        Args:
+            discord_user_id: ID пользователя Discord
+            now: Текущее время UTC
+
+        Returns:
+            Множество групп
+        """
+        if self.privilege_store is not None:
+            return self.privilege_store.active_groups(discord_user_id, now)
+
+        db = get_db_session()
+        try:
+            rows = (
+                db.query(UserPrivilege.privilege_group)
+                .filter(
+                    UserPrivilege.discord_user_id == discord_user_id,
+                    (UserPrivilege.expires_at.is_(None)) | (UserPrivilege.expires_at > now)
+                )
+                .all()
+            )
+        finally:
+            db.close()
+
+        return {privilege_group for privilege_group, in rows if privilege_group}
+
+    def save_privilege(self, discord_user_id: int, steam_id: int, privilege_group: str,
+                       expires_at: Optional[datetime]) -> bool:
+        """
+        Сохранить привилегию в хранилище в памяти или напрямую в БД.
+
+        Args:
+            discord_user_id: ID пользователя Discord
+            steam_id: 64-bit SteamID игрока
+            privilege_group: Группа привилегии
+            expires_at: Время окончания (UTC) или None
+
+        Returns:
+            True если данные изменились, False иначе
+
+        Raises:
+            Exception: При ошибке БД (транзакция откатывается)
+        """
+        if self.privilege_store is not None:
+            # Запись в память, в БД изменение попадёт фоновой записью
+            data_changed = self.privilege_store.put(discord_user_id, steam_id, privilege_group, expires_at)
+            if data_changed:
+                logger.info(f"ACTION: Сохранена привилегия для {steam_id}")
+                self._notify_upsert(discord_user_id, steam_id, privilege_group, expires_at)
+            return data_changed
+
+        db = get_db_session()
+        try:
+            # Вставка, обновление и проверка изменений — один запрос
+            data_changed = upsert_privilege(db, discord_user_id, steam_id, privilege_group, expires_at)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if data_changed:
+            logger.info(f"ACTION: Сохранена привилегия для {steam_id}")
+            self._notify_upsert(discord_user_id, steam_id, privilege_group, expires_at)
+        else:
+            logger.info(f"ACTION: Данные не изменились для {steam_id}, обновление не требуется")
+
+        return data_changed
+
+    def save_privileges(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Сохранить пачку привилегий в одной транзакции.
+
+        Существующие записи читаются пачками через IN, изменённые и новые
+        записываются одним многострочным upsert на пачку.
+
+        Args:
+            rows: Список dict с ключами discord_user_id, steam_id, privilege_group, expires_at
+
+        Returns:
+            Список изменённых (вставленных или обновлённых) строк
+
+        Raises:
+            Exception: При ошибке БД (транзакция откатывается целиком)
+        """
+        if self.privilege_store is not None:
+            changed = [
+                row for row in rows
+                if self.privilege_store.put(row['discord_user_id'], row['steam_id'], row['privilege_group'],
+                                            row['expires_at'])
+            ]
+        else:
+            db = get_db_session()
+            try:
+                changed = upsert_privileges(db, rows, BATCH_SIZE)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+
+        logger.info(f"ACTION: Пакетно сохранено привилегий: {len(changed)} из {len(rows)}")
+        for row in changed:
+            self._notify_upsert(row['discord_user_id'], row['steam_id'], row['privilege_group'], row['expires_at'])
+
+        return changed
+
+    async def apply_roles(self, guild: discord.Guild, member: discord.Member, privilege_group: str,
+                          priority: int = PRIORITY_ROLES) -> bool:
+        """
+        Выдать участнику роль, соответствующую группе, и снять прочие роли администрации.
+
+        Args:
+            guild: Discord сервер
+            member: Участник Discord
+            privilege_group: Группа привилегии
+            priority: Приоритет запросов к Discord (PRIORITY_INTERACTIVE — команда ждёт результата)
+
+        Returns:
+            True если роли синхронизированы, False иначе
+        """
+        discord_role = self.get_discord_role_by_privilege(guild, privilege_group)
+        if discord_role is None:
+            return False
+
+        try:
+            # Удаляем старые роли администрации
+            for role_config in get_guild_config(guild.id)['admin_roles']:
+                old_role = guild.get_role(role_config['role_id'])
+                if old_role and old_role != discord_role and old_role in member.roles:
+                    await self.rest_scheduler.run(
+                        priority, roles_bucket(guild.id), member.remove_roles, old_role, reason="Обновление привилегии"
+                    )
+                    self.audit(AUDIT_ROLE_REMOVE, target_id=member.id, guild_id=guild.id,
+                               details=f"{old_role.name}: обновление привилегии")
+
+            # Выдаём новую роль
+            if discord_role not in member.roles:
+                await self.rest_scheduler.run(
+                    priority, roles_bucket(guild.id), member.add_roles, discord_role, reason="Выдача привилегии"
+                )
+                self.audit(AUDIT_ROLE_GRANT, target_id=member.id, guild_id=guild.id,
+                           privilege_group=privilege_group, details=discord_role.name)
+            return True
+        except discord.Forbidden:
+            logger.error(f"Бот не имеет прав для выдачи ролей")
+        except Exception as e:
+            logger.error(f"Ошибка при выдаче роли: {e}")
+
+        return False
+
+    async def revoke_roles(self, guild: discord.Guild, member: discord.Member, privilege_group: str,
+                           keep_groups: Iterable[str] = ()) -> bool:
+        """
+        Снять с участника роль, соответствующую группе привилегии.
+
+        Args:
+            guild: Discord сервер
+            member: Участник Discord
+            privilege_group: Группа истёкшей привилегии
+            keep_groups: Группы, которые остаются активными (их роли не снимаются)
+
+        Returns:
+            True если роль была снята, False иначе
+        """
+        discord_role = self.get_discord_role_by_privilege(guild, privilege_group)
+        if discord_role is None or discord_role not in member.roles:
+            return False
+
+        for group in keep_groups:
+            if group and self.get_discord_role_by_privilege(guild, group) == discord_role:
+                return False
+
+        try:
+            await self.rest_scheduler.run(
+                PRIORITY_ROLES, roles_bucket(guild.id), member.remove_roles, discord_role, reason="Срок привилегии истёк"
+            )
+            self.audit(AUDIT_ROLE_REMOVE, target_id=member.id, guild_id=guild.id,
+                       privilege_group=privilege_group, details=f"{discord_role.name}: срок привилегии истёк")
+            return True
+        except discord.Forbidden:
+            logger.error(f"Бот не имеет прав для снятия ролей")
+        except Exception as e:
+            logger.error(f"Ошибка при снятии роли: {e}")
+
+        return False
+
+    async def sync_bulk(self, guild: discord.Guild, entries: List[Tuple[discord.Member, int]],
+                        concurrency: int = 5, role_interval: float = 0.5,
+                        actor_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Синхронизировать пачку привилегий.
+
+        pinfo выполняется параллельно (не больше concurrency одновременно),
+        запись в БД — одной транзакцией, роли выдаются последовательно с паузой
+        role_interval, Embed /staff обновляется один раз в конце.
+
+        Args:
+            guild: Discord сервер
+            entries: Список пар (участник, 64-bit SteamID)
+            concurrency: Максимум одновременных RCON-запросов
+            role_interval: Пауза между изменениями ролей в секундах
+            actor_id: ID пользователя Discord, запустившего импорт (для журнала действий)
+
+        Returns:
+            Список результатов (по порядку entries) с ключами status, group, expires_at, member, steam_id
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def lookup(member: discord.Member, steam_id: int) -> Dict[str, Any]:
+            async with semaphore:
+                result = await self.fetch_privilege(steam_id, RCON_PRIORITY_BULK)
+            result['member'] = member
+            result['steam_id'] = steam_id
+            return result
+
+        results = await asyncio.gather(*(lookup(member, steam_id) for member, steam_id in entries))
+
+        found = [result for result in results if result['status'] == SYNC_UPDATED]
+        rows = [
+            {
+                'discord_user_id': result['member'].id,
+                'steam_id': result['steam_id'],
+                'privilege_group': result['group'],
+                'expires_at': result['expires_at'],
+            }
+            for result in found
+        ]
+
+        try:
+            changed = self.save_privileges(rows) if rows else []
+        except Exception as e:
+            logger.error(f"Ошибка при пакетном сохранении привилегий: {e}", exc_info=True)
+            for result in found:
+                result['status'] = SYNC_DB_ERROR
+            return results
+
+        changed_steam_ids = {row['steam_id'] for row in changed}
+        for result in found:
+            if result['steam_id'] not in changed_steam_ids:
+                result['status'] = SYNC_UNCHANGED
+                continue
+
+            self.audit(AUDIT_PRIVILEGE_SYNC, actor_id=actor_id, target_id=result['member'].id, guild_id=guild.id,
+                       steam_id=result['steam_id'], privilege_group=result['group'],
+                       expires_at=result['expires_at'], details="массовый импорт")
+
+            await self.apply_roles(guild, result['member'], result['group'])
+            if role_interval:
+                # Не упираемся в лимиты Discord на изменение ролей
+                await asyncio.sleep(role_interval)
+
+        if changed:
+            await self.staff_embed_service.update_staff_message(guild)
+
+        return results
+
+    async def sync_privilege(self, guild: discord.Guild, member: discord.Member, steam_id: int,
+                             refresh_embed: bool = True, actor_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Синхронизировать привилегию игрока: pinfo → БД → роли → Embed.
+
+        Args:
+            guild: Discord сервер
+            member: Участник Discord, которому принадлежит SteamID
+            steam_id: 64-bit SteamID игрока
+            refresh_embed: Запросить ли отложенное обновление Embed /staff после изменения
+            actor_id: ID пользователя Discord, выполнившего команду (для журнала действий)
+
+        Returns:
+            Dict с ключами status, group, expires_at
+        """
+        result = await self.fetch_privilege(steam_id)
+        if result['status'] != SYNC_UPDATED:
+            return result
+
+        try:
+            data_changed = self.save_privilege(member.id, steam_id, result['group'], result['expires_at'])
+        except Exception as e:
+            logger.error(f"Ошибка при работе с БД: {e}", exc_info=True)
+            result['status'] = SYNC_DB_ERROR
+            return result
+
+        if not data_changed:
+            result['status'] = SYNC_UNCHANGED
+            return result
+
+        self.audit(AUDIT_PRIVILEGE_SYNC, actor_id=actor_id, target_id=member.id, guild_id=guild.id,
+                   steam_id=steam_id, privilege_group=result['group'], expires_at=result['expires_at'])
+        # Команда ждёт выдачи роли, поэтому роль идёт раньше фоновых изменений
+        await self.apply_roles(guild, member, result['group'], PRIORITY_INTERACTIVE)
+
+        if refresh_embed:
+            # Ответ команде не ждёт редактирования доски: обновление откладывается и объединяется с соседними
+            self.staff_embed_service.request_refresh(guild)
+
+        return result
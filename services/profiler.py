@@ -0,0 +1,147 @@
+"""
+Сервис профилирования бота по запросу (cProfile / tracemalloc).
+
+Профилировщик включается только на время окна измерения и полностью
+выключается после него, поэтому в обычном режиме накладных расходов нет.
+"""
+
+import io
+import asyncio
+import cProfile
+import logging
+import pstats
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+# Фреймы самого профилировщика не интересны в отчёте
+_TRACEMALLOC_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class ProfilerBusyError(RuntimeError):
+    """
+    Профилирование уже выполняется.
+    """
+
+
+class ProfilerService:
+    """
+    Сервис для ограниченного по времени профилирования процесса бота.
+    """
+
+    def __init__(self):
+        """
+        Инициализировать сервис.
+        """
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        """
+        Выполняется ли сейчас профилирование.
+        """
+        return self._lock.locked()
+
+    async def profile_cpu(self, duration: float, top_n: int, sort_by: str = 'cumulative') -> str:
+        """
+        Снять CPU-профиль event loop бота за указанное окно.
+
+        cProfile профилирует поток, в котором включён, т.е. поток event loop.
+        Код, выполняемый в пуле потоков (asyncio.to_thread), в отчёт не попадает.
+
+        Args:
+            duration: Длительность окна в секундах
+            top_n: Количество функций в отчёте
+            sort_by: Ключ сортировки pstats
+
+        Returns:
+            Текстовый отчёт pstats
+
+        Raises:
+            ProfilerBusyError: Если профилирование уже запущено
+        """
+        async with self._acquire():
+            profiler = cProfile.Profile()
+            logger.info(f"ACTION: Запущено CPU-профилирование на {duration} сек")
+            profiler.enable()
+            try:
+                await asyncio.sleep(duration)
+            finally:
+                profiler.disable()
+
+            stream = io.StringIO()
+            stats = pstats.Stats(profiler, stream=stream)
+            stats.strip_dirs().sort_stats(sort_by).print_stats(top_n)
+            return f"CPU-профиль за {duration} сек (сортировка: {sort_by})\n\n{stream.getvalue()}"
+
+    async def profile_memory(self, duration: float, top_n: int, frames: int = 1) -> str:
+        """
+        Собрать статистику выделений памяти за указанное окно.
+
+        В отчёт попадают места выделения памяти, которая была выделена за окно
+        и ещё не освобождена к его окончанию.
+
+        Args:
+            duration: Длительность окна в секундах
+            top_n: Количество мест выделения в отчёте
+            frames: Глубина трассировки стека
+
+        Returns:
+            Текстовый отчёт tracemalloc
+
+        Raises:
+            ProfilerBusyError: Если профилирование уже запущено
+        """
+        async with self._acquire():
+            # Если трассировка уже включена извне (PYTHONTRACEMALLOC), не выключаем её
+            started_here = not tracemalloc.is_tracing()
+            if started_here:
+                tracemalloc.start(frames)
+            logger.info(f"ACTION: Запущено профилирование памяти на {duration} сек")
+
+            try:
+                baseline = tracemalloc.take_snapshot()
+                await asyncio.sleep(duration)
+                snapshot = tracemalloc.take_snapshot()
+                traced_current, traced_peak = tracemalloc.get_traced_memory()
+            finally:
+                if started_here:
+                    tracemalloc.stop()
+
+            baseline = baseline.filter_traces(_TRACEMALLOC_IGNORED)
+            snapshot = snapshot.filter_traces(_TRACEMALLOC_IGNORED)
+            key_type = 'traceback' if frames > 1 else 'lineno'
+            diff = snapshot.compare_to(baseline, key_type)
+
+            lines = [
+                f"Профиль памяти за {duration} сек",
+                f"Отслеживается: {traced_current / 1024:.1f} KiB, пик: {traced_peak / 1024:.1f} KiB",
+                "",
+            ]
+            for index, stat in enumerate(diff[:top_n], start=1):
+                lines.append(
+                    f"#{index}: {stat.size_diff / 1024:+.1f} KiB "
+                    f"({stat.count_diff:+d} блоков), всего {stat.size / 1024:.1f} KiB"
+                )
+                lines.extend(f"    {line}" for line in stat.traceback.format())
+
+            return "\n".join(lines)
+
+    def _acquire(self) -> asyncio.Lock:
+        """
+        Получить блокировку профилировщика без ожидания.
+
+        Returns:
+            Блокировка для использования в async with
+
+        Raises:
+            ProfilerBusyError: Если профилирование уже запущено
+        """
+        if self._lock.locked():
+            raise ProfilerBusyError("Профилирование уже выполняется")
+        return self._lock
@@ -1,74 +1,501 @@
 """
 RCON клиент для выполнения команд на Rust-сервере.
+
+Команды каждого сервера могут проходить через RCONDispatcher: не больше
+rate команд в секунду и max_in_flight одновременно, чтобы массовые проверки
+не вызывали лагов на сервере. Команды администраторов идут раньше фоновых.
 """
 
 import os
+import json
+import time
+import heapq
+import random
+import asyncio
 import logging
-from typing import Optional, Dict
-from rcon import Client
-from dotenv import load_dotenv
-
-load_dotenv()
+import itertools
+from typing import Optional, Dict, List, Any, Callable, Awaitable
+import aiohttp
+from rcon.source import rcon as source_rcon
+from utils.ratelimit import TokenBucket
+from utils.queue_metrics import QueueMetrics
 
 logger = logging.getLogger(__name__)
 
+# Поддерживаемые протоколы: классический Source RCON и WebRCON (websocket, rcon.web 1)
+PROTOCOL_SOURCE = 'source'
+PROTOCOL_WEB = 'web'
+
+# Лёгкая команда без побочных эффектов для проверки серверов при запуске
+WARMUP_COMMAND = 'serverinfo'
+
+# Классы приоритета RCON-команд (меньше — важнее)
+RCON_PRIORITY_INTERACTIVE = 0
+RCON_PRIORITY_BULK = 1
+RCON_PRIORITY_BACKGROUND = 2
+
+RCON_PRIORITY_NAMES = {
+    RCON_PRIORITY_INTERACTIVE: 'interactive',
+    RCON_PRIORITY_BULK: 'bulk',
+    RCON_PRIORITY_BACKGROUND: 'background',
+}
+
+
+class RCONDispatcher:
+    """
+    Очередь команд одного RCON-сервера с ограничением частоты и параллельности.
+    """
+
+    def __init__(self, rate: float = 0, burst: Optional[float] = None, max_in_flight: int = 0):
+        """
+        Инициализировать очередь.
+
+        Args:
+            rate: Команд в секунду (0 — без ограничения)
+            burst: Допустимый всплеск команд (по умолчанию равен rate)
+            max_in_flight: Одновременно выполняемых команд (0 — без ограничения)
+        """
+        self.rate = rate
+        self.max_in_flight = max_in_flight
+        self._bucket = TokenBucket(rate, burst or max(rate, 1)) if rate else None
+
+        # Ожидающие: куча [priority, seq, future, enqueued_at]
+        self._waiting: List[list] = []
+        self._in_flight = 0
+        self._seq = itertools.count()
+        self._released = asyncio.Event()
+        self._pump: Optional[asyncio.Task] = None
+
+        self.metrics = QueueMetrics(RCON_PRIORITY_NAMES)
+
+    @property
+    def pending(self) -> int:
+        """
+        Количество команд в очереди.
+        """
+        return len(self._waiting)
+
+    def _has_slot(self) -> bool:
+        """
+        Проверить, можно ли начать ещё одну команду.
+        """
+        return not self.max_in_flight or self._in_flight < self.max_in_flight
+
+    async def run(self, priority: int, func: Callable[..., Awaitable[Optional[str]]], *args, **kwargs) -> Optional[str]:
+        """
+        Выполнить команду в порядке приоритета.
+
+        Args:
+            priority: Класс приоритета (RCON_PRIORITY_*)
+            func: Корутинная функция, выполняющая команду (None — ошибка)
+            *args, **kwargs: Аргументы func
+
+        Returns:
+            Результат func
+        """
+        await self._acquire(priority)
+        result = None
+        try:
+            result = await func(*args, **kwargs)
+        finally:
+            self._release(priority, result is not None)
+        return result
+
+    async def _acquire(self, priority: int):
+        """
+        Дождаться места и токена частоты.
+        """
+        if not self._waiting and self._has_slot() and (self._bucket is None or self._bucket.try_acquire()):
+            self._in_flight += 1
+            self.metrics.started(priority, 0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._seq), future, time.monotonic()]
+        heapq.heappush(self._waiting, entry)
+        self.metrics.queued(priority)
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._run_pump())
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Место уже выдано, но задача отменена до начала команды
+                self._release(priority, False)
+            elif entry in self._waiting:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self.metrics.queued(priority, -1)
+            raise
+
+    async def _run_pump(self):
+        """
+        Выдавать места ожидающим по приоритету, пока очередь не опустеет.
+        """
+        while self._waiting:
+            if not self._has_slot():
+                self._released.clear()
+                await self._released.wait()
+                continue
+
+            if self._bucket is not None:
+                await self._bucket.acquire()
+
+            # Ожидания, отменённые за время ожидания токена
+            while self._waiting and self._waiting[0][2].done():
+                self.metrics.queued(heapq.heappop(self._waiting)[0], -1)
+            if not self._waiting:
+                break
+
+            priority, _, future, enqueued_at = heapq.heappop(self._waiting)
+            self.metrics.queued(priority, -1)
+            self._in_flight += 1
+            self.metrics.started(priority, time.monotonic() - enqueued_at)
+            future.set_result(None)
+
+    def _release(self, priority: int, ok: bool):
+        """
+        Освободить место.
+        """
+        self._in_flight -= 1
+        self.metrics.finished(priority, ok)
+        self._released.set()
+
 
 class RCONClient:
     """
     Клиент для выполнения RCON команд.
     """
-    
-    def __init__(self):
+
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None,
+                 password: Optional[str] = None, protocol: Optional[str] = None,
+                 dispatcher: Optional[RCONDispatcher] = None):
         """
-        Инициализировать RCON клиент из переменных окружения.
+        Инициализировать RCON клиент.
+
+        Параметры, которые не переданы явно, берутся из переменных окружения
+        (RCON_HOST, RCON_PORT, RCON_PASSWORD, RCON_PROTOCOL).
+
+        Args:
+            host: Адрес сервера
+            port: Порт RCON
+            password: Пароль RCON
+            protocol: 'source' или 'web'
+            dispatcher: Очередь команд сервера (None — без ограничений)
         """
-        self.host = os.getenv('RCON_HOST', 'localhost')
-        self.port = int(os.getenv('RCON_PORT', 28016))
-        self.password = os.getenv('RCON_PASSWORD')
-        
+        self.host = host or os.getenv('RCON_HOST', 'localhost')
+        self.port = int(port or os.getenv('RCON_PORT', 28016))
+        self.password = password if password is not None else os.getenv('RCON_PASSWORD')
+        self.protocol = (protocol or os.getenv('RCON_PROTOCOL', PROTOCOL_SOURCE)).lower()
+        self.dispatcher = dispatcher
+
         if not self.password:
             logger.warning("RCON_PASSWORD не установлен в .env")
-    
-    def execute(self, command: str, timeout: int = 10) -> Optional[str]:
+
+        if self.protocol not in (PROTOCOL_SOURCE, PROTOCOL_WEB):
+            logger.warning(f"Неизвестный протокол RCON '{self.protocol}', используется {PROTOCOL_SOURCE}")
+            self.protocol = PROTOCOL_SOURCE
+
+    async def execute(self, command: str, timeout: int = 10,
+                      priority: int = RCON_PRIORITY_INTERACTIVE) -> Optional[str]:
         """
-        Выполнить RCON команду.
-        
+        Выполнить RCON команду (через очередь сервера, если она задана).
+
         Args:
             command: Команда для выполнения
-            timeout: Таймаут в секундах
-            
+            timeout: Таймаут в секундах (на саму команду, включая подключение, без ожидания в очереди)
+            priority: Класс приоритета (RCON_PRIORITY_*)
+
+        Returns:
+            Ответ сервера или None при ошибке
+        """
+        if self.dispatcher is None:
+            return await self._execute(command, timeout)
+        return await self.dispatcher.run(priority, self._execute, command, timeout)
+
+    async def _execute(self, command: str, timeout: int) -> Optional[str]:
+        """
+        Выполнить RCON команду без очереди.
+
+        Args:
+            command: Команда для выполнения
+            timeout: Таймаут в секундах (на всю команду, включая подключение)
+
         Returns:
             Ответ сервера или None при ошибке
         """
         try:
-            with Client(self.host, self.port, passwd=self.password, timeout=timeout) as client:
-                response = client.run(command)
-                return response
+            if self.protocol == PROTOCOL_WEB:
+                return await asyncio.wait_for(self._execute_web(command), timeout=timeout)
+            return await asyncio.wait_for(
+                source_rcon(command, host=self.host, port=self.port, passwd=self.password or '', timeout=timeout),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"Таймаут RCON при выполнении команды '{command}'")
+            return None
         except Exception as e:
             logger.error(f"Ошибка RCON при выполнении команды '{command}': {e}")
             return None
-    
-    def get_player_info(self, steam_id: str, timeout: int = 10, retry_attempts: int = 3) -> Optional[str]:
+
+    async def _execute_web(self, command: str) -> Optional[str]:
+        """
+        Выполнить команду через WebRCON.
+
+        Args:
+            command: Команда для выполнения
+
+        Returns:
+            Ответ сервера
+        """
+        identifier = random.randint(1, 2 ** 31 - 1)
+        url = f"ws://{self.host}:{self.port}/{self.password or ''}"
+
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(url) as ws:
+                await ws.send_str(json.dumps({
+                    'Identifier': identifier,
+                    'Message': command,
+                    'Name': 'WebRcon'
+                }))
+
+                # Сервер шлёт в тот же сокет и посторонние сообщения (чат, логи),
+                # поэтому ждём ответ с нашим идентификатором
+                async for message in ws:
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    data = json.loads(message.data)
+                    if data.get('Identifier') == identifier:
+                        return data.get('Message', '')
+
+        raise ConnectionError("WebRCON соединение закрыто до получения ответа")
+
+    async def get_player_info(self, steam_id: int, timeout: int = 10, retry_attempts: int = 3,
+                              priority: int = RCON_PRIORITY_INTERACTIVE) -> Optional[str]:
         """
         Получить информацию об игроке через pinfo.
-        
+
         Args:
-            steam_id: SteamID игрока
+            steam_id: 64-bit SteamID игрока
             timeout: Таймаут в секундах
             retry_attempts: Количество попыток при ошибке
-            
+            priority: Класс приоритета (RCON_PRIORITY_*)
+
         Returns:
             Ответ команды pinfo или None при ошибке
         """
         command = f"pinfo {steam_id}"
-        
+
         for attempt in range(retry_attempts):
-            response = self.execute(command, timeout)
+            response = await self.execute(command, timeout, priority)
             if response is not None:
                 return response
-            
+
             if attempt < retry_attempts - 1:
                 logger.warning(f"Попытка {attempt + 1}/{retry_attempts} не удалась, повтор...")
-        
+
         return None
 
+
+class RCONCluster:
+    """
+    Группа именованных RCON-серверов, команды выполняются на всех параллельно.
+    """
+
+    def __init__(self, clients: Dict[str, RCONClient], timeouts: Optional[Dict[str, int]] = None,
+                 metrics_interval: float = 0):
+        """
+        Инициализировать группу серверов.
+
+        Args:
+            clients: RCON клиенты по имени сервера
+            timeouts: Таймауты по имени сервера (переопределяют общий таймаут)
+            metrics_interval: Период отчёта метрик очередей в лог, секунд (0 — без отчёта)
+        """
+        self.clients = clients
+        self.timeouts = timeouts or {}
+        self.metrics_interval = metrics_interval
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls, rcon_config: Dict[str, Any]) -> 'RCONCluster':
+        """
+        Создать группу серверов из секции rcon конфигурации.
+
+        Если список servers не задан, используется один сервер из переменных окружения.
+        Пароли не хранятся в config.yml: для каждого сервера указывается
+        имя переменной окружения (password_env). Лимиты очереди (rate, burst,
+        max_in_flight) задаются в секции rcon и переопределяются для сервера.
+
+        Args:
+            rcon_config: Секция rcon из config.yml
+
+        Returns:
+            RCONCluster
+        """
+        metrics_interval = rcon_config.get('metrics_interval', 300)
+        servers: List[Dict[str, Any]] = rcon_config.get('servers') or []
+        if not servers:
+            return cls({'main': RCONClient(dispatcher=cls._build_dispatcher(rcon_config))},
+                       metrics_interval=metrics_interval)
+
+        clients = {}
+        timeouts = {}
+        for server in servers:
+            name = server['name']
+            password_env = server.get('password_env')
+            clients[name] = RCONClient(
+                host=server.get('host'),
+                port=server.get('port'),
+                password=os.getenv(password_env) if password_env else server.get('password'),
+                protocol=server.get('protocol'),
+                dispatcher=cls._build_dispatcher({**rcon_config, **server})
+            )
+            if 'timeout' in server:
+                timeouts[name] = server['timeout']
+
+        logger.info(f"Настроено RCON-серверов: {len(clients)} ({', '.join(clients)})")
+        return cls(clients, timeouts, metrics_interval)
+
+    @staticmethod
+    def _build_dispatcher(settings: Dict[str, Any]) -> RCONDispatcher:
+        """
+        Создать очередь команд сервера.
+
+        Args:
+            settings: Настройки rcon с переопределениями сервера
+
+        Returns:
+            RCONDispatcher
+        """
+        return RCONDispatcher(
+            rate=settings.get('rate', 10),
+            burst=settings.get('burst'),
+            max_in_flight=settings.get('max_in_flight', 4)
+        )
+
+    @property
+    def names(self) -> List[str]:
+        """
+        Имена серверов.
+        """
+        return list(self.clients)
+
+    async def execute(self, command: str, timeout: int = 10,
+                      priority: int = RCON_PRIORITY_INTERACTIVE) -> Dict[str, Optional[str]]:
+        """
+        Выполнить команду на всех серверах параллельно.
+
+        Args:
+            command: Команда для выполнения
+            timeout: Таймаут по умолчанию в секундах
+            priority: Класс приоритета (RCON_PRIORITY_*)
+
+        Returns:
+            Dict {имя сервера: ответ или None при ошибке/таймауте}
+        """
+        names = list(self.clients)
+        responses = await asyncio.gather(*(
+            self.clients[name].execute(command, self.timeouts.get(name, timeout), priority) for name in names
+        ))
+        return dict(zip(names, responses))
+
+    async def get_player_info(self, steam_id: int, timeout: int = 10, retry_attempts: int = 3,
+                              priority: int = RCON_PRIORITY_INTERACTIVE) -> Dict[str, Optional[str]]:
+        """
+        Получить pinfo со всех серверов параллельно.
+
+        Общее время равно времени самого медленного сервера, а не сумме.
+
+        Args:
+            steam_id: 64-bit SteamID игрока
+            timeout: Таймаут по умолчанию в секундах
+            retry_attempts: Количество попыток на каждом сервере
+            priority: Класс приоритета (RCON_PRIORITY_*)
+
+        Returns:
+            Dict {имя сервера: ответ pinfo или None при ошибке}
+        """
+        names = list(self.clients)
+        responses = await asyncio.gather(*(
+            self.clients[name].get_player_info(
+                steam_id, self.timeouts.get(name, timeout), retry_attempts, priority
+            )
+            for name in names
+        ))
+        return dict(zip(names, responses))
+
+    async def warm_up(self, timeout: int = 5) -> Dict[str, bool]:
+        """
+        Проверить доступность всех серверов одной лёгкой командой.
+
+        Выполняется при запуске параллельно со входом в Discord: первое
+        подключение (DNS, TCP, авторизация) проходит до первой команды, а
+        недоступные серверы видны в логе сразу.
+
+        Args:
+            timeout: Таймаут по умолчанию в секундах
+
+        Returns:
+            Dict {имя сервера: True если сервер ответил}
+        """
+        responses = await self.execute(WARMUP_COMMAND, timeout, RCON_PRIORITY_BACKGROUND)
+        available = {name: response is not None for name, response in responses.items()}
+
+        unavailable = [name for name, ok in available.items() if not ok]
+        if unavailable:
+            logger.warning(f"RCON-серверы не ответили при запуске: {', '.join(unavailable)}")
+        else:
+            logger.info(f"RCON-серверы доступны: {', '.join(available)}")
+        return available
+
+    def metrics(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Метрики очередей по серверам.
+
+        Returns:
+            Dict {имя сервера: {класс: queued, in_flight, completed, failed,
+            wait_avg_ms, wait_max_ms}}
+        """
+        return {
+            name: client.dispatcher.metrics.snapshot()
+            for name, client in self.clients.items()
+            if client.dispatcher is not None
+        }
+
+    def log_metrics(self):
+        """
+        Записать в лог метрики очередей за окно с прошлого отчёта (если были команды).
+        """
+        for name, client in self.clients.items():
+            if client.dispatcher is None:
+                continue
+            report = client.dispatcher.metrics.window_report()
+            if report:
+                logger.info(f"RCON-команды {name}: {report}")
+
+    def start(self):
+        """
+        Запустить периодический отчёт метрик в лог.
+        """
+        if self.metrics_interval and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Остановить отчёт метрик.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.log_metrics()
+
+    async def _run(self):
+        """
+        Основной цикл: отчёт раз в metrics_interval секунд.
+        """
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            self.log_metrics()
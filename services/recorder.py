@@ -0,0 +1,227 @@
+"""
+Запись событий gateway для воспроизведения в бенчмарках (benchmarks/replay.py).
+
+Записываются события, которые обрабатывает бот: изменение участника,
+выход участника, изменение статуса и изменение роли. Файл — JSON по строке
+на событие. ID и имена заменяются HMAC-хэшами со случайным ключом, который
+не сохраняется: из записи нельзя восстановить ни ID, ни имена, но одинаковые
+ID внутри записи остаются одинаковыми. При первом событии сервера
+записывается его состав: роли, число участников и администрация.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+import discord
+from config.config_loader import get_config, get_guild_config
+
+logger = logging.getLogger(__name__)
+
+# Версия формата записи
+RECORDING_VERSION = 1
+
+# Типы событий в записи
+EVENT_START = 'start'
+EVENT_GUILD = 'guild'
+EVENT_MEMBER_UPDATE = 'mu'
+EVENT_MEMBER_REMOVE = 'mr'
+EVENT_PRESENCE_UPDATE = 'pu'
+EVENT_ROLE_UPDATE = 'ru'
+
+
+class GatewayRecorder:
+    """
+    Обезличенная запись событий gateway в файл.
+    """
+
+    def __init__(self):
+        """
+        Инициализировать запись.
+        """
+        recorder_config = get_config().get('recorder', {})
+        self.path = recorder_config.get('path', 'gateway-{started}.jsonl')
+        self.flush_interval = recorder_config.get('flush_interval', 5.0)
+        # Предел размера записи: после него события не записываются
+        self.max_events = recorder_config.get('max_events', 1000000)
+
+        # Ключ обезличивания живёт только в памяти процесса
+        self._key = os.urandom(32)
+        self._buffer: List[str] = []
+        self._guilds: Set[int] = set()
+        self._file = None
+        self._started: Optional[float] = None
+        self._stop_event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.events = 0
+
+    def _id(self, value: int) -> int:
+        """
+        Обезличить ID (56 бит, чтобы число оставалось точным в JSON).
+        """
+        digest = hmac.new(self._key, str(value).encode('ascii'), hashlib.sha256).digest()
+        return int.from_bytes(digest[:7], 'big')
+
+    def _name(self, value: Optional[str]) -> str:
+        """
+        Обезличить имя.
+        """
+        return hmac.new(self._key, (value or '').encode('utf-8'), hashlib.sha256).hexdigest()[:10]
+
+    def _roles(self, roles) -> List[int]:
+        """
+        Обезличить список ролей.
+        """
+        return [self._id(role.id) for role in roles]
+
+    def _write(self, event: Dict[str, Any]):
+        """
+        Добавить событие в буфер.
+        """
+        self._buffer.append(json.dumps(event, separators=(',', ':')))
+
+    def _record(self, event_type: str, guild: discord.Guild, **fields) -> bool:
+        """
+        Записать событие сервера (с составом сервера при первом событии).
+
+        Returns:
+            True если событие записано
+        """
+        if self._file is None or self.events >= self.max_events:
+            return False
+
+        ts = round(time.monotonic() - self._started, 4)
+        if guild.id not in self._guilds:
+            self._guilds.add(guild.id)
+            self._write_guild(guild, ts)
+
+        self._write({'t': event_type, 'ts': ts, 'g': self._id(guild.id), **fields})
+        self.events += 1
+        if self.events == self.max_events:
+            logger.warning(f"Запись событий gateway достигла предела {self.max_events}, запись остановлена")
+        return True
+
+    def _write_guild(self, guild: discord.Guild, ts: float):
+        """
+        Записать состав сервера: роли (с приоритетом роли администрации), число участников и администрацию.
+        """
+        priorities = {role['role_id']: role['priority'] for role in get_guild_config(guild.id)['admin_roles']}
+
+        staff = {}
+        for role_id in priorities:
+            role = guild.get_role(role_id)
+            if role is None:
+                continue
+            for member in role.members:
+                staff[member.id] = member
+
+        self._write({
+            't': EVENT_GUILD,
+            'ts': ts,
+            'g': self._id(guild.id),
+            'n': guild.member_count,
+            'roles': [
+                [self._id(role.id), self._name(role.name), role.position, priorities.get(role.id, 0)]
+                for role in guild.roles
+            ],
+            'staff': [
+                [self._id(member.id), self._name(member.display_name), self._roles(member.roles), str(member.status)]
+                for member in staff.values()
+            ],
+        })
+
+    def member_update(self, before: discord.Member, after: discord.Member):
+        """
+        Записать изменение участника (роли и ник).
+        """
+        event = {'m': self._id(after.id), 'b': self._roles(before.roles), 'a': self._roles(after.roles),
+                 'an': self._name(after.display_name)}
+        if before.display_name != after.display_name:
+            event['bn'] = self._name(before.display_name)
+        self._record(EVENT_MEMBER_UPDATE, after.guild, **event)
+
+    def member_remove(self, member: discord.Member):
+        """
+        Записать выход участника.
+        """
+        self._record(EVENT_MEMBER_REMOVE, member.guild, m=self._id(member.id), r=self._roles(member.roles),
+                     n=self._name(member.display_name))
+
+    def presence_update(self, before: discord.Member, after: discord.Member):
+        """
+        Записать изменение статуса участника.
+        """
+        self._record(EVENT_PRESENCE_UPDATE, after.guild, m=self._id(after.id), b=str(before.status),
+                     a=str(after.status), n=self._name(after.display_name), r=self._roles(after.roles))
+
+    def role_update(self, before: discord.Role, after: discord.Role):
+        """
+        Записать изменение роли.
+        """
+        self._record(EVENT_ROLE_UPDATE, after.guild, r=self._id(after.id),
+                     b=[self._name(before.name), before.position], a=[self._name(after.name), after.position])
+
+    def start(self):
+        """
+        Открыть файл записи и запустить периодический сброс буфера.
+        """
+        if self._task is not None and not self._task.done():
+            return
+
+        started = datetime.utcnow()
+        path = self.path.format(started=started.strftime('%Y%m%d-%H%M%S'))
+        self._file = open(path, 'w', encoding='utf-8')
+        self._started = time.monotonic()
+        self._guilds.clear()
+        self.events = 0
+        self._write({'t': EVENT_START, 'v': RECORDING_VERSION, 'at': started.isoformat()})
+
+        self._stop_event.clear()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Запись событий gateway в {path}")
+
+    async def stop(self):
+        """
+        Остановить запись и закрыть файл.
+        """
+        if self._task is not None:
+            self._stop_event.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+            logger.info(f"Запись событий gateway завершена: событий {self.events}")
+
+    def flush(self):
+        """
+        Записать буфер в файл.
+        """
+        if not self._buffer or self._file is None:
+            return
+        lines = self._buffer
+        self._buffer = []
+        self._file.write('\n'.join(lines) + '\n')
+        self._file.flush()
+
+    async def _run(self):
+        """
+        Основной цикл: сброс буфера раз в flush_interval секунд.
+        """
+        while not self._stop_event.is_set():
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Ошибка при записи событий gateway: {e}", exc_info=True)
@@ -0,0 +1,203 @@
+"""
+Напоминания об окончании привилегий (например, за 3 дня и за 1 день).
+
+Раз в interval секунд для каждого окна выполняется один диапазонный запрос
+по индексу expires_at. Отправленные напоминания отмечаются в
+UserPrivilege.reminded_hours, поэтому после перезапуска они не повторяются.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import discord
+from sqlalchemy import update
+from config.config_loader import get_config
+from database.connection import get_db_session
+from database.models import UserPrivilege
+from services.notifications import NotificationDispatcher
+from utils.timezone import format_datetime_utc3
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderScheduler:
+    """
+    Отправляет напоминания о скором окончании привилегий.
+    """
+
+    def __init__(self, bot: discord.Client, notification_dispatcher: NotificationDispatcher):
+        """
+        Инициализировать планировщик напоминаний.
+
+        Args:
+            bot: Экземпляр Discord бота
+            notification_dispatcher: Очередь уведомлений
+        """
+        self.bot = bot
+        self.notification_dispatcher = notification_dispatcher
+
+        reminders_config = get_config().get('reminders', {})
+        # Окна от меньшего к большему: привилегия, попавшая сразу в несколько окон,
+        # получает одно напоминание по ближайшему
+        self.lead_hours: List[int] = sorted({int(hours) for hours in reminders_config.get('lead_hours', [72, 24])})
+        self.interval = reminders_config.get('interval', 300)
+        self.batch_size = reminders_config.get('batch_size', 500)
+
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """
+        Запустить фоновую задачу.
+        """
+        if not self.lead_hours:
+            logger.info("Напоминания об окончании привилегий отключены (reminders.lead_hours пуст)")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Остановить фоновую задачу.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        """
+        Основной цикл: проверять окна раз в interval секунд.
+        """
+        while True:
+            try:
+                sent = self.process(datetime.utcnow())
+                if sent:
+                    logger.info(f"ACTION: Поставлено в очередь напоминаний об окончании привилегий: {sent}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка при отправке напоминаний: {e}", exc_info=True)
+
+            await asyncio.sleep(self.interval)
+
+    def collect_due(self, now: datetime) -> List[Tuple[int, List[Tuple[int, int, Optional[str], datetime]]]]:
+        """
+        Найти напоминания, которые пора отправить.
+
+        Для каждого окна один запрос: expires_at в (now, now + окно] и напоминание
+        по этому или меньшему окну ещё не отправлено. Привилегия, попавшая сразу
+        в несколько окон, остаётся только в ближайшем. Отметку ставит mark_sent
+        после постановки уведомления в очередь.
+
+        Args:
+            now: Текущее время UTC
+
+        Returns:
+            Список (окно в часах, [(id, discord_user_id, privilege_group, expires_at)])
+        """
+        due = []
+        seen = set()
+        db = get_db_session()
+        try:
+            for hours in self.lead_hours:
+                rows = (
+                    db.query(
+                        UserPrivilege.id,
+                        UserPrivilege.discord_user_id,
+                        UserPrivilege.privilege_group,
+                        UserPrivilege.expires_at
+                    )
+                    .filter(
+                        UserPrivilege.expires_at > now,
+                        UserPrivilege.expires_at <= now + timedelta(hours=hours),
+                        (UserPrivilege.reminded_hours.is_(None)) | (UserPrivilege.reminded_hours > hours)
+                    )
+                    .all()
+                )
+                rows = [tuple(row) for row in rows if row.id not in seen]
+                if not rows:
+                    continue
+                seen.update(row[0] for row in rows)
+                due.append((hours, rows))
+        finally:
+            db.close()
+
+        return due
+
+    def mark_sent(self, sent: Dict[int, List[int]]):
+        """
+        Отметить отправленные напоминания в БД пакетными UPDATE.
+
+        Args:
+            sent: Окно в часах -> ID записей UserPrivilege
+        """
+        db = get_db_session()
+        try:
+            for hours, ids in sent.items():
+                for start in range(0, len(ids), self.batch_size):
+                    db.execute(
+                        update(UserPrivilege)
+                        .where(UserPrivilege.id.in_(ids[start:start + self.batch_size]))
+                        .values(reminded_hours=hours)
+                    )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def process(self, now: datetime) -> int:
+        """
+        Поставить наступившие напоминания в очередь уведомлений и отметить их.
+
+        Отмечаются только напоминания, поставленные в очередь (и пользователи,
+        которых бот не видит): отброшенные из-за переполнения очереди
+        повторяются следующим проходом.
+
+        Args:
+            now: Текущее время UTC
+
+        Returns:
+            Количество поставленных в очередь напоминаний
+        """
+        sent = 0
+        marks: Dict[int, List[int]] = {}
+        # Несколько SteamID одного пользователя с одной группой — одно напоминание
+        delivered: Dict[Tuple[int, Optional[str]], bool] = {}
+        for hours, rows in self.collect_due(now):
+            for privilege_id, discord_user_id, privilege_group, expires_at in rows:
+                key = (discord_user_id, privilege_group)
+                if key not in delivered:
+                    user, guild = self._resolve_user(discord_user_id)
+                    if user is None:
+                        delivered[key] = True
+                    else:
+                        message = (
+                            f"⏳ Ваша привилегия **{privilege_group or 'без группы'}** истекает "
+                            f"{format_datetime_utc3(expires_at)} (UTC+3)."
+                        )
+                        delivered[key] = self.notification_dispatcher.notify(user, message, guild)
+                        if delivered[key]:
+                            sent += 1
+
+                if delivered[key]:
+                    marks.setdefault(hours, []).append(privilege_id)
+
+        if marks:
+            self.mark_sent(marks)
+        return sent
+
+    def _resolve_user(self, discord_user_id: int) -> Tuple[Optional[discord.abc.User], Optional[discord.Guild]]:
+        """
+        Найти пользователя: участника сервера (для запасного канала) или пользователя из кэша.
+        """
+        for guild in self.bot.guilds:
+            member = guild.get_member(discord_user_id)
+            if member is not None:
+                return member, guild
+        return self.bot.get_user(discord_user_id), None
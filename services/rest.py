@@ -0,0 +1,271 @@
+"""
+Планировщик REST-запросов к Discord с приоритетами.
+
+discord.py сам соблюдает лимиты Discord, но запросы одного bucket'а
+обслуживает в порядке поступления: фоновое обновление /staff или массовая
+выдача ролей задерживает ответ на команду. Планировщик стоит перед
+discord.py: в каждом bucket'е (канал, роли сервера, ЛС, взаимодействие)
+выполняется не больше bucket_concurrency запросов, всего фоновых — не больше
+max_concurrency, а очередь разбирается по приоритету: ответы на команды,
+затем роли, затем Embed /staff, затем уведомления.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from config.config_loader import get_config
+from utils.queue_metrics import QueueMetrics
+
+logger = logging.getLogger(__name__)
+
+# Классы приоритета (меньше — важнее)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_ROLES = 1
+PRIORITY_EMBED = 2
+PRIORITY_NOTIFICATION = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: 'interactive',
+    PRIORITY_ROLES: 'roles',
+    PRIORITY_EMBED: 'embed',
+    PRIORITY_NOTIFICATION: 'notification',
+}
+
+
+def channel_bucket(channel_id: int) -> str:
+    """
+    Bucket сообщений канала.
+    """
+    return f"channel:{channel_id}"
+
+
+def roles_bucket(guild_id: int) -> str:
+    """
+    Bucket изменения ролей участников сервера.
+    """
+    return f"roles:{guild_id}"
+
+
+def dm_bucket() -> str:
+    """
+    Bucket личных сообщений (открытие ЛС-канала и отправка).
+    """
+    return "dm"
+
+
+def interaction_bucket(interaction_id: int) -> str:
+    """
+    Bucket ответов на одно взаимодействие (webhook по токену взаимодействия).
+    """
+    return f"interaction:{interaction_id}"
+
+
+class RestScheduler:
+    """
+    Приоритетная очередь REST-запросов с ограничением по bucket'ам.
+    """
+
+    def __init__(self):
+        """
+        Инициализировать планировщик.
+        """
+        rest_config = get_config().get('rest', {})
+        # Одновременных фоновых запросов всего (ответы на команды не ограничиваются)
+        self.max_concurrency = rest_config.get('max_concurrency', 8)
+        # Одновременных запросов в одном bucket'е
+        self.bucket_concurrency = rest_config.get('bucket_concurrency', 1)
+        self.metrics_interval = rest_config.get('metrics_interval', 300)
+
+        # Ожидающие по bucket'ам: bucket -> куча [priority, seq, future, enqueued_at]
+        self._waiting: Dict[str, List[list]] = {}
+        self._bucket_active: Dict[str, int] = {}
+        self._active = 0
+        self._seq = itertools.count()
+
+        self._metrics = QueueMetrics(PRIORITY_NAMES)
+        self._task: Optional[asyncio.Task] = None
+
+    async def run(self, priority: int, bucket: str, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Выполнить запрос в порядке приоритета.
+
+        Args:
+            priority: Класс приоритета (PRIORITY_*)
+            bucket: Ключ bucket'а (channel_bucket, roles_bucket, ...)
+            func: Корутинная функция запроса discord.py
+            *args, **kwargs: Аргументы func
+
+        Returns:
+            Результат func (исключения func пробрасываются)
+        """
+        await self._acquire(priority, bucket)
+        ok = False
+        try:
+            result = await func(*args, **kwargs)
+            ok = True
+        finally:
+            self._release(priority, bucket, ok)
+        return result
+
+    def _can_start(self, priority: int, bucket: str) -> bool:
+        """
+        Проверить, есть ли свободное место для запроса.
+        """
+        if self._bucket_active.get(bucket, 0) >= self.bucket_concurrency:
+            return False
+        return priority == PRIORITY_INTERACTIVE or self._active < self.max_concurrency
+
+    def _start(self, priority: int, bucket: str, waited: float):
+        """
+        Занять место под запрос и учесть время ожидания.
+        """
+        self._bucket_active[bucket] = self._bucket_active.get(bucket, 0) + 1
+        if priority != PRIORITY_INTERACTIVE:
+            self._active += 1
+        self._metrics.started(priority, waited)
+
+    async def _acquire(self, priority: int, bucket: str):
+        """
+        Дождаться своей очереди.
+        """
+        if bucket not in self._waiting and self._can_start(priority, bucket):
+            self._start(priority, bucket, 0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._seq), future, time.monotonic()]
+        heapq.heappush(self._waiting.setdefault(bucket, []), entry)
+        self._metrics.queued(priority)
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Место уже выдано, но задача отменена до начала запроса
+                self._release(priority, bucket, False)
+            else:
+                self._discard(bucket, entry)
+            raise
+
+    def _discard(self, bucket: str, entry: list):
+        """
+        Убрать из очереди отменённое ожидание.
+        """
+        queue = self._waiting.get(bucket)
+        if queue is None or entry not in queue:
+            return
+        queue.remove(entry)
+        heapq.heapify(queue)
+        if not queue:
+            del self._waiting[bucket]
+        self._metrics.queued(entry[0], -1)
+
+    def _release(self, priority: int, bucket: str, ok: bool):
+        """
+        Освободить место и передать его следующим ожидающим.
+        """
+        active = self._bucket_active[bucket] - 1
+        if active:
+            self._bucket_active[bucket] = active
+        else:
+            del self._bucket_active[bucket]
+        if priority != PRIORITY_INTERACTIVE:
+            self._active -= 1
+        self._metrics.finished(priority, ok)
+        self._dispatch()
+
+    def _dispatch(self):
+        """
+        Выдать свободные места ожидающим: каждый раз — самому приоритетному
+        (при равенстве — самому раннему) среди голов очередей свободных bucket'ов.
+        """
+        while self._waiting:
+            best_bucket = None
+            best = None
+            for bucket, queue in self._waiting.items():
+                head = queue[0]
+                if (best is None or head[:2] < best[:2]) and self._can_start(head[0], bucket):
+                    best_bucket = bucket
+                    best = head
+
+            if best is None:
+                return
+
+            queue = self._waiting[best_bucket]
+            heapq.heappop(queue)
+            if not queue:
+                del self._waiting[best_bucket]
+
+            priority, _, future, enqueued_at = best
+            self._metrics.queued(priority, -1)
+            if future.done():
+                continue
+            self._start(priority, best_bucket, time.monotonic() - enqueued_at)
+            future.set_result(None)
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """
+        Метрики по классам приоритета.
+
+        Returns:
+            Dict {класс: queued (глубина очереди), in_flight, completed, failed,
+            wait_avg_ms, wait_max_ms (ожидание места с момента запуска)}
+        """
+        return self._metrics.snapshot()
+
+    def log_metrics(self):
+        """
+        Записать в лог метрики за окно с прошлого отчёта (если были запросы).
+        """
+        report = self._metrics.window_report()
+        if report:
+            logger.info(f"REST-запросы Discord: {report}")
+
+    def start(self):
+        """
+        Запустить периодический отчёт метрик в лог.
+        """
+        if self.metrics_interval and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Остановить отчёт метрик.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.log_metrics()
+
+    async def _run(self):
+        """
+        Основной цикл: отчёт раз в metrics_interval секунд.
+        """
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            self.log_metrics()
+
+
+# Общий планировщик процесса (см. get_rest_scheduler)
+_scheduler: Optional[RestScheduler] = None
+
+
+def get_rest_scheduler() -> RestScheduler:
+    """
+    Получить общий планировщик REST-запросов процесса.
+
+    Создаётся при первом обращении. Сервисы, которым планировщик не передан,
+    используют этот же экземпляр: приоритеты и лимиты bucket'ов работают,
+    только если все запросы проходят через одну очередь.
+
+    Returns:
+        Общий RestScheduler
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = RestScheduler()
+    return _scheduler
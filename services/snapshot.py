@@ -0,0 +1,220 @@
+"""
+Снимок состояния для быстрого перезапуска.
+
+В локальный JSON-файл периодически и при остановке записываются хэш дерева
+команд, доски /staff (ID сообщений и хэши страниц) и ревизия таблиц досок.
+При запуске снимок позволяет не синхронизировать неизменённые команды, не
+читать доски из БД и не запрашивать их сообщения у Discord: первое обновление
+редактирует только страницы, содержимое которых действительно изменилось.
+
+Снимок — только ускорение: при отсутствии, повреждении или устаревании файла
+бот загружает состояние из БД и Discord, как при обычном запуске.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from discord import app_commands
+from config.config_loader import get_config
+from services.staff_embed import StaffEmbedService
+
+logger = logging.getLogger(__name__)
+
+# Версия формата файла: снимок другой версии игнорируется
+SNAPSHOT_VERSION = 1
+
+
+class StateSnapshot:
+    """
+    Снимок состояния бота в локальном файле.
+    """
+
+    def __init__(self, staff_embed_service: StaffEmbedService, shard_ids: Optional[List[int]] = None):
+        """
+        Инициализировать снимок.
+
+        Args:
+            staff_embed_service: Сервис досок /staff
+            shard_ids: Шарды процесса (у каждого набора шардов свой файл)
+        """
+        self.staff_embed_service = staff_embed_service
+
+        snapshot_config = get_config().get('snapshot', {})
+        self.path = snapshot_config.get('path', 'snapshot.json')
+        self.save_interval = snapshot_config.get('save_interval', 300)
+        if shard_ids:
+            root, ext = os.path.splitext(self.path)
+            self.path = f"{root}.shards-{'-'.join(str(shard_id) for shard_id in sorted(shard_ids))}{ext}"
+
+        self._data: Dict[str, Any] = {}
+        # Хэш дерева команд, синхронизированного с Discord: application_id, hash
+        self._commands: Optional[Dict[str, Any]] = None
+        # Содержимое последней записи (без saved_at): неизменённый снимок не переписывается
+        self._last_saved: Optional[str] = None
+        # Доски загружены или восстановлены (start вызывается после check_and_restore_staff_message).
+        # До этого в снимок пишутся доски из прочитанного файла: пустой индекс с актуальной
+        # ревизией при следующем запуске восстановился бы как "досок нет"
+        self._ready = False
+        self._stop_event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self) -> bool:
+        """
+        Прочитать снимок из файла.
+
+        Returns:
+            True если снимок прочитан, False если файла нет или он повреждён
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(f"Не удалось прочитать снимок состояния {self.path}: {e}")
+            return False
+
+        if not isinstance(data, dict) or data.get('version') != SNAPSHOT_VERSION:
+            logger.warning(f"Снимок состояния {self.path} другой версии, игнорирую")
+            return False
+
+        self._data = data
+        self._commands = data.get('commands')
+        logger.info(f"Загружен снимок состояния от {data.get('saved_at')}")
+        return True
+
+    @property
+    def boards(self) -> Dict[str, Any]:
+        """
+        Доски /staff из снимка (формат export_message_index).
+        """
+        return self._data.get('boards') or {}
+
+    @property
+    def boards_revision(self) -> Optional[List[Any]]:
+        """
+        Ревизия таблиц досок на момент записи снимка.
+        """
+        return self._data.get('boards_revision')
+
+    @staticmethod
+    def compute_command_tree_hash(tree: app_commands.CommandTree) -> str:
+        """
+        Хэш глобальных команд в том виде, в котором их отправляет tree.sync.
+
+        Args:
+            tree: Дерево команд
+
+        Returns:
+            SHA-256 в hex
+        """
+        payload = sorted(
+            (command.to_dict(tree) for command in tree.get_commands()),
+            key=lambda command: (command.get('type', 1), command['name'])
+        )
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+
+    def needs_command_sync(self, tree: app_commands.CommandTree, application_id: Optional[int]) -> bool:
+        """
+        Проверить, изменились ли команды с последней синхронизации.
+
+        Args:
+            tree: Дерево команд
+            application_id: ID приложения Discord
+
+        Returns:
+            True если нужен tree.sync, False если команды не изменились
+        """
+        return self._commands != {'application_id': application_id, 'hash': self.compute_command_tree_hash(tree)}
+
+    def mark_commands_synced(self, tree: app_commands.CommandTree, application_id: Optional[int]):
+        """
+        Запомнить хэш синхронизированного дерева команд.
+
+        Args:
+            tree: Дерево команд
+            application_id: ID приложения Discord
+        """
+        self._commands = {'application_id': application_id, 'hash': self.compute_command_tree_hash(tree)}
+
+    async def save(self) -> bool:
+        """
+        Записать снимок в файл (через временный файл, чтобы не оставить его обрезанным).
+
+        Returns:
+            True если файл записан, False если снимок не изменился
+        """
+        if self._ready:
+            # Ревизия читается до выгрузки: если доска изменится во время запроса,
+            # ревизия в снимке окажется старее досок и снимок при запуске не примется
+            boards_revision = await asyncio.to_thread(self.staff_embed_service.get_index_revision)
+            boards = self.staff_embed_service.export_message_index()
+        else:
+            boards_revision = self.boards_revision
+            boards = self.boards
+
+        data = {
+            'version': SNAPSHOT_VERSION,
+            'commands': self._commands,
+            'boards_revision': boards_revision,
+            'boards': boards,
+        }
+        content = json.dumps(data, sort_keys=True, ensure_ascii=False)
+        if content == self._last_saved:
+            return False
+
+        data['saved_at'] = datetime.utcnow().isoformat()
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+        self._data = data
+        self._last_saved = content
+        logger.debug(f"Снимок состояния записан в {self.path}")
+        return True
+
+    def start(self):
+        """
+        Запустить периодическую запись снимка.
+
+        Вызывается после загрузки или восстановления досок /staff.
+        """
+        self._ready = True
+        if self._task is None or self._task.done():
+            self._stop_event.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Остановить периодическую запись и записать снимок.
+        """
+        if self._task is not None:
+            self._stop_event.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.save()
+
+    async def _run(self):
+        """
+        Основной цикл: запись снимка раз в save_interval секунд.
+        """
+        while not self._stop_event.is_set():
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self.save_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            if self._stop_event.is_set():
+                break
+
+            try:
+                await self.save()
+            except Exception as e:
+                logger.error(f"Ошибка при записи снимка состояния: {e}", exc_info=True)
@@ -1,47 +1,378 @@
 """
 Сервис для создания и обновления Embed сообщения /staff.
+
+Список администрации раскладывается на страницы (одно сообщение с одним Embed
+на страницу) с учётом лимитов Discord. При обновлении редактируются только
+страницы, содержимое которых изменилось.
 """
 
+import asyncio
+import bisect
+import hashlib
+import json
 import logging
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 import discord
-from config.config_loader import get_config
-from database.models import StaffMessage, UserPrivilege
+from sqlalchemy import func
+from config.config_loader import get_config, get_guild_config
+from database.models import StaffMessage, StaffMessagePage
 from database.connection import get_db_session
+from services.rest import RestScheduler, get_rest_scheduler, PRIORITY_EMBED, channel_bucket
 
 logger = logging.getLogger(__name__)
 
+# Лимиты Discord для Embed
+EMBED_FIELD_VALUE_LIMIT = 1024
+EMBED_FIELDS_LIMIT = 25
+EMBED_TOTAL_LIMIT = 6000
+
+EMBED_TITLE = "📋 Список администрации"
+EMBED_FOOTER = "Обновляется автоматически при изменении ролей"
+# Запас под суффикс номера страницы в подвале
+PAGE_SUFFIX_RESERVE = 32
+
+STATUS_EMOJI = {
+    discord.Status.online: "🟢",
+    discord.Status.idle: "🟡",
+    discord.Status.dnd: "🔴",
+}
+
 
 class StaffEmbedService:
     """
     Сервис для управления Embed сообщением /staff.
     """
     
-    def __init__(self, bot: discord.Client):
+    def __init__(self, bot: discord.Client, rest_scheduler: Optional[RestScheduler] = None):
         """
         Инициализировать сервис.
         
         Args:
             bot: Экземпляр Discord бота
+            rest_scheduler: Планировщик REST-запросов (None — общий планировщик процесса)
         """
         self.bot = bot
-        self.config = get_config()
-        self.admin_roles = self.config['discord']['admin_roles']
-        self.staff_channel_id = self.config['discord']['staff_channel_id']
+        self.rest_scheduler = rest_scheduler or get_rest_scheduler()
+        # Настройки по серверам: guild_id -> admin_roles, sorted_roles, admin_role_ids, staff_channel_id
+        self._guild_states: Dict[int, Dict[str, Any]] = {}
+        # Доски /staff по серверам: guild_id -> record_id, channel_id, pages [(message_id, fingerprint)]
+        self._boards: Dict[int, Dict[str, Any]] = {}
+        # ID участников с ролями администрации: guild_id -> set (для быстрого отсева событий)
+        self._staff_ids: Dict[int, Set[int]] = {}
+        # Кэш отрисовки: guild_id -> role_id -> entries {member_id: (sort_key, line)},
+        # order (отсортированные sort_key) и chunks (готовые значения полей или None)
+        self._sections: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        # Отложенные обновления Embed: guild_id -> задача
+        self._pending_refresh: Dict[int, asyncio.Task] = {}
+        # Доски, восстановленные из снимка: первое обновление не запрашивает их сообщения
+        self._restored: Set[int] = set()
+        
+        staff_embed_config = get_config().get('staff_embed', {})
+        # Окно, за которое изменения копятся в одно редактирование сообщения
+        self.refresh_delay = staff_embed_config.get('refresh_delay', 10)
+    
+    def _get_guild_state(self, guild_id: int) -> Dict[str, Any]:
+        """
+        Получить настройки /staff для сервера (вычисляются один раз).
+        
+        Args:
+            guild_id: ID Discord сервера
+            
+        Returns:
+            Dict с ключами admin_roles, sorted_roles, admin_role_ids, staff_channel_id
+        """
+        state = self._guild_states.get(guild_id)
+        if state is None:
+            guild_config = get_guild_config(guild_id)
+            admin_roles = guild_config['admin_roles']
+            state = {
+                'admin_roles': admin_roles,
+                # Роли по приоритету (от высших к низшим)
+                'sorted_roles': sorted(admin_roles, key=lambda x: x['priority'], reverse=True),
+                'admin_role_ids': frozenset(role['role_id'] for role in admin_roles),
+                'staff_channel_id': guild_config['staff_channel_id'],
+            }
+            self._guild_states[guild_id] = state
+        return state
+    
+    def get_admin_role_ids(self, guild_id: int) -> frozenset:
+        """
+        Получить ID ролей администрации сервера.
+        
+        Args:
+            guild_id: ID Discord сервера
+            
+        Returns:
+            frozenset с ID ролей
+        """
+        return self._get_guild_state(guild_id)['admin_role_ids']
+    
+    def is_admin_role(self, role: discord.Role) -> bool:
+        """
+        Проверить, является ли роль ролью администрации своего сервера.
+        
+        Args:
+            role: Роль Discord
+            
+        Returns:
+            True если роль входит в admin_roles сервера, False иначе
+        """
+        return role.id in self.get_admin_role_ids(role.guild.id)
+    
+    def has_staff_message(self, guild_id: int) -> bool:
+        """
+        Проверить, создано ли на сервере сообщение /staff.
+        
+        Args:
+            guild_id: ID Discord сервера
+            
+        Returns:
+            True если сообщение известно, False иначе
+        """
+        return guild_id in self._boards
+    
+    def load_message_index(self):
+        """
+        Загрузить доски /staff всех серверов двумя запросами.
+        
+        Вызывается при запуске бота (после on_ready). Записи без guild_id, созданные
+        до поддержки нескольких серверов, привязываются к серверу по каналу.
+        """
+        db = get_db_session()
+        try:
+            records = db.query(StaffMessage).all()
+            
+            for record in records:
+                if record.guild_id is not None:
+                    continue
+                channel = self.bot.get_channel(record.channel_id)
+                if channel is not None:
+                    record.guild_id = channel.guild.id
+            db.commit()
+            
+            pages: Dict[int, List[Tuple[int, Optional[str]]]] = {}
+            for page in db.query(StaffMessagePage).order_by(
+                StaffMessagePage.staff_message_id, StaffMessagePage.page_index
+            ):
+                pages.setdefault(page.staff_message_id, []).append((page.message_id, page.fingerprint))
+            
+            self._boards = {
+                record.guild_id: self._make_board(record, pages.get(record.id))
+                for record in records if record.guild_id is not None
+            }
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        
+        logger.info(f"Загружено досок /staff: {len(self._boards)}")
+    
+    def get_index_revision(self) -> List[Any]:
+        """
+        Получить ревизию таблиц досок /staff для проверки актуальности снимка.
+        
+        Каждое сохранение страниц пересоздаёт строки staff_message_pages, поэтому
+        количество, максимальный ID и время изменения строк меняются при любом
+        изменении досок.
+        
+        Returns:
+            Список значений, пригодный для JSON
+        """
+        db = get_db_session()
+        try:
+            revision = []
+            for model in (StaffMessage, StaffMessagePage):
+                count, max_id, max_updated_at = db.query(
+                    func.count(model.id), func.max(model.id), func.max(model.updated_at)
+                ).one()
+                revision.extend([count, max_id, max_updated_at.isoformat() if max_updated_at else None])
+            return revision
+        finally:
+            db.close()
     
-    def _get_staff_members(self, guild: discord.Guild) -> dict:
+    def export_message_index(self) -> Dict[str, Any]:
         """
-        Получить список администраторов по ролям.
+        Выгрузить доски /staff для снимка состояния.
+        
+        Returns:
+            Dict guild_id (строкой) -> record_id, channel_id, pages [[message_id, fingerprint]]
+        """
+        return {
+            str(guild_id): {
+                'record_id': board['record_id'],
+                'channel_id': board['channel_id'],
+                'pages': [[message_id, fingerprint] for message_id, fingerprint in board['pages']]
+            }
+            for guild_id, board in self._boards.items()
+        }
+    
+    def restore_message_index(self, boards: Dict[str, Any], revision: Optional[List[Any]]) -> bool:
+        """
+        Восстановить доски /staff из снимка, если таблицы досок не менялись после его записи.
+        
+        Сообщения восстановленных досок существовали на момент записи снимка, поэтому
+        первое обновление не запрашивает их у Discord, а редактирует только страницы
+        с изменившимся хэшем. Существование проверяет следующий периодический проход.
+        
+        Args:
+            boards: Доски из export_message_index
+            revision: Ревизия из get_index_revision на момент записи снимка
+            
+        Returns:
+            True если доски восстановлены, False если снимок устарел (нужен load_message_index)
+        """
+        if not revision or self.get_index_revision() != revision:
+            return False
+        
+        self._boards = {
+            int(guild_id): {
+                'record_id': board['record_id'],
+                'channel_id': board['channel_id'],
+                'pages': [(message_id, fingerprint) for message_id, fingerprint in board['pages']]
+            }
+            for guild_id, board in boards.items()
+        }
+        self._restored = set(self._boards)
+        
+        logger.info(f"Доски /staff восстановлены из снимка: {len(self._boards)}")
+        return True
+    
+    @staticmethod
+    def _make_board(record: StaffMessage, pages: Optional[List[Tuple[int, Optional[str]]]]) -> Dict[str, Any]:
+        """
+        Сформировать состояние доски по записи БД.
+        
+        У записей, созданных до появления страниц, единственной страницей считается
+        message_id (без хэша, поэтому она будет перерисована при первом обновлении).
+        """
+        return {
+            'record_id': record.id,
+            'channel_id': record.channel_id,
+            'pages': list(pages) if pages else [(record.message_id, None)]
+        }
+    
+    def is_staff_update(self, before: discord.Member, after: discord.Member) -> bool:
+        """
+        Проверить, затрагивает ли изменение участника роли администрации.
+        
+        Args:
+            before: Участник до изменения
+            after: Участник после изменения
+            
+        Returns:
+            True если изменился набор ролей администрации, False иначе
+        """
+        before_roles = before.roles
+        after_roles = after.roles
+        if before_roles == after_roles:
+            return False
+        
+        admin_role_ids = self.get_admin_role_ids(after.guild.id)
+        before_admin_roles = admin_role_ids.intersection(role.id for role in before_roles)
+        after_admin_roles = admin_role_ids.intersection(role.id for role in after_roles)
+        if before_admin_roles == after_admin_roles:
+            return False
+        
+        staff_ids = self._staff_ids.get(after.guild.id)
+        if staff_ids is not None:
+            if after_admin_roles:
+                staff_ids.add(after.id)
+            else:
+                staff_ids.discard(after.id)
+        return True
+    
+    def is_staff_member(self, member: discord.Member) -> bool:
+        """
+        Проверить, входит ли участник в администрацию (по множеству ID).
+        
+        Множество строится один раз на сервер и поддерживается is_staff_update,
+        поэтому проверка не перебирает роли участника.
+        
+        Args:
+            member: Участник Discord
+            
+        Returns:
+            True если у участника есть роль администрации, False иначе
+        """
+        staff_ids = self._staff_ids.get(member.guild.id)
+        if staff_ids is None:
+            staff_ids = self._build_staff_ids(member.guild)
+        return member.id in staff_ids
+    
+    def _build_staff_ids(self, guild: discord.Guild) -> Set[int]:
+        """
+        Построить множество ID участников с ролями администрации.
         
         Args:
             guild: Discord сервер
             
         Returns:
-            Dict с ключами role_id и списками участников
+            Множество ID участников
+        """
+        admin_role_ids = self.get_admin_role_ids(guild.id)
+        staff_ids = {
+            member.id for member in guild.members
+            if not admin_role_ids.isdisjoint(role.id for role in member.roles)
+        }
+        self._staff_ids[guild.id] = staff_ids
+        return staff_ids
+    
+    def request_refresh(self, guild: discord.Guild):
+        """
+        Запросить отложенное обновление Embed /staff.
+        
+        Запросы за refresh_delay секунд объединяются в одно редактирование сообщения.
+        
+        Args:
+            guild: Discord сервер
+        """
+        if guild.id in self._pending_refresh:
+            return
+        self._pending_refresh[guild.id] = asyncio.create_task(self._delayed_refresh(guild))
+    
+    async def _delayed_refresh(self, guild: discord.Guild):
+        """
+        Обновить Embed по истечении окна ожидания.
+        """
+        try:
+            await asyncio.sleep(self.refresh_delay)
+        finally:
+            # Снимаем отметку до редактирования: изменения во время запроса попадут в следующее окно
+            self._pending_refresh.pop(guild.id, None)
+        
+        try:
+            await self.update_staff_message(guild)
+        except Exception as e:
+            logger.error(f"Ошибка при отложенном обновлении Embed на сервере {guild.name}: {e}")
+    
+    @staticmethod
+    def _render_member(member: discord.Member) -> Tuple[Tuple[str, int], str]:
         """
-        staff_dict = {}
+        Отрисовать строку участника.
         
-        for role_config in self.admin_roles:
+        Returns:
+            (ключ сортировки, строка со статусом и упоминанием)
+        """
+        status_emoji = STATUS_EMOJI.get(member.status, "⚪")
+        return (member.display_name.lower(), member.id), f"{status_emoji} {member.mention}"
+    
+    def _get_sections(self, guild: discord.Guild) -> Dict[int, Dict[str, Any]]:
+        """
+        Получить кэш отрисовки ролей сервера (строится при первом обращении).
+        
+        Args:
+            guild: Discord сервер
+            
+        Returns:
+            Dict role_id -> секция с ключами entries, order, chunks
+        """
+        sections = self._sections.get(guild.id)
+        if sections is not None:
+            return sections
+        
+        sections = {}
+        for role_config in self._get_guild_state(guild.id)['admin_roles']:
             role_id = role_config['role_id']
             role = guild.get_role(role_id)
             
@@ -50,76 +381,197 @@ class StaffEmbedService:
                 continue
             
             # Получаем всех участников с этой ролью
-            members = [member for member in guild.members if role in member.roles]
-            staff_dict[role_id] = {
-                'role_name': role_config['name'],
-                'members': sorted(members, key=lambda m: m.display_name.lower())
+            entries = {member.id: self._render_member(member) for member in guild.members if role in member.roles}
+            sections[role_id] = {
+                'entries': entries,
+                'order': sorted(sort_key for sort_key, _ in entries.values()),
+                'chunks': None
             }
         
-        return staff_dict
+        self._sections[guild.id] = sections
+        return sections
     
-    def create_embed(self, guild: discord.Guild) -> discord.Embed:
+    def invalidate_member(self, member: discord.Member, removed: bool = False):
         """
-        Создать Embed сообщение со списком администрации.
+        Обновить строки участника в кэше отрисовки.
+        
+        Вызывается при изменении ролей, ника или статуса, а также при выходе
+        с сервера. Перестраиваются только секции ролей, в которых строка участника
+        появилась, исчезла или изменилась.
         
         Args:
-            guild: Discord сервер
+            member: Участник Discord (состояние после изменения)
+            removed: Участник покинул сервер
+        """
+        if removed:
+            self._staff_ids.get(member.guild.id, set()).discard(member.id)
+        
+        sections = self._sections.get(member.guild.id)
+        if sections is None:
+            return
+        
+        role_ids = set() if removed else {role.id for role in member.roles}
+        rendered = None
+        
+        for role_id, section in sections.items():
+            entries = section['entries']
+            order = section['order']
+            old = entries.get(member.id)
+            
+            if role_id in role_ids:
+                if rendered is None:
+                    rendered = self._render_member(member)
+                if old == rendered:
+                    continue
+                if old is not None:
+                    del order[bisect.bisect_left(order, old[0])]
+                bisect.insort(order, rendered[0])
+                entries[member.id] = rendered
+            elif old is not None:
+                del order[bisect.bisect_left(order, old[0])]
+                del entries[member.id]
+            else:
+                continue
+            
+            section['chunks'] = None
+    
+    def apply_member_update(self, before: discord.Member, after: discord.Member) -> bool:
+        """
+        Учесть изменение участника (роли, ник) в кэшах.
+        
+        Args:
+            before: Участник до изменения
+            after: Участник после изменения
             
         Returns:
-            discord.Embed с информацией об администрации
+            True если изменение видно на доске /staff, False иначе
         """
-        staff_dict = self._get_staff_members(guild)
+        if self.is_staff_update(before, after):
+            self.invalidate_member(after)
+            return True
         
-        embed = discord.Embed(
-            title="📋 Список администрации",
-            color=discord.Color.blue(),
-            timestamp=discord.utils.utcnow()
-        )
+        if before.display_name != after.display_name and self.is_staff_member(after):
+            self.invalidate_member(after)
+            return True
         
-        # Сортируем роли по приоритету (от высших к низшим)
-        sorted_roles = sorted(
-            self.admin_roles,
-            key=lambda x: x['priority'],
-            reverse=True
-        )
+        return False
+    
+    @staticmethod
+    def _chunk_lines(lines: List[str]) -> List[str]:
+        """
+        Разбить строки на значения полей не длиннее лимита Discord.
+        """
+        chunks = []
+        current = []
+        current_length = 0
+        for line in lines:
+            line_length = len(line) + (1 if current else 0)
+            if current and current_length + line_length > EMBED_FIELD_VALUE_LIMIT:
+                chunks.append("\n".join(current))
+                current = []
+                current_length = 0
+                line_length = len(line)
+            current.append(line)
+            current_length += line_length
+        chunks.append("\n".join(current))
+        return chunks
+    
+    def _build_fields(self, guild: discord.Guild) -> List[Tuple[str, str]]:
+        """
+        Сформировать поля доски: роли по приоритету, длинные списки разбиты на части.
         
-        for role_config in sorted_roles:
+        Значения полей берутся из кэша, перестраиваются только изменённые секции.
+        
+        Args:
+            guild: Discord сервер
+            
+        Returns:
+            Список (название поля, значение)
+        """
+        sections = self._get_sections(guild)
+        fields = []
+        
+        for role_config in self._get_guild_state(guild.id)['sorted_roles']:
             role_id = role_config['role_id']
             role_name = role_config['name']
             
-            if role_id not in staff_dict:
+            section = sections.get(role_id)
+            if section is None:
                 continue
             
-            members = staff_dict[role_id]['members']
+            if not section['entries']:
+                fields.append((f"**{role_name}**", "*Нет участников*"))
+                continue
             
-            if not members:
-                value = "*Нет участников*"
-            else:
-                # Формируем список участников
-                member_list = []
-                for member in members:
-                    status_emoji = "🟢" if member.status == discord.Status.online else \
-                                  "🟡" if member.status == discord.Status.idle else \
-                                  "🔴" if member.status == discord.Status.dnd else "⚪"
-                    member_list.append(f"{status_emoji} {member.mention}")
-                
-                value = "\n".join(member_list)
-                if len(value) > 1024:  # Ограничение Discord для поля Embed
-                    value = value[:1021] + "..."
-            
-            embed.add_field(
-                name=f"**{role_name}**",
-                value=value,
-                inline=False
-            )
+            chunks = section['chunks']
+            if chunks is None:
+                entries = section['entries']
+                # Ограничение Discord для поля Embed: переносим остаток в следующие поля
+                chunks = self._chunk_lines([entries[member_id][1] for _, member_id in section['order']])
+                section['chunks'] = chunks
+            
+            for index, chunk in enumerate(chunks):
+                name = f"**{role_name}**" if index == 0 else f"**{role_name}** (продолжение)"
+                fields.append((name, chunk))
         
-        embed.set_footer(text="Обновляется автоматически при изменении ролей")
+        return fields
+    
+    def render_pages(self, guild: discord.Guild) -> List[discord.Embed]:
+        """
+        Создать страницы доски со списком администрации.
+        
+        Поля раскладываются по Embed с учётом лимитов Discord
+        (25 полей и 6000 символов на Embed).
+        
+        Args:
+            guild: Discord сервер
+            
+        Returns:
+            Список discord.Embed (минимум одна страница)
+        """
+        budget = EMBED_TOTAL_LIMIT - len(EMBED_TITLE) - len(EMBED_FOOTER) - PAGE_SUFFIX_RESERVE
+        
+        pages: List[List[Tuple[str, str]]] = [[]]
+        page_size = 0
+        for name, value in self._build_fields(guild):
+            field_size = len(name) + len(value)
+            if pages[-1] and (len(pages[-1]) >= EMBED_FIELDS_LIMIT or page_size + field_size > budget):
+                pages.append([])
+                page_size = 0
+            pages[-1].append((name, value))
+            page_size += field_size
         
-        return embed
+        timestamp = discord.utils.utcnow()
+        embeds = []
+        for index, fields in enumerate(pages):
+            embed = discord.Embed(
+                title=EMBED_TITLE,
+                color=discord.Color.blue(),
+                timestamp=timestamp
+            )
+            for name, value in fields:
+                embed.add_field(name=name, value=value, inline=False)
+            
+            footer = EMBED_FOOTER
+            if len(pages) > 1:
+                footer = f"{EMBED_FOOTER} • Страница {index + 1}/{len(pages)}"
+            embed.set_footer(text=footer)
+            embeds.append(embed)
+        
+        return embeds
+    
+    @staticmethod
+    def _fingerprint(embed: discord.Embed) -> str:
+        """
+        Хэш содержимого страницы без timestamp.
+        """
+        data = embed.to_dict()
+        data.pop('timestamp', None)
+        return hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
     
     async def get_or_create_staff_message(self, guild: discord.Guild) -> Optional[discord.Message]:
         """
-        Получить существующее сообщение /staff или создать новое.
+        Получить существующее сообщение /staff (первую страницу доски) или создать доску.
         
         Args:
             guild: Discord сервер
@@ -127,66 +579,236 @@ class StaffEmbedService:
         Returns:
             discord.Message или None при ошибке
         """
-        channel = guild.get_channel(self.staff_channel_id)
+        staff_channel_id = self._get_guild_state(guild.id)['staff_channel_id']
+        channel = guild.get_channel(staff_channel_id)
         if channel is None:
-            logger.error(f"Канал {self.staff_channel_id} не найден")
+            logger.error(f"Канал {staff_channel_id} не найден на сервере {guild.name}")
             return None
         
+        try:
+            board = self._boards.get(guild.id)
+            if board is None:
+                board = self._load_board(guild.id, staff_channel_id)
+            
+            if board is not None:
+                if board['channel_id'] == staff_channel_id:
+                    # Пытаемся получить существующее сообщение
+                    try:
+                        return await self._rest(channel, channel.fetch_message, board['pages'][0][0])
+                    except discord.NotFound:
+                        # Сообщение удалено, создаём доску заново
+                        logger.info(f"Сообщение /staff удалено на сервере {guild.name}, создаём новое")
+                else:
+                    logger.info(f"Канал /staff на сервере {guild.name} изменён, создаём новое сообщение")
+            
+            return await self._create_board(guild, channel, board)
+            
+        except Exception as e:
+            logger.error(f"Ошибка при получении/создании сообщения /staff на сервере {guild.name}: {e}")
+            return None
+    
+    def _load_board(self, guild_id: int, staff_channel_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Загрузить доску сервера из БД (в т.ч. запись без guild_id по каналу).
+        """
         db = get_db_session()
         try:
-            staff_msg_record = db.query(StaffMessage).filter_by(channel_id=self.staff_channel_id).first()
-            
-            if staff_msg_record:
-                # Пытаемся получить существующее сообщение
-                try:
-                    message = await channel.fetch_message(staff_msg_record.message_id)
-                    return message
-                except discord.NotFound:
-                    # Сообщение удалено, создаём новое
-                    logger.info("Сообщение /staff удалено, создаём новое")
-                    db.delete(staff_msg_record)
-                    db.commit()
-            
-            # Создаём новое сообщение
-            embed = self.create_embed(guild)
-            message = await channel.send(embed=embed)
-            
-            # Сохраняем в БД
-            staff_msg_record = StaffMessage(
-                channel_id=self.staff_channel_id,
-                message_id=message.id
+            record = db.query(StaffMessage).filter_by(guild_id=guild_id).first()
+            if record is None:
+                # Запись, созданная до поддержки нескольких серверов
+                record = db.query(StaffMessage).filter_by(channel_id=staff_channel_id, guild_id=None).first()
+                if record is None:
+                    return None
+                record.guild_id = guild_id
+                db.commit()
+            
+            pages = [
+                (page.message_id, page.fingerprint)
+                for page in db.query(StaffMessagePage)
+                .filter_by(staff_message_id=record.id)
+                .order_by(StaffMessagePage.page_index)
+            ]
+            board = self._make_board(record, pages)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        
+        self._boards[guild_id] = board
+        return board
+    
+    async def _create_board(self, guild: discord.Guild, channel: discord.abc.Messageable,
+                            old_board: Optional[Dict[str, Any]]) -> discord.Message:
+        """
+        Отправить все страницы доски заново и сохранить их в БД.
+        
+        Оставшиеся сообщения старой доски удаляются, чтобы не было дублей.
+        
+        Returns:
+            Сообщение первой страницы
+        """
+        if old_board is not None:
+            old_channel = guild.get_channel(old_board['channel_id'])
+            if old_channel is not None:
+                await self._delete_messages(old_channel, [message_id for message_id, _ in old_board['pages']])
+        
+        messages = []
+        pages = []
+        for embed in self.render_pages(guild):
+            message = await self._rest(channel, channel.send, embed=embed)
+            messages.append(message)
+            pages.append((message.id, self._fingerprint(embed)))
+        
+        db = get_db_session()
+        try:
+            # Удаляем запросами сразу: channel_id уникален, а новая запись вставляется ниже
+            old_records = db.query(StaffMessage.id).filter(
+                (StaffMessage.guild_id == guild.id) | (StaffMessage.channel_id == channel.id)
             )
-            db.add(staff_msg_record)
-            db.commit()
+            old_record_ids = [record_id for record_id, in old_records]
+            if old_record_ids:
+                db.query(StaffMessagePage).filter(
+                    StaffMessagePage.staff_message_id.in_(old_record_ids)
+                ).delete(synchronize_session=False)
+                db.query(StaffMessage).filter(StaffMessage.id.in_(old_record_ids)).delete(synchronize_session=False)
             
-            return message
+            record = StaffMessage(guild_id=guild.id, channel_id=channel.id, message_id=messages[0].id)
+            db.add(record)
+            db.flush()
+            db.add_all(
+                StaffMessagePage(staff_message_id=record.id, page_index=index, message_id=message_id,
+                                 fingerprint=fingerprint)
+                for index, (message_id, fingerprint) in enumerate(pages)
+            )
+            db.commit()
             
-        except Exception as e:
-            logger.error(f"Ошибка при получении/создании сообщения /staff: {e}")
+            self._boards[guild.id] = {'record_id': record.id, 'channel_id': channel.id, 'pages': pages}
+        except Exception:
             db.rollback()
-            return None
+            raise
         finally:
             db.close()
+        
+        logger.info(f"Доска /staff на сервере {guild.name} создана: страниц {len(pages)}")
+        return messages[0]
+    
+    async def _rest(self, channel: discord.abc.Messageable, func, *args, **kwargs):
+        """
+        Выполнить REST-запрос к каналу доски через планировщик (приоритет Embed).
+        """
+        return await self.rest_scheduler.run(PRIORITY_EMBED, channel_bucket(channel.id), func, *args, **kwargs)
+    
+    async def _delete_messages(self, channel: discord.abc.Messageable, message_ids: List[int]):
+        """
+        Удалить сообщения, игнорируя уже удалённые.
+        """
+        for message_id in message_ids:
+            try:
+                await self._rest(channel, channel.get_partial_message(message_id).delete)
+            except discord.NotFound:
+                pass
+            except Exception as e:
+                logger.warning(f"Не удалось удалить сообщение /staff {message_id}: {e}")
     
-    async def update_staff_message(self, guild: discord.Guild) -> bool:
+    def _save_pages(self, board: Dict[str, Any]):
         """
-        Обновить Embed сообщение /staff.
+        Сохранить страницы доски в БД.
+        """
+        db = get_db_session()
+        try:
+            db.query(StaffMessagePage).filter_by(
+                staff_message_id=board['record_id']
+            ).delete(synchronize_session=False)
+            db.add_all(
+                StaffMessagePage(staff_message_id=board['record_id'], page_index=index, message_id=message_id,
+                                 fingerprint=fingerprint)
+                for index, (message_id, fingerprint) in enumerate(board['pages'])
+            )
+            db.query(StaffMessage).filter_by(id=board['record_id']).update(
+                {'message_id': board['pages'][0][0]}, synchronize_session=False
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    async def update_staff_message(self, guild: discord.Guild, verify: bool = False) -> bool:
+        """
+        Обновить доску /staff.
+        
+        Страницы перерисовываются, но редактируются только те, чей хэш изменился.
+        Новые страницы досылаются, лишние удаляются. Если сообщение доски удалено,
+        доска создаётся заново.
         
         Args:
             guild: Discord сервер
+            verify: Проверить существование первой страницы, даже если она не изменилась
             
         Returns:
             True если обновление успешно, False иначе
         """
-        message = await self.get_or_create_staff_message(guild)
-        if message is None:
+        staff_channel_id = self._get_guild_state(guild.id)['staff_channel_id']
+        channel = guild.get_channel(staff_channel_id)
+        if channel is None:
+            logger.error(f"Канал {staff_channel_id} не найден на сервере {guild.name}")
             return False
         
+        board = self._boards.get(guild.id)
+        if board is None or board['channel_id'] != staff_channel_id:
+            if await self.get_or_create_staff_message(guild) is None:
+                return False
+            board = self._boards[guild.id]
+        
+        if verify:
+            # Полная перерисовка: страхует кэш от пропущенных событий
+            self._sections.pop(guild.id, None)
+        
+        embeds = self.render_pages(guild)
+        pages = board['pages']
+        old_pages = list(pages)
+        edited = 0
+        
         try:
-            embed = self.create_embed(guild)
-            await message.edit(embed=embed)
-            return True
+            if verify and guild.id not in self._restored:
+                await self._rest(channel, channel.fetch_message, pages[0][0])
+            self._restored.discard(guild.id)
+            
+            try:
+                for index, embed in enumerate(embeds):
+                    fingerprint = self._fingerprint(embed)
+                    if index < len(pages):
+                        message_id, old_fingerprint = pages[index]
+                        if old_fingerprint != fingerprint:
+                            await self._rest(channel, channel.get_partial_message(message_id).edit, embed=embed)
+                            pages[index] = (message_id, fingerprint)
+                            edited += 1
+                    else:
+                        message = await self._rest(channel, channel.send, embed=embed)
+                        pages.append((message.id, fingerprint))
+                        edited += 1
+                
+                if len(pages) > len(embeds):
+                    await self._delete_messages(channel, [message_id for message_id, _ in pages[len(embeds):]])
+                    del pages[len(embeds):]
+            finally:
+                if pages != old_pages:
+                    self._save_pages(board)
+        except discord.NotFound:
+            # Сообщение доски удалено, пересоздаём
+            logger.info(f"Сообщение /staff удалено на сервере {guild.name}, пересоздаю")
+            try:
+                await self._create_board(guild, channel, board)
+                return True
+            except Exception as e:
+                logger.error(f"Ошибка при пересоздании доски /staff на сервере {guild.name}: {e}")
+                return False
         except Exception as e:
-            logger.error(f"Ошибка при обновлении сообщения /staff: {e}")
+            logger.error(f"Ошибка при обновлении сообщения /staff на сервере {guild.name}: {e}")
             return False
-
+        
+        if edited:
+            logger.debug(f"Доска /staff на сервере {guild.name}: изменено страниц {edited}/{len(embeds)}")
+        return True
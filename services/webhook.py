@@ -0,0 +1,423 @@
+"""
+Приём изменений привилегий от игровых серверов (HTTP webhook).
+
+Плагин на Rust-сервере отправляет событие при изменении группы игрока
+(usergroup add/remove, выдача из магазина), и бот сразу проводит его через
+тот же путь, что и /addprivilege: запись привилегии → роли Discord → Embed
+/staff. Опрашивать всех игроков по RCON не нужно.
+
+Запрос подписывается HMAC-SHA256 общим секретом: заголовок X-Timestamp
+(Unix-время) и X-Signature (hex-подпись строки "<timestamp>.<тело>").
+Защита от повтора перехваченных запросов: подпись принимается один раз
+в пределах max_skew, а событие игрока — только с seq больше последнего
+принятого (старое событие не применится после более нового). Подписи и seq
+хранятся в памяти процесса: сразу после перезапуска бота перехваченный
+запрос можно повторить, пока его X-Timestamp не старше max_skew.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+import discord
+from aiohttp import web
+from config.config_loader import get_config
+from services.audit import AUDIT_PRIVILEGE_SYNC
+from services.privilege_sync import (
+    PrivilegeSyncService, SYNC_UPDATED, SYNC_UNCHANGED, SYNC_NO_PRIVILEGE, SYNC_DB_ERROR
+)
+from services.rcon import RCON_PRIORITY_BULK
+from services.staff_embed import StaffEmbedService
+from utils.steam import to_steam_id64
+
+logger = logging.getLogger(__name__)
+
+# SteamID не привязан к пользователю Discord (привязка — через /addprivilege)
+SYNC_UNKNOWN_PLAYER = 'unknown_player'
+# Группа не относится к администрации (нет в privileges.groups)
+SYNC_IGNORED = 'ignored'
+
+# Максимальный размер тела запроса
+MAX_BODY_SIZE = 64 * 1024
+
+
+class PrivilegeWebhook:
+    """
+    HTTP-сервер для событий изменения привилегий с игровых серверов.
+    """
+
+    def __init__(self, bot: discord.Client, privilege_sync_service: PrivilegeSyncService,
+                 staff_embed_service: StaffEmbedService):
+        """
+        Инициализировать webhook.
+
+        Args:
+            bot: Discord клиент
+            privilege_sync_service: Сервис синхронизации привилегий
+            staff_embed_service: Сервис для обновления Embed
+        """
+        self.bot = bot
+        self.privilege_sync_service = privilege_sync_service
+        self.staff_embed_service = staff_embed_service
+
+        webhook_config = get_config().get('webhook', {})
+        self.host = webhook_config.get('host', '127.0.0.1')
+        self.port = webhook_config.get('port', 8090)
+        self.path = webhook_config.get('path', '/privilege')
+        self.secret = os.getenv(webhook_config.get('secret_env', 'WEBHOOK_SECRET'), '')
+        # Допустимое расхождение X-Timestamp с часами бота (защита от повтора старых запросов)
+        self.max_skew = webhook_config.get('max_skew', 300)
+        self.queue_size = webhook_config.get('queue_size', 1000)
+        # Повтор события при ошибке БД: пауза перед повтором и число попыток
+        self.retry_delay = webhook_config.get('retry_delay', 5.0)
+        self.max_attempts = webhook_config.get('max_attempts', 3)
+
+        # Принятые подписи: подпись -> до какого времени (Unix) её X-Timestamp ещё действителен
+        self._seen_signatures: Dict[str, float] = {}
+        # Последний применённый seq по SteamID: события с seq не больше него отбрасываются
+        self._last_seq: Dict[int, int] = {}
+        # Событие, которое применяется сейчас (уже снято с очереди)
+        self._applying: Optional[Dict[str, Any]] = None
+
+        # Ожидающие обработки события: steam_id -> последнее событие (старые перезаписываются)
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._runner: Optional[web.AppRunner] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.stats: Counter = Counter()
+
+    def verify_signature(self, timestamp: Optional[str], signature: Optional[str], body: bytes) -> bool:
+        """
+        Проверить подпись запроса.
+
+        Args:
+            timestamp: Заголовок X-Timestamp
+            signature: Заголовок X-Signature (hex, допускается префикс "sha256=")
+            body: Тело запроса
+
+        Returns:
+            True если подпись верна и запрос не устарел
+        """
+        if not timestamp or not signature:
+            return False
+        try:
+            if abs(time.time() - int(timestamp)) > self.max_skew:
+                return False
+        except ValueError:
+            return False
+
+        expected = hmac.new(self.secret.encode('utf-8'), timestamp.encode('utf-8') + b'.' + body,
+                            hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected.encode('ascii'), signature.removeprefix('sha256=').encode('utf-8'))
+
+    def parse_event(self, data: Any) -> Dict[str, Any]:
+        """
+        Разобрать событие изменения привилегии.
+
+        Формат: {"steam_id": "7656...", "group": "admin" или null,
+        "expires_at": "2025-01-31T23:59:59Z" или null, "seq": 1735689599000,
+        "server": "main"}. group — текущая группа администрации игрока после
+        изменения (null — группа снята). seq — номер события, растущий для
+        игрока на всех серверах (например, Unix-время изменения в миллисекундах).
+
+        Args:
+            data: Объект из JSON
+
+        Returns:
+            Dict с ключами steam_id, group, expires_at (UTC без timezone), seq, server
+
+        Raises:
+            ValueError: Если событие некорректно
+        """
+        if not isinstance(data, dict):
+            raise ValueError("событие должно быть объектом")
+
+        steam_id = to_steam_id64(data.get('steam_id'))
+        if steam_id is None:
+            raise ValueError(f"неверный SteamID: {data.get('steam_id')!r}")
+
+        group = data.get('group')
+        if group is not None and not isinstance(group, str):
+            raise ValueError(f"неверная группа: {group!r}")
+
+        expires_at = data.get('expires_at')
+        if expires_at is not None:
+            try:
+                expires_at = datetime.fromisoformat(str(expires_at).replace('Z', '+00:00'))
+            except ValueError:
+                raise ValueError(f"неверная дата окончания: {expires_at!r}")
+            if expires_at.tzinfo is not None:
+                expires_at = expires_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+        seq = data.get('seq')
+        if not isinstance(seq, int) or isinstance(seq, bool) or seq < 0:
+            raise ValueError(f"неверный seq: {seq!r}")
+
+        return {'steam_id': steam_id, 'group': group or None, 'expires_at': expires_at, 'seq': seq,
+                'server': data.get('server')}
+
+    def _remember_signature(self, timestamp: str, signature: str) -> bool:
+        """
+        Запомнить подпись принятого запроса.
+
+        Подпись хранится, пока её X-Timestamp проходит проверку max_skew,
+        после этого повтор запроса отклоняется по времени.
+
+        Args:
+            timestamp: Заголовок X-Timestamp (уже проверен)
+            signature: Заголовок X-Signature (уже проверен)
+
+        Returns:
+            True если подпись новая, False если запрос уже принимался
+        """
+        now = time.time()
+        # Подписи хранятся в порядке поступления: устаревшие снимаются с начала
+        while self._seen_signatures:
+            oldest = next(iter(self._seen_signatures))
+            if self._seen_signatures[oldest] >= now:
+                break
+            del self._seen_signatures[oldest]
+
+        signature = signature.removeprefix('sha256=').lower()
+        if signature in self._seen_signatures:
+            return False
+        self._seen_signatures[signature] = int(timestamp) + self.max_skew
+        return True
+
+    def _normalize_group(self, group: Optional[str]) -> Optional[str]:
+        """
+        Привести имя группы к записи из privileges.groups (без учёта регистра).
+        """
+        for privilege_group in self.privilege_sync_service.privilege_groups:
+            if privilege_group.lower() == group.lower():
+                return privilege_group
+        return None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """
+        Обработать POST-запрос: проверить подпись и поставить события в очередь.
+
+        Тело — одно событие или список событий (см. parse_event).
+        """
+        body = await request.read()
+        if not self.verify_signature(request.headers.get('X-Timestamp'), request.headers.get('X-Signature'), body):
+            self.stats['unauthorized'] += 1
+            logger.warning(f"Webhook: отклонён запрос с неверной подписью от {request.remote}")
+            return web.json_response({'error': 'unauthorized'}, status=401)
+
+        try:
+            data = json.loads(body)
+            events = [self.parse_event(item) for item in (data if isinstance(data, list) else [data])]
+        except ValueError as e:
+            self.stats['bad_request'] += 1
+            logger.warning(f"Webhook: некорректный запрос: {e}")
+            return web.json_response({'error': str(e)}, status=400)
+
+        new_steam_ids = {event['steam_id'] for event in events} - self._pending.keys()
+        if len(self._pending) + len(new_steam_ids) > self.queue_size:
+            self.stats['overflow'] += 1
+            logger.warning(f"Webhook: очередь событий переполнена ({len(self._pending)})")
+            return web.json_response({'error': 'queue full'}, status=503)
+
+        # Подпись запоминается только у принятого запроса: отклонённый (503) можно отправить повторно
+        if not self._remember_signature(request.headers['X-Timestamp'], request.headers['X-Signature']):
+            self.stats['replayed'] += 1
+            logger.warning(f"Webhook: отклонён повторный запрос от {request.remote}")
+            return web.json_response({'error': 'replayed'}, status=409)
+
+        accepted = 0
+        for event in events:
+            steam_id = event['steam_id']
+            if event['seq'] <= self._latest_seq(steam_id):
+                # Событие не новее уже принятого (повтор или опоздавшее): применять его нельзя
+                self.stats['stale'] += 1
+                continue
+            # Для игрока важна только последняя группа: промежуточные события не обрабатываются
+            self._pending.pop(steam_id, None)
+            self._pending[steam_id] = event
+            accepted += 1
+        self._wakeup.set()
+        return web.json_response({'accepted': accepted, 'stale': len(events) - accepted}, status=202)
+
+    def _latest_seq(self, steam_id: int) -> int:
+        """
+        Наибольший seq игрока среди применённых, ожидающих и применяемого сейчас событий.
+        """
+        latest = self._last_seq.get(steam_id, -1)
+        for event in (self._pending.get(steam_id), self._applying):
+            if event is not None and event['steam_id'] == steam_id:
+                latest = max(latest, event['seq'])
+        return latest
+
+    async def apply_event(self, event: Dict[str, Any]) -> str:
+        """
+        Применить событие: запись привилегии → роли на всех серверах Discord → Embed /staff.
+
+        При нескольких RCON-серверах событие описывает только один из них,
+        поэтому группа перечитывается через pinfo со всех серверов
+        (один игрок, а не опрос всех).
+
+        Args:
+            event: Событие (см. parse_event)
+
+        Returns:
+            Статус (SYNC_UPDATED, SYNC_UNCHANGED, SYNC_UNKNOWN_PLAYER, SYNC_IGNORED, SYNC_DB_ERROR)
+        """
+        service = self.privilege_sync_service
+        steam_id = event['steam_id']
+
+        group = event['group']
+        expires_at = event['expires_at']
+        if group is not None:
+            group = self._normalize_group(group)
+            if group is None:
+                return SYNC_IGNORED
+
+        previous = service.find_privilege(steam_id)
+        if previous is None:
+            return SYNC_UNKNOWN_PLAYER
+        discord_user_id = previous['discord_user_id']
+
+        if len(service.rcon_cluster.names) > 1:
+            result = await service.fetch_privilege(steam_id, RCON_PRIORITY_BULK)
+            if result['status'] in (SYNC_UPDATED, SYNC_NO_PRIVILEGE):
+                group, expires_at = result['group'], result['expires_at']
+            else:
+                logger.warning(f"Webhook: pinfo для SteamID {steam_id} не выполнен, используется событие")
+
+        try:
+            data_changed = service.save_privilege(discord_user_id, steam_id, group, expires_at)
+        except Exception as e:
+            logger.error(f"Ошибка при работе с БД: {e}", exc_info=True)
+            return SYNC_DB_ERROR
+
+        if not data_changed:
+            return SYNC_UNCHANGED
+
+        service.audit(AUDIT_PRIVILEGE_SYNC, target_id=discord_user_id, steam_id=steam_id,
+                      privilege_group=group, expires_at=expires_at, details=f"webhook: {event['server'] or '-'}")
+
+        now = datetime.utcnow()
+        active_groups = service.get_active_groups(discord_user_id, now)
+        old_group = previous['privilege_group']
+        for guild in self.bot.guilds:
+            member = guild.get_member(discord_user_id)
+            if member is None:
+                continue
+
+            if group and (expires_at is None or expires_at > now):
+                await service.apply_roles(guild, member, group)
+            if old_group and old_group != group:
+                await service.revoke_roles(guild, member, old_group, keep_groups=active_groups)
+            # Несколько событий подряд объединяются в одно редактирование доски
+            self.staff_embed_service.request_refresh(guild)
+
+        logger.info(f"ACTION: Webhook: привилегия SteamID {steam_id} ({discord_user_id}): "
+                    f"{old_group or 'нет'} → {group or 'нет'}")
+        return SYNC_UPDATED
+
+    async def _run(self):
+        """
+        Основной цикл: обработка событий по одному в порядке поступления.
+        """
+        while True:
+            while self._pending:
+                steam_id = next(iter(self._pending))
+                event = self._pending.pop(steam_id)
+                self._applying = event
+                try:
+                    status = await self.apply_event(event)
+                except Exception as e:
+                    status = 'error'
+                    logger.error(f"Ошибка при обработке события webhook для SteamID {steam_id}: {e}",
+                                 exc_info=True)
+                finally:
+                    self._applying = None
+                self.stats[status] += 1
+
+                if status not in (SYNC_DB_ERROR, 'error'):
+                    self._last_seq[steam_id] = max(self._last_seq.get(steam_id, -1), event['seq'])
+                elif self._retry(event):
+                    # Ошибка БД обычно общая: пауза, а не повтор по кругу
+                    await asyncio.sleep(self.retry_delay)
+
+            if self._closing:
+                break
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def _retry(self, event: Dict[str, Any]) -> bool:
+        """
+        Вернуть событие, которое не удалось применить, в очередь.
+
+        Клиент уже получил 202, поэтому событие повторяется здесь. Не повторяется,
+        если для игрока уже пришло более новое событие, исчерпаны попытки или бот
+        останавливается.
+
+        Returns:
+            True если событие возвращено в очередь
+        """
+        steam_id = event['steam_id']
+        attempts = event.get('attempts', 1)
+        if steam_id in self._pending or self._closing:
+            return False
+        if attempts >= self.max_attempts:
+            self.stats['dropped'] += 1
+            logger.error(f"Webhook: событие для SteamID {steam_id} не применено после {attempts} попыток")
+            return False
+
+        self._pending[steam_id] = {**event, 'attempts': attempts + 1}
+        return True
+
+    async def start(self) -> bool:
+        """
+        Запустить HTTP-сервер и обработку событий.
+
+        Returns:
+            True если сервер запущен
+        """
+        if self._runner is not None:
+            return True
+        if not self.secret:
+            logger.error("Webhook не запущен: не задан секрет (webhook.secret_env в .env)")
+            return False
+
+        app = web.Application(client_max_size=MAX_BODY_SIZE)
+        app.router.add_post(self.path, self.handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError as e:
+            await runner.cleanup()
+            logger.error(f"Webhook не запущен: не удалось открыть {self.host}:{self.port}: {e}")
+            return False
+
+        self._runner = runner
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Webhook привилегий слушает http://{self.host}:{self.port}{self.path}")
+        return True
+
+    async def stop(self):
+        """
+        Остановить приём запросов и обработать уже принятые события.
+        """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._task is not None:
+            self._closing = True
+            self._wakeup.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.stats:
+            logger.info(f"Webhook: обработано событий {dict(self.stats)}")
@@ -2,9 +2,13 @@
 Утилиты для бота.
 """
 
-from .steam import validate_steam_id
-from .timezone import utc_to_utc3, format_datetime_utc3
-from .pinfo_parser import parse_pinfo_response
+from .steam import validate_steam_id, to_steam_id64, normalize_steam_ids
+from .timezone import utc_to_utc3, utc3_to_utc, format_datetime_utc3
+from .pinfo_parser import parse_pinfo_response, merge_pinfo_results
+from .permissions import has_any_role
+from .ratelimit import TokenBucket
+from .startup import StartupTimings
+from .queue_metrics import QueueMetrics
 
-__all__ = ['validate_steam_id', 'utc_to_utc3', 'format_datetime_utc3', 'parse_pinfo_response']
+__all__ = ['validate_steam_id', 'to_steam_id64', 'normalize_steam_ids', 'utc_to_utc3', 'utc3_to_utc', 'format_datetime_utc3', 'parse_pinfo_response', 'merge_pinfo_results', 'has_any_role', 'TokenBucket', 'StartupTimings', 'QueueMetrics']
 
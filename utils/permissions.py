@@ -0,0 +1,21 @@
+"""
+Утилиты для проверки прав доступа участников.
+"""
+
+from typing import Iterable
+import discord
+
+
+def has_any_role(member: discord.Member, role_ids: Iterable[int]) -> bool:
+    """
+    Проверить, имеет ли участник хотя бы одну из указанных ролей.
+    
+    Args:
+        member: Участник Discord
+        role_ids: ID ролей для проверки
+        
+    Returns:
+        True если у участника есть хотя бы одна роль, False иначе
+    """
+    member_role_ids = {role.id for role in member.roles}
+    return any(role_id in member_role_ids for role_id in role_ids)
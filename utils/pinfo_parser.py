@@ -5,7 +5,7 @@
 import re
 import logging
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 logger = logging.getLogger(__name__)
 
@@ -87,3 +87,44 @@ def parse_pinfo_response(response: str, privilege_groups: list) -> Optional[Dict
         'expires_at': expires_at
     }
 
+
+def merge_pinfo_results(results: List[Dict[str, Any]], privilege_groups: list) -> Dict[str, Any]:
+    """
+    Объединить результаты pinfo с нескольких серверов.
+    
+    Выбирается самая старшая группа (по порядку в privilege_groups), а для неё
+    самая поздняя дата окончания (бессрочная считается самой поздней).
+    
+    Args:
+        results: Результаты parse_pinfo_response (без None)
+        privilege_groups: Список групп привилегий из config.yml (от младшей к старшей)
+        
+    Returns:
+        Dict с ключами has_privilege, group, expires_at
+    """
+    best = None
+    
+    for result in results:
+        if not result['has_privilege']:
+            continue
+        
+        if best is None:
+            best = result
+            continue
+        
+        rank = privilege_groups.index(result['group'])
+        best_rank = privilege_groups.index(best['group'])
+        if rank > best_rank:
+            best = result
+        elif rank == best_rank and best['expires_at'] is not None:
+            if result['expires_at'] is None or result['expires_at'] > best['expires_at']:
+                best = result
+    
+    if best is None:
+        return {
+            'has_privilege': False,
+            'group': None,
+            'expires_at': None
+        }
+    
+    return dict(best)
@@ -0,0 +1,106 @@
+"""
+Метрики очередей с классами приоритета (глубина очереди, время ожидания).
+"""
+
+from typing import Dict, Optional
+
+
+class QueueMetrics:
+    """
+    Счётчики по классам приоритета: накопительные и за окно с прошлого отчёта.
+    """
+
+    def __init__(self, class_names: Dict[int, str]):
+        """
+        Инициализировать метрики.
+
+        Args:
+            class_names: Имена классов приоритета {приоритет: имя}
+        """
+        self.class_names = class_names
+        self._stats: Dict[int, Dict[str, float]] = {
+            priority: {
+                'queued': 0, 'in_flight': 0, 'completed': 0, 'failed': 0,
+                'started': 0, 'wait_total': 0.0, 'wait_max': 0.0,
+                'window_started': 0, 'window_wait_total': 0.0, 'window_wait_max': 0.0,
+            }
+            for priority in class_names
+        }
+
+    def queued(self, priority: int, delta: int = 1):
+        """
+        Изменить глубину очереди класса.
+        """
+        self._stats[priority]['queued'] += delta
+
+    def started(self, priority: int, waited: float):
+        """
+        Учесть начало выполнения после ожидания waited секунд.
+        """
+        stats = self._stats[priority]
+        stats['in_flight'] += 1
+        stats['started'] += 1
+        stats['wait_total'] += waited
+        stats['wait_max'] = max(stats['wait_max'], waited)
+        stats['window_started'] += 1
+        stats['window_wait_total'] += waited
+        stats['window_wait_max'] = max(stats['window_wait_max'], waited)
+
+    def finished(self, priority: int, ok: bool = True):
+        """
+        Учесть завершение выполнения.
+        """
+        stats = self._stats[priority]
+        stats['in_flight'] -= 1
+        stats['completed' if ok else 'failed'] += 1
+
+    def in_flight(self, priority: int) -> int:
+        """
+        Количество выполняемых запросов класса.
+        """
+        return self._stats[priority]['in_flight']
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Накопительные метрики по классам.
+
+        Returns:
+            Dict {класс: queued (глубина очереди), in_flight, completed, failed,
+            wait_avg_ms, wait_max_ms}
+        """
+        result = {}
+        for priority, name in self.class_names.items():
+            stats = self._stats[priority]
+            result[name] = {
+                'queued': stats['queued'],
+                'in_flight': stats['in_flight'],
+                'completed': stats['completed'],
+                'failed': stats['failed'],
+                'wait_avg_ms': stats['wait_total'] / stats['started'] * 1000 if stats['started'] else 0.0,
+                'wait_max_ms': stats['wait_max'] * 1000,
+            }
+        return result
+
+    def window_report(self) -> Optional[str]:
+        """
+        Сводка за окно с прошлого вызова (окно сбрасывается).
+
+        Returns:
+            Строка для лога или None, если в окне не было запросов и очереди пусты
+        """
+        parts = []
+        for priority, name in self.class_names.items():
+            stats = self._stats[priority]
+            if not stats['window_started'] and not stats['queued']:
+                continue
+            started = stats['window_started']
+            wait_avg = stats['window_wait_total'] / started if started else 0.0
+            parts.append(
+                f"{name}: запросов {started}, в очереди {stats['queued']}, "
+                f"ожидание ср. {wait_avg * 1000:.0f} мс / макс. {stats['window_wait_max'] * 1000:.0f} мс"
+            )
+            stats['window_started'] = 0
+            stats['window_wait_total'] = 0.0
+            stats['window_wait_max'] = 0.0
+
+        return '; '.join(parts) if parts else None
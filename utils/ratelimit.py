@@ -0,0 +1,69 @@
+"""
+Ограничение частоты запросов (token bucket).
+"""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket: rate токенов в секунду, не больше capacity в запасе.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Инициализировать bucket.
+
+        Args:
+            rate: Скорость пополнения (токенов в секунду)
+            capacity: Максимальный запас токенов (допустимый всплеск)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        """
+        Пополнить запас по прошедшему времени.
+        """
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        """
+        Текущий запас токенов.
+        """
+        self._refill()
+        return self._tokens
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        Взять токены без ожидания.
+
+        Args:
+            tokens: Количество токенов
+
+        Returns:
+            True если токены взяты, False если запаса не хватает
+        """
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1.0):
+        """
+        Дождаться и взять токены. Ожидающие обслуживаются по очереди.
+
+        Args:
+            tokens: Количество токенов
+        """
+        async with self._lock:
+            while not self.try_acquire(tokens):
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
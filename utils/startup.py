@@ -0,0 +1,85 @@
+"""
+Замеры времени этапов запуска бота.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimings:
+    """
+    Время этапов запуска относительно старта процесса.
+
+    Этапы могут идти параллельно (схема БД и вход в Discord), поэтому для
+    каждого хранится начало и конец, а не только длительность.
+    """
+
+    def __init__(self, started: Optional[float] = None):
+        """
+        Инициализировать замеры.
+
+        Args:
+            started: Момент старта по time.perf_counter() (по умолчанию — сейчас)
+        """
+        self.started = started if started is not None else time.perf_counter()
+        # Этап -> (начало, конец) в секундах от старта
+        self._phases: Dict[str, Tuple[float, float]] = {}
+        self._open: Dict[str, float] = {}
+
+    def elapsed(self) -> float:
+        """
+        Секунд от старта процесса.
+        """
+        return time.perf_counter() - self.started
+
+    def begin(self, name: str):
+        """
+        Отметить начало этапа.
+        """
+        self._open[name] = self.elapsed()
+
+    def end(self, name: str):
+        """
+        Отметить конец этапа (без begin этап считается начатым при старте процесса).
+        """
+        if name not in self._phases:
+            self._phases[name] = (self._open.pop(name, 0.0), self.elapsed())
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Замерить этап блоком with (работает и вокруг await).
+        """
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def has(self, name: str) -> bool:
+        """
+        Проверить, завершён ли этап.
+        """
+        return name in self._phases
+
+    def report(self) -> str:
+        """
+        Сводка этапов в порядке начала.
+
+        Returns:
+            Строка вида "config 0.01-0.03s (0.02s), database 0.03-0.41s (0.38s)"
+        """
+        return ', '.join(
+            f"{name} {start:.2f}-{end:.2f}s ({end - start:.2f}s)"
+            for name, (start, end) in sorted(self._phases.items(), key=lambda item: item[1])
+        )
+
+    def log_report(self, title: str):
+        """
+        Записать сводку в лог.
+        """
+        logger.info(f"{title} за {self.elapsed():.2f}s: {self.report()}")
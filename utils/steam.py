@@ -1,37 +1,107 @@
 """
 Утилиты для работы со SteamID.
+
+Все форматы приводятся к каноническому 64-bit SteamID (int), который
+хранится в БД и передаётся в pinfo.
 """
 
 import re
+from typing import Iterable, List, Optional
 
 
-def validate_steam_id(steam_id: str) -> bool:
+# SteamID64 индивидуального аккаунта = база + AccountID
+STEAM_ID64_BASE = 76561197960265728
+ACCOUNT_ID_MAX = 2 ** 32 - 1
+
+# Шаблоны компилируются один раз: normalize_steam_ids вызывается на тысячах строк импорта
+# STEAM_X:Y:Z, AccountID = Z * 2 + Y
+STEAM2_PATTERN = re.compile(r'^STEAM_[0-5]:([01]):(\d{1,10})$', re.IGNORECASE)
+# [U:1:AccountID] (квадратные скобки необязательны)
+STEAM3_PATTERN = re.compile(r'^\[?U:1:(\d{1,10})\]?$', re.IGNORECASE)
+# 64-bit формат (17 цифр, начинается с 7656119)
+STEAM64_PATTERN = re.compile(r'^7656119\d{10}$')
+
+
+def to_steam_id64(steam_id) -> Optional[int]:
     """
-    Валидировать SteamID.
+    Привести SteamID к 64-bit формату.
     
-    SteamID может быть в форматах:
+    Поддерживаемые форматы:
     - STEAM_0:0:12345678 (старый формат)
-    - 76561198000000000 (64-bit формат)
+    - [U:1:24691356] (Steam3)
+    - 76561198000000000 (64-bit формат, строкой или int)
     
     Args:
-        steam_id: SteamID для валидации
-        
+        steam_id: SteamID в любом формате
+    
     Returns:
-        True если SteamID валиден, False иначе
+        64-bit SteamID или None, если формат неверный
     """
+    if isinstance(steam_id, int) and not isinstance(steam_id, bool):
+        steam_id = str(steam_id)
     if not steam_id or not isinstance(steam_id, str):
-        return False
+        return None
     
     steam_id = steam_id.strip()
     
-    # Проверка старого формата STEAM_0:X:YYYYYYYY
-    old_format = re.match(r'^STEAM_[0-5]:[01]:\d+$', steam_id)
-    if old_format:
-        return True
+    if STEAM64_PATTERN.match(steam_id):
+        account_id = int(steam_id) - STEAM_ID64_BASE
+    else:
+        match = STEAM2_PATTERN.match(steam_id)
+        if match:
+            account_id = int(match.group(2)) * 2 + int(match.group(1))
+        else:
+            match = STEAM3_PATTERN.match(steam_id)
+            if not match:
+                return None
+            account_id = int(match.group(1))
+    
+    if not 0 < account_id <= ACCOUNT_ID_MAX:
+        return None
+    
+    return STEAM_ID64_BASE + account_id
+
+
+def to_steam2(steam_id64: int) -> str:
+    """
+    Привести 64-bit SteamID к старому формату STEAM_0:Y:Z.
+    
+    Args:
+        steam_id64: 64-bit SteamID
+    
+    Returns:
+        SteamID в формате STEAM_0:Y:Z
+    """
+    account_id = steam_id64 - STEAM_ID64_BASE
+    return f"STEAM_0:{account_id % 2}:{account_id // 2}"
+
+
+def normalize_steam_ids(steam_ids: Iterable) -> List[Optional[int]]:
+    """
+    Привести список SteamID к 64-bit формату (для массового импорта).
     
-    # Проверка 64-bit формата (17 цифр, начинается с 7656119)
-    if re.match(r'^7656119\d{10}$', steam_id):
-        return True
+    Args:
+        steam_ids: SteamID в любых форматах
     
-    return False
+    Returns:
+        Список 64-bit SteamID в том же порядке (None для неверных)
+    """
+    return [to_steam_id64(steam_id) for steam_id in steam_ids]
 
+
+def validate_steam_id(steam_id: str) -> bool:
+    """
+    Валидировать SteamID.
+    
+    SteamID может быть в форматах:
+    - STEAM_0:0:12345678 (старый формат)
+    - [U:1:24691356] (Steam3)
+    - 76561198000000000 (64-bit формат)
+    
+    Args:
+        steam_id: SteamID для валидации
+    
+    Returns:
+        True если SteamID валиден, False иначе
+    """
+    return to_steam_id64(steam_id) is not None
@@ -40,3 +40,19 @@ def format_datetime_utc3(utc_dt: datetime, format_str: str = "%d.%m.%Y %H:%M:%S"
     utc3_dt = utc_to_utc3(utc_dt)
     return utc3_dt.strftime(format_str)
 
+
+
+def utc3_to_utc(utc3_dt: datetime) -> datetime:
+    """
+    Конвертировать время UTC+3 (ввод пользователя) в UTC для БД.
+    
+    Args:
+        utc3_dt: datetime в UTC+3 (без timezone или с UTC+3 timezone)
+        
+    Returns:
+        datetime в UTC без timezone
+    """
+    if utc3_dt.tzinfo is None:
+        utc3_dt = utc3_dt.replace(tzinfo=UTC3)
+    
+    return utc3_dt.astimezone(timezone.utc).replace(tzinfo=None)